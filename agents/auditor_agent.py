@@ -0,0 +1,62 @@
+"""
+Auditor Agent for OptiMind
+Reviews solutions that failed the numeric audit (optimization/audit.py)
+"""
+
+import json
+from typing import Any, Dict, Optional
+
+from .base_agent import BaseAgent
+
+
+class AuditorAgent(BaseAgent):
+    """
+    Auditor Agent - Explains numeric audit failures.
+
+    Solutions are audited deterministically first; this agent is only called when residuals,
+    bounds, integrality or the objective fail their tolerances, to explain the violations in
+    terms of the original problem and decide whether the solution can be trusted.
+    """
+
+    def __init__(self, prompt_version: Optional[str] = None):
+        """Initialize the Auditor Agent."""
+        super().__init__(name="Auditor", prompt_version=prompt_version)
+
+    def get_system_prompt(self) -> str:
+        try:
+            return self._load_prompt_from_registry("auditor")
+        except FileNotFoundError:
+            raise FileNotFoundError("Prompt file 'prompts/auditor.txt' not found")
+
+    def review(self, problem: Dict[str, Any], solution: Dict[str, Any], report: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Review a solution that failed the numeric audit
+
+        Args:
+            problem: Structured problem
+            solution: Solver result
+            report: Numeric audit report
+
+        Returns:
+            Dict with success and the parsed review (approved, severity, diagnosis, ...)
+        """
+        input_data = {
+            "problem": problem,
+            "solution": {key: solution.get(key) for key in ('status', 'message', 'solver', 'objective_value',
+                                                            'variables')},
+            "audit": report,
+        }
+        return self.process(input_data)
+
+    def _process_response(self, response: str, input_data: Any, **kwargs) -> Any:
+        cleaned = response.strip()
+        if cleaned.startswith("```json"):
+            cleaned = cleaned[7:]
+        if cleaned.startswith("```"):
+            cleaned = cleaned[3:]
+        if cleaned.endswith("```"):
+            cleaned = cleaned[:-3]
+        try:
+            return json.loads(cleaned.strip())
+        except json.JSONDecodeError:
+            return {"approved": False, "severity": "critical", "diagnosis": response}
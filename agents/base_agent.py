@@ -3,41 +3,52 @@ Base Agent Class for OptiMind
 Provides common functionality for all agents
 """
 
+import asyncio
 import json
-import time
+from concurrent.futures import Future
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional, Tuple
-from openai import OpenAI
+from typing import Dict, Any, Optional, Tuple, List, Iterator
 import streamlit as st
+from .response_cache import ResponseCache, get_default_cache
+from .runtime import get_runtime, get_openai_client, resolve_api_key
+from prompts.registry import get_prompt
 
 class BaseAgent(ABC):
     """Base class for all OptiMind agents"""
     
-    def __init__(self, name: str, model: str = "gpt-4o-mini"):
+    def __init__(self, name: str, model: str = "gpt-4o-mini", cache: Optional[ResponseCache] = None,
+                 use_cache: bool = True, prompt_version: Optional[str] = None):
         """
         Initialize base agent
         
         Args:
             name: Agent name
             model: OpenAI model to use
+            cache: Response cache to use (defaults to the shared SQLite cache)
+            use_cache: Set to False to always call the API
+            prompt_version: Prompt variant to load from the prompt registry
         """
         self.name = name
         self.model = model
+        self.prompt_version = prompt_version
+        self.prompt_hash: Optional[str] = None
+        self.temperature = 0.1  # Low temperature for consistent results
+        self.max_tokens = 2000
+        self.cache = (cache or get_default_cache()) if use_cache else None
         self.client = None
+        self.async_client = None
+        self.api_key: Optional[str] = None
+        self.last_result: Optional[Dict[str, Any]] = None
         self._initialize_client()
     
     def _initialize_client(self):
-        """Initialize OpenAI client"""
+        """Initialize OpenAI client (shared across agents and sessions)"""
         try:
-            # Try to get API key from Streamlit secrets
-            api_key = st.secrets.get("OPENAI", {}).get("OPENAI_API_KEY")
-            if not api_key:
-                # Fallback to environment variable
-                import os
-                api_key = os.getenv("OPENAI_API_KEY")
-            
-            if api_key:
-                self.client = OpenAI(api_key=api_key)
+            # Streamlit secrets first, environment variable as fallback
+            self.api_key = resolve_api_key()
+            
+            if self.api_key:
+                self.client = get_openai_client(self.api_key)
             else:
                 st.error("OpenAI API key not found. Please configure it in Streamlit secrets or environment variables.")
                 self.client = None
@@ -50,6 +61,20 @@ class BaseAgent(ABC):
         """Get the system prompt for this agent"""
         pass
     
+    def _load_prompt_from_registry(self, prompt_name: str) -> str:
+        """
+        Load a prompt from the shared registry and remember its hash
+        
+        Args:
+            prompt_name: Prompt name in the prompts package (e.g. 'meaning')
+            
+        Returns:
+            Prompt text
+        """
+        prompt = get_prompt(prompt_name, self.prompt_version)
+        self.prompt_hash = prompt.hash
+        return prompt.text
+    
     def process(self, input_data: Any, **kwargs) -> Dict[str, Any]:
         """
         Process input data and return result
@@ -69,36 +94,89 @@ class BaseAgent(ABC):
             }
         
         try:
-            # Get system prompt
-            system_prompt = self.get_system_prompt()
+            messages = self._build_messages(input_data, **kwargs)
             
-            # Prepare user message
-            user_message = self._prepare_user_message(input_data, **kwargs)
+            # Serve identical requests from the cache
+            cache_key, cached = self._cache_lookup(messages)
             
-            # Call OpenAI
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_message}
-                ],
-                temperature=0.1,  # Low temperature for consistent results
-                max_tokens=2000
-            )
+            if cached is not None:
+                result = cached["content"]
+                tokens_used = cached["tokens_used"]
+            else:
+                # Call OpenAI
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=self.temperature,
+                    max_tokens=self.max_tokens
+                )
+                
+                # Extract response
+                result = response.choices[0].message.content
+                tokens_used = response.usage.total_tokens
             
-            # Extract response
-            result = response.choices[0].message.content
+            processed = self._build_result(result, tokens_used, cached is not None, input_data, **kwargs)
+            # Só grava no cache respostas que o agente conseguiu processar
+            if cached is None and cache_key is not None:
+                self.cache.set(cache_key, result, model=self.model, tokens_used=tokens_used)
+            return processed
             
-            # Process response
-            processed_result = self._process_response(result, input_data, **kwargs)
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e),
+                "agent": self.name
+            }
+    
+    async def process_async(self, input_data: Any, **kwargs) -> Dict[str, Any]:
+        """
+        Process input data on the shared async runtime
+        
+        Calls run on the process-wide AsyncOpenAI client and are bounded by
+        the runtime's global concurrency semaphore. Can be awaited from any
+        event loop.
+        
+        Args:
+            input_data: Input data to process
+            **kwargs: Additional arguments
             
+        Returns:
+            Dictionary with processing result
+        """
+        runtime = get_runtime()
+        if not runtime.in_runtime_loop():
+            return await asyncio.wrap_future(runtime.submit(self.process_async(input_data, **kwargs)))
+        
+        if not self.async_client and not self.api_key:
             return {
-                "success": True,
-                "result": processed_result,
-                "agent": self.name,
-                "model": self.model,
-                "tokens_used": response.usage.total_tokens
+                "success": False,
+                "error": "OpenAI client not initialized",
+                "agent": self.name
             }
+        
+        try:
+            client = self.async_client or runtime.get_async_client(self.api_key)
+            messages = self._build_messages(input_data, **kwargs)
+            cache_key, cached = await asyncio.to_thread(self._cache_lookup, messages)
+            
+            if cached is not None:
+                result = cached["content"]
+                tokens_used = cached["tokens_used"]
+            else:
+                async with runtime.semaphore:
+                    response = await client.chat.completions.create(
+                        model=self.model,
+                        messages=messages,
+                        temperature=self.temperature,
+                        max_tokens=self.max_tokens
+                    )
+                result = response.choices[0].message.content
+                tokens_used = response.usage.total_tokens
+            
+            processed = self._build_result(result, tokens_used, cached is not None, input_data, **kwargs)
+            if cached is None and cache_key is not None:
+                await asyncio.to_thread(self.cache.set, cache_key, result, model=self.model, tokens_used=tokens_used)
+            return processed
             
         except Exception as e:
             return {
@@ -107,6 +185,141 @@ class BaseAgent(ABC):
                 "agent": self.name
             }
     
+    def submit(self, input_data: Any, **kwargs) -> Future:
+        """
+        Schedule process_async on the shared runtime without blocking
+        
+        Args:
+            input_data: Input data to process
+            **kwargs: Additional arguments
+            
+        Returns:
+            Future resolving to the processing result dictionary
+        """
+        return get_runtime().submit(self.process_async(input_data, **kwargs))
+    
+    def process_stream(self, input_data: Any, **kwargs) -> Iterator[str]:
+        """
+        Process input data, yielding the raw response as it is generated
+        
+        The final result (same structure as process) is available in
+        self.last_result once the generator is exhausted.
+        
+        Args:
+            input_data: Input data to process
+            **kwargs: Additional arguments
+            
+        Yields:
+            Text deltas of the raw model response
+        """
+        self.last_result = None
+        if not self.client:
+            self.last_result = {
+                "success": False,
+                "error": "OpenAI client not initialized",
+                "agent": self.name
+            }
+            return
+        
+        try:
+            messages = self._build_messages(input_data, **kwargs)
+            cache_key, cached = self._cache_lookup(messages)
+            
+            if cached is not None:
+                result = cached["content"]
+                tokens_used = cached["tokens_used"]
+                yield result
+            else:
+                stream = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=self.temperature,
+                    max_tokens=self.max_tokens,
+                    stream=True,
+                    stream_options={"include_usage": True}
+                )
+                
+                parts = []
+                tokens_used = 0
+                for chunk in stream:
+                    if chunk.usage is not None:
+                        tokens_used = chunk.usage.total_tokens
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        parts.append(delta)
+                        yield delta
+                result = "".join(parts)
+            
+            self.last_result = self._build_result(result, tokens_used, cached is not None, input_data, **kwargs)
+            if cached is None and cache_key is not None:
+                self.cache.set(cache_key, result, model=self.model, tokens_used=tokens_used)
+            
+        except Exception as e:
+            self.last_result = {
+                "success": False,
+                "error": str(e),
+                "agent": self.name
+            }
+    
+    def _cache_lookup(self, messages: List[Dict[str, str]]) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """
+        Look up a request in the response cache
+        
+        Args:
+            messages: Chat messages of the request
+            
+        Returns:
+            (cache_key, cached_entry) - both None when caching is disabled
+        """
+        if self.cache is None:
+            return None, None
+        cache_key = self.cache.make_key(self.model, messages, self.temperature, self.max_tokens)
+        return cache_key, self.cache.get(cache_key)
+    
+    def _build_result(self, result: str, tokens_used: int, cached: bool, input_data: Any, **kwargs) -> Dict[str, Any]:
+        """
+        Wrap a raw model response into the standard agent result
+        
+        Args:
+            result: Raw response text
+            tokens_used: Tokens billed for the response
+            cached: Whether the response came from the cache
+            input_data: Original input data
+            **kwargs: Additional arguments
+            
+        Returns:
+            Dictionary with processing result
+        """
+        processed_result = self._process_response(result, input_data, **kwargs)
+        
+        return {
+            "success": True,
+            "result": processed_result,
+            "agent": self.name,
+            "model": self.model,
+            "tokens_used": tokens_used,
+            "cached": cached,
+            "prompt_hash": self.prompt_hash
+        }
+    
+    def _build_messages(self, input_data: Any, **kwargs) -> List[Dict[str, str]]:
+        """
+        Build the chat messages sent to OpenAI
+        
+        Args:
+            input_data: Input data
+            **kwargs: Additional arguments
+            
+        Returns:
+            List with the system and user messages
+        """
+        return [
+            {"role": "system", "content": self.get_system_prompt()},
+            {"role": "user", "content": self._prepare_user_message(input_data, **kwargs)}
+        ]
+    
     def _prepare_user_message(self, input_data: Any, **kwargs) -> str:
         """
         Prepare user message from input data
@@ -162,5 +375,7 @@ class BaseAgent(ABC):
         return {
             "name": self.name,
             "model": self.model,
-            "client_initialized": self.client is not None
+            "client_initialized": self.client is not None,
+            "async_available": self.async_client is not None or self.api_key is not None,
+            "cache_enabled": self.cache is not None
         } 
\ No newline at end of file
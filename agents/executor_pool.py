@@ -0,0 +1,511 @@
+"""
+Sandboxed Executor Pool for OptiMind
+Runs generated model code (Pyomo) outside the app process, isolated by the operating system
+
+Each pool worker is a warm process that imports Pyomo/NumPy/pandas once at startup. Every job
+runs in a fresh fork of a worker, so the import cost is paid once per worker while a job that
+crashes, leaks memory or hits a limit never affects the next one. Requests and results cross
+process boundaries as JSON bytes (never pickle).
+
+The security boundary is the kernel, not Python: the import allowlist and the blocked builtins
+only keep honest code on track (module attributes reach around them). On Linux each job gets:
+
+- new network, PID and mount namespaces: no network interfaces but loopback, no other processes
+  visible or signalable, a read-only root filesystem with the app directory, /proc and /sys
+  hidden, and empty tmpfs mounts (working directory, /dev/shm) as the only writable places;
+- a nested user namespace, so the job holds no capabilities and cannot undo those mounts;
+- no_new_privs, a scrubbed environment, no inherited file descriptors;
+- limits on CPU time, address space, open files, file size and processes (setrlimit), plus the
+  wall-clock limit enforced by the worker.
+
+Namespaces need root or unprivileged user namespaces; the layers actually applied are returned in
+result['isolation'], and REQUIRED_ISOLATION (OPTIMIND_SANDBOX_REQUIRE) refuses to run code
+without the listed layers.
+
+Usage:
+    result = executor_pool.execute(code, inputs={'problem': problem})
+    if result['status'] == 'ok':
+        print(result['result'])
+"""
+
+import builtins
+import contextlib
+import ctypes
+import ctypes.util
+import importlib
+import io
+import json
+import multiprocessing
+import os
+import queue
+import select
+import shutil
+import signal
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from multiprocessing import resource_tracker
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows: sem setrlimit nem fork
+    resource = None
+
+POOL_SIZE = int(os.getenv('OPTIMIND_SANDBOX_WORKERS', '2'))
+CPU_SECONDS = float(os.getenv('OPTIMIND_SANDBOX_CPU_SECONDS', '60'))
+WALL_SECONDS = float(os.getenv('OPTIMIND_SANDBOX_WALL_SECONDS', '300'))
+MEMORY_MB = int(os.getenv('OPTIMIND_SANDBOX_MEMORY_MB', '1024'))
+# Tamanho do diretório de trabalho (tmpfs) e de cada arquivo escrito pelo job
+FILE_MB = int(os.getenv('OPTIMIND_SANDBOX_FILE_MB', '64'))
+MAX_OPEN_FILES = 64
+# Processos extras que o job pode criar (ex.: executáveis de solvers chamados pelo Pyomo)
+MAX_PROCESSES = 16
+MAX_STDOUT = 10_000
+
+# Camadas de isolamento sem as quais o código não roda (ex.: "network,filesystem")
+REQUIRED_ISOLATION = tuple(layer for layer in os.getenv('OPTIMIND_SANDBOX_REQUIRE', '').split(',') if layer)
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+# Diretórios escondidos do job (banco, segredos, informações de outros processos)
+HIDDEN_PATHS: Tuple[str, ...] = (APP_DIR, os.path.expanduser('~/.streamlit'), '/proc', '/sys') + tuple(
+    path for path in os.getenv('OPTIMIND_SANDBOX_HIDE', '').split(os.pathsep) if path)
+# Substituídos por um tmpfs vazio e gravável só do job (semáforos do multiprocessing, usados pelo Pyomo)
+PRIVATE_PATHS: Tuple[str, ...] = ('/dev/shm',)
+
+# Módulos importados uma vez por worker, antes de receber jobs
+PRELOAD: Tuple[str, ...] = ('numpy', 'pandas', 'pyomo.environ')
+
+# Pacotes de topo que o código gerado pode importar
+ALLOWED_IMPORTS = frozenset({
+    'pyomo', 'numpy', 'pandas', 'scipy', 'math', 'cmath', 'statistics', 'random', 'itertools',
+    'functools', 'collections', 'operator', 'decimal', 'fractions', 'json', 're', 'datetime',
+    'typing', 'dataclasses', 'enum', 'heapq', 'bisect', 'copy', 'time',
+})
+
+# Builtins removidos do ambiente do código gerado
+BLOCKED_BUILTINS = ('open', 'input', 'breakpoint', 'exit', 'quit', 'help')
+
+OK = 'ok'
+ERROR = 'error'
+TIMEOUT = 'timeout'
+CPU_LIMIT = 'cpu_limit'
+MEMORY_LIMIT = 'memory_limit'
+CRASHED = 'crashed'
+
+
+class Limits(NamedTuple):
+    """Resource limits of one job"""
+    cpu_seconds: float = CPU_SECONDS
+    wall_seconds: float = WALL_SECONDS
+    memory_mb: int = MEMORY_MB
+
+
+class SandboxUnavailable(RuntimeError):
+    """The platform has no fork/setrlimit (the pool needs a POSIX system)"""
+
+
+def _json_default(value: Any) -> Any:
+    # Escalares/arrays NumPy e valores Pyomo viram tipos JSON nativos
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    if hasattr(value, '__float__'):
+        return float(value)
+    return str(value)
+
+
+def _encode(message: Dict[str, Any]) -> bytes:
+    return json.dumps(message, default=_json_default).encode('utf-8')
+
+
+def _restricted_builtins(allowed: Iterable[str]) -> Dict[str, Any]:
+    allowed = frozenset(allowed)
+
+    def guarded_import(name, globals=None, locals=None, fromlist=(), level=0):
+        if level or name.split('.')[0] not in allowed:
+            raise ImportError(f"Import of '{name}' is not allowed in the sandbox")
+        return builtins.__import__(name, globals, locals, fromlist, level)
+
+    namespace = {name: getattr(builtins, name) for name in dir(builtins) if name not in BLOCKED_BUILTINS}
+    namespace['__import__'] = guarded_import
+    return namespace
+
+
+def _limit(kind: int, value: int):
+    _, hard = resource.getrlimit(kind)
+    resource.setrlimit(kind, (value if hard == resource.RLIM_INFINITY else min(value, hard), hard))
+
+
+def _set_limits(limits: Limits, processes: Optional[int]):
+    """Apply CPU, address-space, file and process limits to the current (forked) process"""
+    used = resource.getrusage(resource.RUSAGE_SELF)
+    _limit(resource.RLIMIT_CPU, int(used.ru_utime + used.ru_stime + limits.cpu_seconds) + 1)
+    _limit(resource.RLIMIT_AS, int(limits.memory_mb) * 1024 * 1024)
+    _limit(resource.RLIMIT_FSIZE, FILE_MB * 1024 * 1024)
+    _limit(resource.RLIMIT_NOFILE, MAX_OPEN_FILES)
+    _limit(resource.RLIMIT_CORE, 0)
+    # RLIMIT_NPROC conta todos os processos do usuário, não só os do job
+    if processes is not None:
+        _limit(resource.RLIMIT_NPROC, processes + MAX_PROCESSES)
+
+
+# --- Isolamento pelo sistema operacional (Linux) ---
+
+_CLONE_NEWNS = 0x00020000
+_CLONE_NEWUSER = 0x10000000
+_CLONE_NEWPID = 0x20000000
+_CLONE_NEWNET = 0x40000000
+_MS_RDONLY, _MS_NOSUID, _MS_NODEV, _MS_NOEXEC = 1, 2, 4, 8
+_MS_REMOUNT, _MS_BIND, _MS_REC, _MS_PRIVATE = 32, 4096, 16384, 1 << 18
+_PR_SET_PDEATHSIG = 1
+_PR_SET_NO_NEW_PRIVS = 38
+
+_libc_handle = None
+
+
+def _libc():
+    global _libc_handle
+    if _libc_handle is None and sys.platform.startswith('linux'):
+        _libc_handle = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        _libc_handle.mount.argtypes = [ctypes.c_char_p] * 3 + [ctypes.c_ulong, ctypes.c_char_p]
+    return _libc_handle
+
+
+def _unshare(flags: int) -> bool:
+    libc = _libc()
+    return bool(libc) and libc.unshare(flags) == 0
+
+
+def _mount(source: Optional[str], target: str, fstype: Optional[str], flags: int, options: Optional[str] = None) -> bool:
+    encode = lambda value: value.encode() if value is not None else None  # noqa: E731
+    return _libc().mount(encode(source), encode(target), encode(fstype), flags, encode(options)) == 0
+
+
+def _user_processes() -> Optional[int]:
+    """Processes owned by this user (None when /proc is unavailable)"""
+    if not os.path.isdir('/proc'):
+        return None
+    uid = os.getuid()
+    count = 0
+    for entry in os.listdir('/proc'):
+        if entry.isdigit():
+            with contextlib.suppress(OSError):
+                count += os.stat(f'/proc/{entry}').st_uid == uid
+    return count
+
+
+def _enter_namespaces(job_dir: str) -> List[str]:
+    """Move this process into new network/PID/mount namespaces and build the job's filesystem view"""
+    uid, gid = os.geteuid(), os.getegid()
+    # Sem root, um user namespace dá as capacidades necessárias dentro dele
+    if not _unshare(_CLONE_NEWNS | _CLONE_NEWNET | _CLONE_NEWPID | (_CLONE_NEWUSER if uid else 0)):
+        return []
+    if uid:
+        with contextlib.suppress(OSError):
+            for name, content in (('setgroups', 'deny'), ('uid_map', f'{uid} {uid} 1'), ('gid_map', f'{gid} {gid} 1')):
+                with open(f'/proc/self/{name}', 'w') as f:
+                    f.write(content)
+    layers = ['network', 'processes']
+    hidden = [path for path in HIDDEN_PATHS if os.path.isdir(path)]
+    private = [path for path in PRIVATE_PATHS if os.path.isdir(path)]
+    if (_mount(None, '/', None, _MS_REC | _MS_PRIVATE)
+            and _mount('tmpfs', job_dir, 'tmpfs', _MS_NOSUID | _MS_NODEV, f'size={FILE_MB}m,mode=0700')
+            and all(_mount('tmpfs', path, 'tmpfs', _MS_NOSUID | _MS_NODEV | _MS_NOEXEC, f'size={FILE_MB}m,mode=1777')
+                    for path in private)
+            and all(_mount('tmpfs', path, 'tmpfs', _MS_RDONLY | _MS_NOSUID | _MS_NODEV | _MS_NOEXEC, 'size=64k')
+                    for path in hidden)
+            and _mount(None, '/', None, _MS_REMOUNT | _MS_BIND | _MS_RDONLY)):
+        layers.append('filesystem')
+    return layers
+
+
+def _lock_down(job_dir: str, keep_fd: int) -> List[str]:
+    """Drop capabilities and everything inherited from the worker before running untrusted code"""
+    layers = []
+    # User namespace aninhado: sem capacidades, e as montagens herdadas ficam travadas
+    if _unshare(_CLONE_NEWUSER | _CLONE_NEWNS):
+        layers.append('capabilities')
+    if _libc() and _libc().prctl(_PR_SET_NO_NEW_PRIVS, 1, 0, 0, 0) == 0:
+        layers.append('no_new_privs')
+    os.chdir(job_dir)
+    os.environ.clear()
+    os.environ.update(PATH='/usr/local/bin:/usr/bin:/bin', HOME=job_dir, TMPDIR=job_dir)
+    tempfile.tempdir = job_dir
+    null = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(null, 0)
+    os.close(null)
+    os.closerange(3, keep_fd)
+    os.closerange(keep_fd + 1, resource.getrlimit(resource.RLIMIT_NOFILE)[0])
+    # O resource tracker do worker é compartilhado; o /dev/shm do job é descartado ao final
+    resource_tracker._resource_tracker._fd = os.open(os.devnull, os.O_WRONLY)
+    # Arquivo acima do limite vira OSError em vez de matar o job
+    signal.signal(signal.SIGXFSZ, signal.SIG_IGN)
+    return layers
+
+
+def _exit_like(status: int):
+    """Terminate this process the way a waited-for child terminated"""
+    if os.WIFSIGNALED(status):
+        signal.signal(os.WTERMSIG(status), signal.SIG_DFL)
+        os.kill(os.getpid(), os.WTERMSIG(status))
+    os._exit(os.WEXITSTATUS(status) if os.WIFEXITED(status) else 1)
+
+
+def _execute(request: Dict[str, Any], limits: Limits, processes: Optional[int] = None) -> Dict[str, Any]:
+    """Run the request's code in this process; the code reports its output by assigning `result`"""
+    stdout = io.StringIO()
+    scope = {
+        '__name__': '__sandbox__',
+        '__builtins__': _restricted_builtins(request.get('allowed_imports') or ALLOWED_IMPORTS),
+        'inputs': request.get('inputs') or {},
+    }
+    try:
+        _set_limits(limits, processes)
+        code = compile(request['code'], '<generated>', 'exec')
+        with contextlib.redirect_stdout(stdout):
+            exec(code, scope)
+        payload = {'status': OK, 'result': scope.get('result')}
+    except MemoryError:
+        payload = {'status': MEMORY_LIMIT, 'error': f"Memory limit of {limits.memory_mb} MB exceeded"}
+    except BaseException as e:
+        payload = {'status': ERROR, 'error': f"{type(e).__name__}: {e}",
+                   'traceback': traceback.format_exc(limit=-5)}
+    payload['stdout'] = stdout.getvalue()[:MAX_STDOUT]
+    return payload
+
+
+def _run_job(request: Dict[str, Any], limits: Limits, job_dir: str, write_fd: int, processes: Optional[int]):
+    """
+    Child side of a job: enter the namespaces, then run the code in a grandchild
+
+    The grandchild is the first process of the new PID namespace's init (this process's child), so
+    it can neither see nor signal anything outside the job. Exit statuses are passed back up.
+    """
+    layers = _enter_namespaces(job_dir)
+    init = os.fork()
+    if init == 0:
+        _libc() and _libc().prctl(_PR_SET_PDEATHSIG, signal.SIGKILL, 0, 0, 0)
+        job = os.fork()
+        if job == 0:
+            _libc() and _libc().prctl(_PR_SET_PDEATHSIG, signal.SIGKILL, 0, 0, 0)
+            isolation = layers + _lock_down(job_dir, write_fd)
+            missing = [layer for layer in REQUIRED_ISOLATION if layer not in isolation]
+            try:
+                if missing:
+                    payload = {'status': ERROR, 'error': f"Sandbox isolation unavailable: {', '.join(missing)}"}
+                else:
+                    payload = _execute(request, limits, processes)
+                data = _encode(dict(payload, isolation=isolation + ['limits']))
+            except (TypeError, ValueError) as e:
+                data = _encode({'status': ERROR, 'error': f"Result is not JSON-serializable: {e}"})
+            with os.fdopen(write_fd, 'wb') as pipe:
+                pipe.write(data)
+            os._exit(0)
+        os.close(write_fd)
+        _, status = os.waitpid(job, 0)
+        # O init de um PID namespace ignora sinais próprios: repassa o sinal como código de saída
+        os._exit(128 + os.WTERMSIG(status) if os.WIFSIGNALED(status) else os.WEXITSTATUS(status))
+    os.close(write_fd)
+    _, status = os.waitpid(init, 0)
+    code = os.WEXITSTATUS(status) if os.WIFEXITED(status) else 0
+    if code > 128:
+        status = code - 128  # Mesmo formato de status de um processo morto pelo sinal
+    _exit_like(status)
+
+
+def _run_forked(request: Dict[str, Any]) -> Dict[str, Any]:
+    """Fork a child for one job, collect its JSON result and enforce the wall-clock limit"""
+    limits = Limits(**request.get('limits', {}))
+    started = time.monotonic()
+    processes = _user_processes()
+    job_dir = tempfile.mkdtemp(prefix='optimind-sandbox-')
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        try:
+            _run_job(request, limits, job_dir, write_fd, processes)
+        finally:
+            os._exit(1)
+
+    os.close(write_fd)
+    chunks = []
+    timed_out = False
+    deadline = started + limits.wall_seconds
+    with os.fdopen(read_fd, 'rb', buffering=0) as pipe:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                timed_out = True
+                # Matar o filho derruba o PID namespace inteiro (PDEATHSIG no init e no job)
+                os.kill(pid, signal.SIGKILL)
+                break
+            ready, _, _ = select.select([pipe], [], [], remaining)
+            if ready:
+                chunk = pipe.read(65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+    _, status, usage = os.wait4(pid, 0)
+    shutil.rmtree(job_dir, ignore_errors=True)
+
+    if timed_out:
+        payload = {'status': TIMEOUT, 'error': f"Wall-clock limit of {limits.wall_seconds:g}s exceeded"}
+    elif os.WIFSIGNALED(status) and (os.WTERMSIG(status) == signal.SIGXCPU or (
+            os.WTERMSIG(status) == signal.SIGKILL and usage.ru_utime + usage.ru_stime >= limits.cpu_seconds)):
+        # O kernel envia SIGXCPU no limite soft e SIGKILL no hard
+        payload = {'status': CPU_LIMIT, 'error': f"CPU time limit of {limits.cpu_seconds:g}s exceeded"}
+    elif not chunks:
+        payload = {'status': CRASHED, 'error': f"Sandbox process exited with status {status}"}
+    else:
+        payload = json.loads(b''.join(chunks))
+    payload.update(wall_time=time.monotonic() - started, cpu_time=usage.ru_utime + usage.ru_stime,
+                   max_rss_mb=usage.ru_maxrss / 1024)
+    return payload
+
+
+def _serve(connection, preload: Tuple[str, ...]):
+    """Worker loop: import the heavy modules once, then fork a child per request"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    for module in preload:
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            pass
+    connection.send_bytes(_encode({'ready': True}))
+    while True:
+        try:
+            request = json.loads(connection.recv_bytes())
+        except (EOFError, OSError):
+            return
+        if request.get('shutdown'):
+            return
+        try:
+            response = _run_forked(request)
+        except Exception as e:
+            response = {'status': CRASHED, 'error': f"{type(e).__name__}: {e}"}
+        connection.send_bytes(_encode(response))
+
+
+class _Worker:
+    def __init__(self, context, preload: Tuple[str, ...]):
+        self.connection, child = context.Pipe()
+        self.process = context.Process(target=_serve, args=(child, preload), daemon=True,
+                                       name='optimind-sandbox')
+        self.process.start()
+        child.close()
+        self.ready = False
+
+    def wait_ready(self, timeout: float) -> bool:
+        if not self.ready and self.connection.poll(timeout):
+            self.ready = json.loads(self.connection.recv_bytes()).get('ready', False)
+        return self.ready
+
+    def stop(self):
+        try:
+            self.connection.send_bytes(_encode({'shutdown': True}))
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout=2)
+        if self.process.is_alive():
+            self.process.kill()
+        self.connection.close()
+
+
+class ExecutorPool:
+    """
+    Pre-started worker processes that execute generated code under resource limits
+
+    run() is thread-safe and blocks until a worker is free; a worker that dies is replaced.
+    """
+
+    def __init__(self, workers: int = POOL_SIZE, limits: Limits = Limits(),
+                 allowed_imports: Iterable[str] = ALLOWED_IMPORTS, preload: Tuple[str, ...] = PRELOAD):
+        if resource is None or not hasattr(os, 'fork'):
+            raise SandboxUnavailable('The sandboxed executor pool requires fork() and setrlimit()')
+        self.limits = limits
+        self.allowed_imports = sorted(allowed_imports)
+        self.preload = tuple(preload)
+        self._context = multiprocessing.get_context('spawn')
+        self._idle: 'queue.Queue[_Worker]' = queue.Queue()
+        self._workers = [_Worker(self._context, self.preload) for _ in range(max(1, workers))]
+        for worker in self._workers:
+            self._idle.put(worker)
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def __enter__(self) -> 'ExecutorPool':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def run(self, code: str, inputs: Optional[Dict[str, Any]] = None, limits: Optional[Limits] = None) -> Dict[str, Any]:
+        """
+        Execute code in a sandboxed worker
+
+        Args:
+            code: Python source; it reads `inputs` and reports its output by assigning `result`
+            inputs: JSON-serializable data exposed to the code as `inputs`
+            limits: Overrides the pool's default limits
+
+        Returns:
+            Dictionary with status ('ok', 'error', 'timeout', 'cpu_limit', 'memory_limit', 'crashed'),
+            result, stdout, error, wall_time, cpu_time and max_rss_mb
+        """
+        if self._closed:
+            raise RuntimeError('Executor pool is closed')
+        limits = limits or self.limits
+        request = _encode({'code': code, 'inputs': inputs or {}, 'limits': limits._asdict(),
+                           'allowed_imports': self.allowed_imports})
+        worker = self._idle.get()
+        try:
+            if not worker.wait_ready(timeout=60):
+                raise EOFError('worker did not start')
+            worker.connection.send_bytes(request)
+            # O worker aplica o limite de tempo; a folga cobre fork e serialização
+            if not worker.connection.poll(limits.wall_seconds + 10):
+                raise EOFError('worker stopped responding')
+            return json.loads(worker.connection.recv_bytes())
+        except (EOFError, OSError) as e:
+            worker = self._replace(worker)
+            return {'status': CRASHED, 'error': f"Sandbox worker failed: {e}"}
+        finally:
+            self._idle.put(worker)
+
+    def _replace(self, worker: _Worker) -> _Worker:
+        with self._lock:
+            worker.process.kill()
+            worker.connection.close()
+            fresh = _Worker(self._context, self.preload)
+            self._workers[self._workers.index(worker)] = fresh
+            return fresh
+
+    def close(self):
+        """Stop all workers"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            for worker in self._workers:
+                worker.stop()
+
+
+_pool: Optional[ExecutorPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ExecutorPool:
+    """Process-wide executor pool, started on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ExecutorPool()
+        return _pool
+
+
+def execute(code: str, inputs: Optional[Dict[str, Any]] = None, limits: Optional[Limits] = None) -> Dict[str, Any]:
+    """Run code in the process-wide executor pool (see ExecutorPool.run)"""
+    return get_pool().run(code, inputs, limits)
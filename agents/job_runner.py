@@ -0,0 +1,225 @@
+"""
+Background Job Runner for OptiMind
+Runs the agent flow (agents/metamanager.py) outside the Streamlit script run, fed by the job_queue table
+
+Workers are separate processes: the app starts them on demand (ensure_workers) or they can
+be run standalone with `python -m agents.job_runner --workers 4`. Progress is persisted to
+jobs.status so any page (or a refreshed tab) can poll it.
+"""
+
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import uuid
+from typing import Any, Dict, List, Optional
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import db
+from agents.metamanager import FlowStage, MetaManager, StageFailed, load_flow
+from agents.stages import COMPLETED_MESSAGE, build_final_message
+
+WORKER_COUNT = int(os.getenv('OPTIMIND_JOB_WORKERS', '2'))
+LEASE_SECONDS = float(os.getenv('OPTIMIND_JOB_LEASE_SECONDS', '300'))
+POLL_INTERVAL = 1.0
+
+QUEUED = 'Queued'
+COMPLETED = 'Completed'
+FAILED = 'Failed'
+RUNNING_PREFIX = 'Running: '
+TERMINAL_STATUSES = (COMPLETED, FAILED)
+
+
+def submit_job(job: Dict[str, Any], conversations: List[Dict[str, Any]], outputs: List[Dict[str, Any]],
+               payload: Dict[str, Any], start_workers: bool = True) -> str:
+    """
+    Save a job as queued and hand it to the background workers
+
+    Args:
+        job: Job row (status is forced to 'Queued')
+        conversations: Chat messages so far (sender, message, timestamp)
+        outputs: Agent outputs already produced (agent_name, json_output, timestamp)
+        payload: Input of the pipeline stages (e.g. problem and refined_problem)
+        start_workers: Start the embedded worker processes if they are not running
+
+    Returns:
+        The job id
+    """
+    db.enqueue_job(dict(job, status=QUEUED), conversations, outputs, payload)
+    if start_workers:
+        ensure_workers()
+    return job['id']
+
+
+def _now() -> str:
+    return datetime.datetime.now().isoformat()
+
+
+class LeaseLost(RuntimeError):
+    """Another worker took over the job (this worker's lease expired)"""
+
+
+def process_job(item: Dict[str, Any], worker: str, manager: Optional[MetaManager] = None,
+                lease_seconds: float = LEASE_SECONDS) -> bool:
+    """
+    Run the flow for a claimed job, persisting each stage's status, output and chat message
+
+    Each output is saved with the hash of its stage input, so a resumed job restores the stages
+    whose input did not change instead of running them again.
+
+    Returns:
+        True if the job completed, False if it failed or the lease was lost
+    """
+    job_id = item['job_id']
+    manager = manager or MetaManager()
+    context = dict(item['payload'], job_id=job_id, outputs={})
+
+    def keep_lease():
+        if not db.renew_lease(job_id, worker, lease_seconds):
+            raise LeaseLost(job_id)
+
+    def load_checkpoint(stage: FlowStage, input_hash: str) -> Any:
+        saved = db.get_checkpoint(job_id, stage.agent, input_hash)
+        return json.loads(saved) if saved is not None else None
+
+    def on_start(stages: List[FlowStage]):
+        keep_lease()
+        db.update_job_status(job_id, RUNNING_PREFIX + ', '.join(stage.agent for stage in stages))
+
+    def on_complete(stage: FlowStage, output: Any, input_hash: str):
+        keep_lease()
+        with db.transaction():
+            db.insert_agent_output(job_id, stage.agent, json.dumps(output), _now(), input_hash=input_hash)
+            db.insert_conversation(job_id, 'assistant', manager.agents[stage.agent].message, _now())
+
+    try:
+        manager.run(context, on_start=on_start, on_complete=on_complete, load_checkpoint=load_checkpoint)
+        with db.transaction():
+            db.insert_conversation(job_id, 'assistant', COMPLETED_MESSAGE, _now())
+            db.update_job_status(job_id, COMPLETED, build_final_message(context['outputs']))
+            db.finish_job(job_id)
+        return True
+    except LeaseLost:
+        return False
+    except Exception as e:
+        agent = e.stage.agent if isinstance(e, StageFailed) else 'Pipeline'
+        with db.transaction():
+            db.insert_conversation(job_id, 'assistant', f"❌ **{agent} Agent** failed: {e}", _now())
+            db.finish_job(job_id, error=str(e))
+        return False
+
+
+def resume_job(job_id: str, start_workers: bool = True) -> bool:
+    """
+    Queue a failed (or finished) job again; completed stages are restored from their checkpoints
+
+    Returns:
+        False if the job is not in the queue or is still running
+    """
+    if not db.requeue_job(job_id):
+        return False
+    if start_workers:
+        ensure_workers()
+    return True
+
+
+def run_once(worker: str, manager: Optional[MetaManager] = None, lease_seconds: float = LEASE_SECONDS) -> bool:
+    """Claim and run one queued job; returns False when the queue is empty"""
+    item = db.claim_job(worker, lease_seconds)
+    if item is None:
+        return False
+    process_job(item, worker, manager, lease_seconds)
+    return True
+
+
+def run_worker(worker: Optional[str] = None, stop_event: Optional[threading.Event] = None,
+               poll_interval: float = POLL_INTERVAL, manager: Optional[MetaManager] = None):
+    """Worker loop: keep running queued jobs until stop_event is set"""
+    worker = worker or f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+    stop_event = stop_event or threading.Event()
+    while not stop_event.is_set():
+        try:
+            busy = run_once(worker, manager)
+        except Exception as e:  # banco ocupado/indisponível: tenta de novo no próximo ciclo
+            print(f"[job_runner] worker {worker}: {e}")
+            busy = False
+        if not busy:
+            stop_event.wait(poll_interval)
+
+
+_workers: List[multiprocessing.Process] = []
+_workers_lock = threading.Lock()
+
+
+def ensure_workers(count: int = WORKER_COUNT) -> int:
+    """
+    Start embedded worker processes (once per server process)
+
+    Set OPTIMIND_JOB_WORKERS=0 when workers run standalone.
+
+    Returns:
+        Number of live embedded workers
+    """
+    with _workers_lock:
+        _workers[:] = [p for p in _workers if p.is_alive()]
+        ctx = multiprocessing.get_context('spawn')
+        while len(_workers) < count:
+            process = ctx.Process(target=run_worker, name=f'optimind-worker-{len(_workers)}', daemon=True)
+            process.start()
+            _workers.append(process)
+        return len(_workers)
+
+
+def get_progress(job_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Current progress of a job, read from jobs.status
+
+    Returns:
+        Dict with status, stage (agents running or None), completed_stages, total_stages and done,
+        or None if the job does not exist
+    """
+    job = db.get_job(job_id)
+    if job is None:
+        return None
+    status = job['status']
+    agents = [stage.agent for stage in load_flow()]
+    running = status[len(RUNNING_PREFIX):].split(', ') if status.startswith(RUNNING_PREFIX) else []
+    stage = ', '.join(running) or None
+    if status == COMPLETED:
+        completed = len(agents)
+    elif running:
+        completed = min(agents.index(agent) if agent in agents else 0 for agent in running)
+    else:
+        completed = 0
+    return {
+        'status': status,
+        'stage': stage,
+        'completed_stages': completed,
+        'total_stages': len(agents),
+        'done': status in TERMINAL_STATUSES,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run OptiMind background job workers')
+    parser.add_argument('--workers', type=int, default=WORKER_COUNT, help='number of worker processes')
+    args = parser.parse_args()
+    processes = [multiprocessing.Process(target=run_worker, name=f'optimind-worker-{i}')
+                 for i in range(max(args.workers, 1))]
+    for process in processes:
+        process.start()
+    print(f"Running {len(processes)} OptiMind worker(s); press Ctrl+C to stop")
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+
+
+if __name__ == "__main__":
+    main()
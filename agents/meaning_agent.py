@@ -5,26 +5,25 @@ A conversational partner that helps users define optimization problems through n
 
 import json
 import re
-from pathlib import Path
-from typing import Dict, Any, Tuple, Optional, List
+from typing import Dict, Any, Tuple, Optional, List, Iterator
 from .base_agent import BaseAgent
+from .stream_parser import JSONFieldStreamer
 from schemas.validator import validate_problem_output
 
 class MeaningAgent(BaseAgent):
     """Conversational agent that partners with users to define optimization problems"""
     
-    def __init__(self, model: str = "gpt-4o-mini"):
-        super().__init__(name="Meaning", model=model)
-        self.prompt_path = Path(__file__).parent.parent / "prompts" / "meaning.txt"
+    def __init__(self, model: str = "gpt-4o-mini", prompt_version: Optional[str] = None):
+        super().__init__(name="Meaning", model=model, prompt_version=prompt_version)
         self.chat_history: List[Dict[str, str]] = []
         self.current_problem_state: Dict[str, Any] = {}
     
     def get_system_prompt(self) -> str:
         """Get the system prompt for the Meaning agent"""
         try:
-            with open(self.prompt_path, 'r', encoding='utf-8') as f:
-                return f.read()
+            return self._load_prompt_from_registry("meaning")
         except FileNotFoundError:
+            self.prompt_hash = None
             return self._get_fallback_prompt()
     
     def _get_fallback_prompt(self) -> str:
@@ -193,6 +192,26 @@ Remember: You're a partner, not just a form-filler. Help users think through the
                 }
             }
     
+    def stream_clarification(self, input_data: Any, **kwargs) -> Iterator[str]:
+        """
+        Stream the conversational 'clarification' field while the JSON is generated
+        
+        The full processed result is available in self.last_result once the
+        generator is exhausted.
+        
+        Args:
+            input_data: Input data to process
+            **kwargs: Additional arguments
+            
+        Yields:
+            Text deltas of the clarification message
+        """
+        streamer = JSONFieldStreamer("clarification")
+        for delta in self.process_stream(input_data, **kwargs):
+            text = streamer.feed(delta)
+            if text:
+                yield text
+    
     def _validate_financial_consistency(self, problem_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Validate financial consistency in the problem data
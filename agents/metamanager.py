@@ -0,0 +1,267 @@
+"""
+MetaManager for OptiMind
+Runs the MCP flow (flows/optimind_flow.toml) as a DAG: independent stages run concurrently,
+each attempt has a timeout, failures retry the stage or an upstream stage (retry_agent)
+within a bounded budget, and stages whose input did not change can be restored from checkpoints
+"""
+
+import hashlib
+import json
+import time
+import tomllib
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from agents.stages import AGENTS, CONDITIONS, Stage
+
+FLOW_PATH = Path(__file__).parent.parent / 'flows' / 'optimind_flow.toml'
+DEFAULT_TIMEOUT = 120.0
+# Chaves do contexto que não fazem parte da entrada de uma etapa (não entram no input hash)
+VOLATILE_KEYS = ('job_id', 'previous_job_id')
+
+
+class FlowStage(NamedTuple):
+    """A stage of the flow definition"""
+    id: str
+    agent: str
+    goal: str
+    depends_on: Tuple[str, ...]
+    condition: Optional[str]
+    timeout: float
+    max_retries: int
+    retry_agent: str
+
+
+class FlowError(ValueError):
+    """Invalid flow definition"""
+
+
+class StageFailed(RuntimeError):
+    """A stage failed after exhausting its retry budget"""
+
+    def __init__(self, stage: FlowStage, error: BaseException):
+        super().__init__(f"{stage.agent} failed ({stage.id}): {error}")
+        self.stage = stage
+        self.error = error
+
+
+class StageTimeout(TimeoutError):
+    """A stage attempt exceeded its timeout"""
+
+
+def parse_flow(definition: Dict[str, Any]) -> List[FlowStage]:
+    """
+    Build and validate the flow from its parsed TOML definition
+
+    Returns:
+        The stages in topological order
+
+    Raises:
+        FlowError: On duplicate ids, unknown dependencies, cycles or invalid retry targets
+    """
+    defaults = definition.get('defaults', {})
+    stages = []
+    for raw in definition.get('stages', []):
+        on_fail = raw.get('on_fail', {})
+        stages.append(FlowStage(
+            id=raw['id'],
+            agent=raw['agent'],
+            goal=raw.get('goal', ''),
+            depends_on=tuple(raw.get('depends_on', ())),
+            condition=raw.get('condition'),
+            timeout=float(raw.get('timeout', defaults.get('timeout', DEFAULT_TIMEOUT))),
+            max_retries=int(on_fail.get('max_retries', defaults.get('max_retries', 0))),
+            retry_agent=on_fail.get('retry_agent', raw['agent']),
+        ))
+
+    by_id = {stage.id: stage for stage in stages}
+    if len(by_id) != len(stages):
+        raise FlowError('Duplicate stage ids in flow')
+    for stage in stages:
+        unknown = [dep for dep in stage.depends_on if dep not in by_id]
+        if unknown:
+            raise FlowError(f"Stage '{stage.id}' depends on unknown stages {unknown}")
+
+    # Ordenação topológica (Kahn), preservando a ordem do arquivo entre etapas independentes
+    ordered: List[FlowStage] = []
+    placed: Set[str] = set()
+    while len(ordered) < len(stages):
+        ready = [s for s in stages if s.id not in placed and all(dep in placed for dep in s.depends_on)]
+        if not ready:
+            raise FlowError('Flow has a dependency cycle')
+        ordered.extend(ready)
+        placed.update(s.id for s in ready)
+
+    for stage in ordered:
+        allowed = {by_id[sid].agent for sid in _ancestors(stage.id, by_id)} | {stage.agent}
+        if stage.retry_agent not in allowed:
+            raise FlowError(f"Stage '{stage.id}' retries '{stage.retry_agent}', which is not upstream of it")
+    return ordered
+
+
+def load_flow(path: Optional[Path] = None) -> List[FlowStage]:
+    """Load the flow definition from a TOML file"""
+    with open(path or FLOW_PATH, 'rb') as f:
+        return parse_flow(tomllib.load(f))
+
+
+def _ancestors(stage_id: str, by_id: Dict[str, FlowStage]) -> Set[str]:
+    found: Set[str] = set()
+    pending = list(by_id[stage_id].depends_on)
+    while pending:
+        sid = pending.pop()
+        if sid not in found:
+            found.add(sid)
+            pending.extend(by_id[sid].depends_on)
+    return found
+
+
+class MetaManager:
+    """Executes a flow over a registry of agent stages"""
+
+    def __init__(self, flow: Optional[List[FlowStage]] = None, agents: Optional[Dict[str, Stage]] = None,
+                 conditions: Optional[Dict[str, Callable[[Any, Dict[str, Any]], bool]]] = None,
+                 max_workers: int = 4):
+        """
+        Initialize the MetaManager
+
+        Args:
+            flow: Flow stages (defaults to flows/optimind_flow.toml)
+            agents: Agent name -> Stage registry
+            conditions: Condition name -> check(output, context) registry
+            max_workers: Maximum number of stages running at once
+        """
+        self.flow = flow if flow is not None else load_flow()
+        self.agents = agents if agents is not None else AGENTS
+        self.conditions = conditions if conditions is not None else CONDITIONS
+        self.max_workers = max_workers
+        self._by_id = {stage.id: stage for stage in self.flow}
+        self._by_agent = {stage.agent: stage for stage in self.flow}
+        for stage in self.flow:
+            if stage.agent not in self.agents:
+                raise FlowError(f"No agent registered for '{stage.agent}'")
+            if stage.condition and stage.condition not in self.conditions:
+                raise FlowError(f"Unknown condition '{stage.condition}' in stage '{stage.id}'")
+
+    def stage_for(self, agent: str) -> FlowStage:
+        return self._by_agent[agent]
+
+    def _descendants(self, stage_id: str) -> Set[str]:
+        return {sid for sid in self._by_id if stage_id in _ancestors(sid, self._by_id)}
+
+    def _attempt(self, stage: FlowStage, context: Dict[str, Any]) -> Any:
+        output = self.agents[stage.agent].run(context)
+        if stage.condition and not self.conditions[stage.condition](output, context):
+            raise ValueError(f"condition '{stage.condition}' not met")
+        return output
+
+    def stage_input(self, stage: FlowStage, context: Dict[str, Any], outputs: Dict[str, Any]) -> Dict[str, Any]:
+        """The context a stage runs with: the pipeline input plus the outputs of its upstream stages"""
+        upstream = {self._by_id[sid].agent for sid in _ancestors(stage.id, self._by_id)}
+        return dict(context, outputs={agent: output for agent, output in outputs.items() if agent in upstream})
+
+    @staticmethod
+    def input_hash(stage: FlowStage, stage_input: Dict[str, Any]) -> str:
+        """Content hash identifying a stage run (agent, goal and input, ignoring job-specific keys)"""
+        payload = {key: value for key, value in stage_input.items() if key not in VOLATILE_KEYS}
+        canonical = json.dumps({'agent': stage.agent, 'goal': stage.goal, 'input': payload},
+                               sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def run(self, context: Dict[str, Any],
+            on_start: Optional[Callable[[List[FlowStage]], None]] = None,
+            on_complete: Optional[Callable[[FlowStage, Any, str], None]] = None,
+            load_checkpoint: Optional[Callable[[FlowStage, str], Any]] = None) -> Dict[str, Any]:
+        """
+        Run the flow to completion
+
+        Args:
+            context: Pipeline input; stage outputs are collected in context['outputs'] by agent name
+            on_start: Called with the stages running whenever new stages start
+            on_complete: Called (from the calling thread) with each stage output that passed its condition
+                and the hash of the input it was computed from
+            load_checkpoint: Returns a previously saved output for (stage, input hash), or None to run the stage
+
+        Returns:
+            Outputs by agent name
+
+        Raises:
+            StageFailed: If a stage fails after exhausting its retry budget
+        """
+        outputs = context.setdefault('outputs', {})
+        done: Set[str] = set()
+        fresh: Set[str] = set()  # etapas refeitas por retry não reaproveitam checkpoints
+        retries = {stage.id: 0 for stage in self.flow}
+        running: Dict[Future, Tuple[str, float, str]] = {}
+
+        # Tentativas que estouram o timeout não podem ser interrompidas; a thread é abandonada
+        pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='metamanager')
+        try:
+            while len(done) < len(self.flow):
+                started = False
+                restored = True
+                while restored:
+                    restored = False
+                    active = {entry[0] for entry in running.values()}
+                    ready = [s for s in self.flow
+                             if s.id not in done and s.id not in active and all(d in done for d in s.depends_on)]
+                    for stage in ready:
+                        stage_input = self.stage_input(stage, context, outputs)
+                        digest = self.input_hash(stage, stage_input)
+                        cached = load_checkpoint(stage, digest) if load_checkpoint and stage.id not in fresh else None
+                        if cached is not None:
+                            done.add(stage.id)
+                            outputs[stage.agent] = cached
+                            restored = True
+                            continue
+                        deadline = time.monotonic() + stage.timeout
+                        running[pool.submit(self._attempt, stage, stage_input)] = (stage.id, deadline, digest)
+                        started = True
+                if started and on_start:
+                    on_start([self._by_id[entry[0]] for entry in running.values()])
+                if not running:
+                    continue
+
+                next_deadline = min(entry[1] for entry in running.values())
+                finished, _ = wait(list(running), timeout=max(0.0, next_deadline - time.monotonic()),
+                                   return_when=FIRST_COMPLETED)
+                now = time.monotonic()
+                for future, (sid, deadline, digest) in list(running.items()):
+                    if future not in running:
+                        continue  # descartada por um retry de outra etapa nesta mesma rodada
+                    stage = self._by_id[sid]
+                    if future in finished:
+                        del running[future]
+                        try:
+                            output = future.result()
+                        except Exception as e:
+                            self._retry(stage, e, retries, done, fresh, running)
+                            continue
+                        done.add(sid)
+                        outputs[stage.agent] = output
+                        if on_complete:
+                            on_complete(stage, output, digest)
+                    elif now >= deadline:
+                        del running[future]
+                        future.cancel()
+                        self._retry(stage, StageTimeout(f"timed out after {stage.timeout:g}s"),
+                                    retries, done, fresh, running)
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+        return outputs
+
+    def _retry(self, stage: FlowStage, error: BaseException, retries: Dict[str, int], done: Set[str],
+               fresh: Set[str], running: Dict[Future, Tuple[str, float, str]]):
+        """Consume one retry of the stage and reset the retry target and everything downstream of it"""
+        if retries[stage.id] >= stage.max_retries:
+            raise StageFailed(stage, error)
+        retries[stage.id] += 1
+        target = self.stage_for(stage.retry_agent)
+        reset = {target.id} | self._descendants(target.id)
+        done.difference_update(reset)
+        fresh.update(reset)
+        for future, entry in list(running.items()):
+            if entry[0] in reset:
+                del running[future]
+                future.cancel()
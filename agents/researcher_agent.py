@@ -1,11 +1,10 @@
 import json
-import jsonschema
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from .base_agent import BaseAgent
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from schemas.validator import load_schema
+from schemas.validator import load_schema, get_registry
 
 
 class ResearcherAgent(BaseAgent):
@@ -20,16 +19,15 @@ class ResearcherAgent(BaseAgent):
     5. Maintains all original information while adding enhancements
     """
     
-    def __init__(self):
+    def __init__(self, prompt_version: Optional[str] = None):
         """Initialize the Researcher Agent."""
-        super().__init__(name="Researcher")
+        super().__init__(name="Researcher", prompt_version=prompt_version)
         self.refined_schema = load_schema("refined_problem_schema.json")
     
     def _load_prompt(self) -> str:
         """Load the Researcher Agent prompt."""
         try:
-            with open("prompts/researcher.txt", "r", encoding="utf-8") as f:
-                return f.read()
+            return self._load_prompt_from_registry("researcher")
         except FileNotFoundError:
             raise FileNotFoundError("Prompt file 'prompts/researcher.txt' not found")
     
@@ -133,11 +131,7 @@ class ResearcherAgent(BaseAgent):
         Returns:
             Tuple of (is_valid, error_message)
         """
-        try:
-            jsonschema.validate(instance=output, schema=self.refined_schema)
-            return True, None
-        except jsonschema.ValidationError as e:
-            return False, str(e)
+        return get_registry().validate("refined_problem_schema", output)
     
     def analyze_problem_quality(self, meaning_output: Dict[str, Any]) -> Dict[str, Any]:
         """
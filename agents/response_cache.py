@@ -0,0 +1,198 @@
+"""
+LLM Response Cache for OptiMind
+Content-addressed cache of chat completions, backed by SQLite
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, List, Optional
+
+CACHE_PATH = os.path.join(os.path.dirname(__file__), '..', 'llm_cache.db')
+
+
+class ResponseCache:
+    """SQLite-backed cache of LLM responses with TTL and LRU eviction"""
+
+    def __init__(self, path: str = CACHE_PATH, ttl_seconds: Optional[float] = 7 * 24 * 3600,
+                 max_entries: int = 5000):
+        """
+        Initialize the response cache
+
+        Args:
+            path: Path of the SQLite database file
+            ttl_seconds: Time-to-live of an entry (None disables expiration)
+            max_entries: Maximum number of entries kept before LRU eviction
+        """
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_db(self):
+        """Create cache tables if needed"""
+        conn = self._connect()
+        try:
+            conn.execute('''CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                model TEXT,
+                content TEXT,
+                tokens_used INTEGER,
+                created_at REAL,
+                last_access REAL,
+                hits INTEGER DEFAULT 0
+            )''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access ON llm_cache (last_access)')
+            conn.execute('''CREATE TABLE IF NOT EXISTS llm_cache_stats (
+                name TEXT PRIMARY KEY,
+                value INTEGER
+            )''')
+            conn.execute("INSERT OR IGNORE INTO llm_cache_stats (name, value) VALUES ('hits', 0), ('misses', 0)")
+            conn.commit()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict[str, str]], temperature: float, max_tokens: int) -> str:
+        """
+        Build the content-addressed key of a chat completion request
+
+        Args:
+            model: OpenAI model name
+            messages: Chat messages (system prompt included)
+            temperature: Sampling temperature
+            max_tokens: Completion token limit
+
+        Returns:
+            SHA-256 hex digest of the canonical request
+        """
+        payload = json.dumps({
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached response
+
+        Args:
+            key: Cache key from make_key
+
+        Returns:
+            Dictionary with 'content' and 'tokens_used', or None on miss
+        """
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            try:
+                row = conn.execute('SELECT content, tokens_used, created_at FROM llm_cache WHERE key = ?',
+                                   (key,)).fetchone()
+                if row is not None and self.ttl_seconds is not None and now - row['created_at'] > self.ttl_seconds:
+                    conn.execute('DELETE FROM llm_cache WHERE key = ?', (key,))
+                    row = None
+                if row is None:
+                    conn.execute("UPDATE llm_cache_stats SET value = value + 1 WHERE name = 'misses'")
+                    conn.commit()
+                    return None
+                conn.execute('UPDATE llm_cache SET last_access = ?, hits = hits + 1 WHERE key = ?', (now, key))
+                conn.execute("UPDATE llm_cache_stats SET value = value + 1 WHERE name = 'hits'")
+                conn.commit()
+                return {"content": row['content'], "tokens_used": row['tokens_used']}
+            finally:
+                conn.close()
+
+    def set(self, key: str, content: str, model: str = "", tokens_used: int = 0):
+        """
+        Store a response and evict least recently used entries above max_entries
+
+        Args:
+            key: Cache key from make_key
+            content: Raw completion text
+            model: Model that produced the response
+            tokens_used: Tokens billed for the original call
+        """
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute('''INSERT OR REPLACE INTO llm_cache (key, model, content, tokens_used, created_at, last_access, hits)
+                                VALUES (?, ?, ?, ?, ?, ?, 0)''', (key, model, content, tokens_used, now, now))
+                conn.execute('''DELETE FROM llm_cache WHERE key IN (
+                                    SELECT key FROM llm_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                                )''', (self.max_entries,))
+                conn.commit()
+            finally:
+                conn.close()
+
+    def purge_expired(self) -> int:
+        """Delete expired entries and return how many were removed"""
+        if self.ttl_seconds is None:
+            return 0
+        with self._lock:
+            conn = self._connect()
+            try:
+                cursor = conn.execute('DELETE FROM llm_cache WHERE created_at < ?', (time.time() - self.ttl_seconds,))
+                conn.commit()
+                return cursor.rowcount
+            finally:
+                conn.close()
+
+    def clear(self):
+        """Remove every entry and reset the counters"""
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute('DELETE FROM llm_cache')
+                conn.execute('UPDATE llm_cache_stats SET value = 0')
+                conn.commit()
+            finally:
+                conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and cache size"""
+        conn = self._connect()
+        try:
+            counters = {row['name']: row['value'] for row in conn.execute('SELECT name, value FROM llm_cache_stats')}
+            entries = conn.execute('SELECT COUNT(*) FROM llm_cache').fetchone()[0]
+        finally:
+            conn.close()
+        hits = counters.get('hits', 0)
+        misses = counters.get('misses', 0)
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "entries": entries,
+            "hit_rate": hits / lookups if lookups else 0.0
+        }
+
+
+_default_cache: Optional[ResponseCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache() -> Optional[ResponseCache]:
+    """
+    Get the process-wide response cache
+
+    Returns None when caching is disabled with OPTIMIND_LLM_CACHE=0.
+    """
+    global _default_cache
+    if os.getenv("OPTIMIND_LLM_CACHE", "1") == "0":
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache()
+        return _default_cache
@@ -0,0 +1,126 @@
+"""
+Agent Runtime for OptiMind
+Process-wide OpenAI clients and a background event loop for concurrent agent calls
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Dict, Optional
+
+from openai import OpenAI, AsyncOpenAI
+import streamlit as st
+
+MAX_CONNECTIONS = int(os.getenv("OPTIMIND_MAX_CONNECTIONS", "20"))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("OPTIMIND_MAX_KEEPALIVE_CONNECTIONS", "10"))
+MAX_CONCURRENT_CALLS = int(os.getenv("OPTIMIND_MAX_CONCURRENT_CALLS", "8"))
+
+_sync_clients: Dict[str, OpenAI] = {}
+_sync_clients_lock = threading.Lock()
+
+
+def resolve_api_key() -> Optional[str]:
+    """Get the OpenAI API key from Streamlit secrets or the environment"""
+    api_key = None
+    try:
+        api_key = st.secrets.get("OPENAI", {}).get("OPENAI_API_KEY")
+    except Exception:
+        pass
+    if not api_key:
+        api_key = os.getenv("OPENAI_API_KEY")
+    return api_key
+
+
+def _connection_limits():
+    import httpx
+    return httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS)
+
+
+def get_openai_client(api_key: str) -> OpenAI:
+    """
+    Get the process-wide synchronous OpenAI client for an API key
+
+    The client keeps a bounded pool of HTTP connections that is reused by
+    every agent and session instead of opening new TLS connections.
+    """
+    with _sync_clients_lock:
+        client = _sync_clients.get(api_key)
+        if client is None:
+            from openai import DefaultHttpxClient
+            client = OpenAI(api_key=api_key, http_client=DefaultHttpxClient(limits=_connection_limits()))
+            _sync_clients[api_key] = client
+        return client
+
+
+class AgentRuntime:
+    """Background event loop that runs async agent calls on a shared AsyncOpenAI client"""
+
+    def __init__(self, max_concurrent_calls: int = MAX_CONCURRENT_CALLS):
+        """
+        Start the runtime loop
+
+        Args:
+            max_concurrent_calls: Global limit of in-flight OpenAI requests
+        """
+        self.max_concurrent_calls = max_concurrent_calls
+        self.loop = asyncio.new_event_loop()
+        self._clients: Dict[str, AsyncOpenAI] = {}
+        self._thread = threading.Thread(target=self._run_loop, name="optimind-agent-runtime", daemon=True)
+        self._thread.start()
+        self.semaphore: asyncio.Semaphore = self.call(self._create_semaphore())
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    async def _create_semaphore(self) -> asyncio.Semaphore:
+        return asyncio.Semaphore(self.max_concurrent_calls)
+
+    def in_runtime_loop(self) -> bool:
+        """Whether the caller is running on the runtime event loop"""
+        try:
+            return asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            return False
+
+    def get_async_client(self, api_key: str) -> AsyncOpenAI:
+        """Get the shared AsyncOpenAI client for an API key (runtime loop only)"""
+        client = self._clients.get(api_key)
+        if client is None:
+            from openai import DefaultAsyncHttpxClient
+            client = AsyncOpenAI(api_key=api_key, http_client=DefaultAsyncHttpxClient(limits=_connection_limits()))
+            self._clients[api_key] = client
+        return client
+
+    def submit(self, coro: Awaitable[Any]) -> Future:
+        """Schedule a coroutine on the runtime loop and return a concurrent future"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def call(self, coro: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the runtime loop and wait for its result"""
+        return self.submit(coro).result(timeout)
+
+    def shutdown(self):
+        """Close the shared clients and stop the loop"""
+        async def _close():
+            for client in self._clients.values():
+                await client.close()
+            self._clients.clear()
+        if self.loop.is_running():
+            self.call(_close())
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout=5)
+
+
+_runtime: Optional[AgentRuntime] = None
+_runtime_lock = threading.Lock()
+
+
+def get_runtime() -> AgentRuntime:
+    """Get the process-wide agent runtime, starting it on first use"""
+    global _runtime
+    with _runtime_lock:
+        if _runtime is None:
+            _runtime = AgentRuntime()
+        return _runtime
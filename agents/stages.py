@@ -0,0 +1,255 @@
+"""
+Pipeline stages for OptiMind
+Steps executed by the background job runner after the problem has been structured
+"""
+
+import json
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from optimization import audit, incremental, portfolio, sensitivity, solution_cache, sweep
+from optimization.linear_model import LinearModel, ModelError, compile_problem
+from utils import db
+
+# Duração simulada de cada etapa enquanto os agentes reais não existem
+SIMULATED_SECONDS = {
+    'Mathematician': 2,
+    'Formulator': 2,
+    'Executor': 3,
+    'Interpreter': 2,
+    'Auditor': 2,
+}
+
+
+class Stage(NamedTuple):
+    """A pipeline step: the agent that runs it and the chat message posted when it finishes"""
+    agent: str
+    message: str
+    run: Callable[[Dict[str, Any]], Dict[str, Any]]
+
+
+def _placeholder(agent: str, output: str) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    def run(context: Dict[str, Any]) -> Dict[str, Any]:
+        time.sleep(SIMULATED_SECONDS[agent])
+        return {'output': output}
+    return run
+
+
+def problem_from_context(context: Dict[str, Any]) -> Dict[str, Any]:
+    """The structured problem of a job: the Researcher's refined problem, or the Meaning output"""
+    refined = context.get('refined_problem') or {}
+    refined = refined.get('refined_problem', refined)
+    return refined if refined.get('decision_variables') else context.get('problem') or {}
+
+
+def _mathematician(context: Dict[str, Any]) -> Dict[str, Any]:
+    # Problemas LP/MIP são compilados direto em matrizes esparsas; os demais seguem pelo LLM
+    try:
+        model = compile_problem(problem_from_context(context))
+    except ModelError as e:
+        output = _placeholder('Mathematician', 'Fake model output')(context)
+        return dict(output, linear=False, reason=str(e))
+    return {'linear': True, 'model': model.summary()}
+
+
+def _formulator(context: Dict[str, Any]) -> Dict[str, Any]:
+    if context['outputs'].get('Mathematician', {}).get('linear'):
+        return {'skipped': True, 'reason': 'Linear model is solved directly, no code generation needed'}
+    return _placeholder('Formulator', 'Fake code output')(context)
+
+
+def _previous_model(job_id: str) -> Optional[Tuple[LinearModel, Dict[str, Any]]]:
+    """Compiled model and Executor result of an earlier job, to continue from it incrementally"""
+    outputs = {}
+    for output in db.get_agent_outputs(job_id):
+        outputs[output['agent_name']] = output['json_output']
+    try:
+        context = {'problem': json.loads(outputs.get('Meaning') or '{}'),
+                   'refined_problem': json.loads(outputs.get('Researcher') or '{}')}
+        result = json.loads(outputs['Executor'])
+        return compile_problem(problem_from_context(context)), result
+    except (KeyError, TypeError, ValueError, ModelError):
+        return None
+
+
+def _solve_linear(problem: Dict[str, Any], mode: str, job_id: Optional[str] = None,
+                  previous_job_id: Optional[str] = None, time_limit: Optional[float] = None) -> Dict[str, Any]:
+    # 'race' roda todos os solvers disponíveis em paralelo; 'single' usa o mais rápido do histórico.
+    # Modelos equivalentes a um já resolvido (mesma forma canônica) vêm do cache de soluções, e
+    # edições do modelo do job anterior do chat são re-resolvidas de forma incremental
+    model = compile_problem(problem)
+    problem_type = problem.get('problem_type')
+    if problem_type not in ('LP', 'MIP'):
+        problem_type = model.summary()['type']
+    solver = portfolio.race if mode == 'race' else portfolio.solve_with_best
+
+    def cold_solve(model: LinearModel) -> Dict[str, Any]:
+        return solver(model, problem_type, time_limit=time_limit)
+
+    def solve(model: LinearModel) -> Dict[str, Any]:
+        if not job_id:
+            return cold_solve(model)
+        return incremental.sessions.resolve(job_id, model, cold_solve, previous_job_id,
+                                            restore=lambda: _previous_model(previous_job_id), time_limit=time_limit)
+
+    result = solution_cache.solve_cached(model, solve, problem_type)
+    if result.get('status') == 'optimal' and not model.is_mip and not result.get('sensitivity'):
+        # Soluções do cache ou re-resolvidas de forma incremental: duais vêm da base ótima
+        x = np.array([result['variables'][name] for name in model.variables])
+        result = dict(result, sensitivity=sensitivity.analyze(model, x))
+    return dict(result, model=model.summary())
+
+
+def _executor(context: Dict[str, Any]) -> Dict[str, Any]:
+    # Sem time limit um MIP que não converge prende a etapa (e o retry começaria outra corrida)
+    time_limit = context.get('time_limit') or portfolio.TIME_LIMIT
+    if context.get('sweep') and context['outputs'].get('Mathematician', {}).get('linear'):
+        # Varredura de cenários: a tabela de resultados vai para o blob store, o output guarda o resumo
+        return sweep.store(sweep.run_sweep(problem_from_context(context), context['sweep'], time_limit=time_limit))
+    if context['outputs'].get('Mathematician', {}).get('linear'):
+        return _solve_linear(problem_from_context(context), context.get('solver_mode') or portfolio.SOLVER_MODE,
+                             context.get('job_id'), context.get('previous_job_id'), time_limit)
+    code = context['outputs'].get('Formulator', {}).get('code')
+    if code:
+        # Código gerado roda no pool isolado, nunca no processo do worker
+        from agents import executor_pool
+        output = executor_pool.execute(code, inputs={'problem': problem_from_context(context)})
+        if output['status'] != executor_pool.OK:
+            raise RuntimeError(f"Generated code failed ({output['status']}): {output.get('error')}")
+        return output
+    return _placeholder('Executor', 'Fake execution output')(context)
+
+
+def _interpreter(context: Dict[str, Any]) -> Dict[str, Any]:
+    # Insights de LPs saem do relatório de sensibilidade guardado com a solução, sem novo solve
+    report = context['outputs'].get('Executor', {}).get('sensitivity')
+    if report and report.get('constraints'):
+        return {'insights': sensitivity.describe(report), 'binding': report['binding']}
+    return _placeholder('Interpreter', 'Fake analysis output')(context)
+
+
+def _escalate_audit(problem: Dict[str, Any], execution: Dict[str, Any], report: Dict[str, Any]) -> Dict[str, Any]:
+    from agents.auditor_agent import AuditorAgent
+    return AuditorAgent().review(problem, execution, report)
+
+
+def _auditor(context: Dict[str, Any]) -> Dict[str, Any]:
+    # Auditoria numérica vetorizada; o LLM só é chamado quando alguma verificação falha
+    execution = context['outputs'].get('Executor', {})
+    if not (context['outputs'].get('Mathematician', {}).get('linear') and execution.get('variables')):
+        return _placeholder('Auditor', 'Fake validation output')(context)
+    problem = problem_from_context(context)
+    report = audit.audit(compile_problem(problem), execution)
+    if report['passed']:
+        return {'approved': True, 'audit': report}
+    review = _escalate_audit(problem, execution, report)
+    approved = bool(review.get('success') and isinstance(review.get('result'), dict)
+                    and review['result'].get('approved'))
+    return {'approved': approved, 'audit': report, 'review': review.get('result') or review.get('error')}
+
+
+STAGES: List[Stage] = [
+    Stage('Mathematician', "📐 **Mathematician Agent** built the mathematical formulation successfully!",
+          _mathematician),
+    Stage('Formulator', "💻 **Formulator Agent** generated the Pyomo code successfully!",
+          _formulator),
+    Stage('Executor', "⚡ **Executor Agent** ran the optimization model successfully!",
+          _executor),
+    Stage('Interpreter', "📊 **Interpreter Agent** analyzed the results successfully!",
+          _interpreter),
+    Stage('Auditor', "🔍 **Auditor Agent** validated the solution successfully!",
+          _auditor),
+]
+
+AGENTS: Dict[str, Stage] = {stage.agent: stage for stage in STAGES}
+
+
+def _is_non_empty_dict(output: Any, context: Dict[str, Any]) -> bool:
+    return isinstance(output, dict) and bool(output)
+
+
+def _is_solver_optimal(output: Any, context: Dict[str, Any]) -> bool:
+    return _is_non_empty_dict(output, context) and output.get('status', 'optimal') == 'optimal'
+
+
+def _all_stages_valid(output: Any, context: Dict[str, Any]) -> bool:
+    # Auditoria reprovada (e não aprovada pela revisão) falha o job em vez de concluí-lo
+    return _is_non_empty_dict(output, context) and output.get('approved') is not False and all(
+        _is_non_empty_dict(previous, context) for previous in context['outputs'].values())
+
+
+# Condições referenciadas pelo fluxo (flows/optimind_flow.toml): (output, context) -> bool
+CONDITIONS: Dict[str, Callable[[Any, Dict[str, Any]], bool]] = {
+    'is_model_json_valid': _is_non_empty_dict,
+    'is_python_code_valid': _is_non_empty_dict,
+    'is_solver_optimal': _is_solver_optimal,
+    'is_insight_complete': _is_non_empty_dict,
+    'all_stages_valid': _all_stages_valid,
+}
+
+COMPLETED_MESSAGE = "✅ **Optimization pipeline completed successfully!** All agents have finished their work."
+
+NO_SOLUTION_MESSAGE = """⚠️ The pipeline finished, but no solver output exists for this problem.
+
+Only linear (LP/MIP) problems are solved directly for now; the agents that model and solve
+other problem types are not available yet, so no optimal value or variable values were computed."""
+
+
+def build_final_message(outputs: Dict[str, Any]) -> str:
+    """Result message of a finished job; uses the solver output when the model was solved directly"""
+    execution = outputs.get('Executor') or {}
+    if 'scenarios' in execution:
+        statuses = ', '.join(f"{count} {status}" for status, count in execution['statuses'].items())
+        lines = [
+            "✅ Scenario sweep complete! Here are your results:",
+            "",
+            f"• Scenarios: {execution['scenarios']} ({statuses})",
+            f"• Parameters: {', '.join(execution['table']['parameters'])}",
+        ]
+        if execution['objective_min'] is not None:
+            lines += [
+                f"• Objective range: {execution['objective_min']:,.6g} to {execution['objective_max']:,.6g}",
+                f"• Mean objective: {execution['objective_mean']:,.6g}",
+            ]
+        return '\n'.join(lines)
+    if 'objective_value' not in execution:
+        reason = (outputs.get('Mathematician') or {}).get('reason')
+        return NO_SOLUTION_MESSAGE + (f"\n\n🔍 Not solved as a linear model: {reason}" if reason else '')
+    model = execution.get('model', {})
+    lines = [
+        "✅ Optimization complete! Here are your results:",
+        "",
+        "🎯 **Optimal Solution Found:**",
+        f"• Optimal Value: {execution['objective_value']:,.6g}",
+    ]
+    lines.extend(f"• {name} = {value:,.6g}" for name, value in list(execution['variables'].items())[:20])
+    if len(execution['variables']) > 20:
+        lines.append(f"• ... and {len(execution['variables']) - 20} more variables")
+    lines += [
+        "",
+        "📈 **Performance Metrics:**",
+        f"• Solver: {execution['solver']}",
+        f"• Execution Time: {execution['solve_time']:.3f} seconds",
+        f"• Status: {execution['status'].capitalize()}",
+    ]
+    review = outputs.get('Auditor') or {}
+    if review.get('audit'):
+        failures = review['audit']['failures']
+        if not failures:
+            lines.append("• Audit: Passed (all constraints, bounds and the objective verified)")
+        else:
+            found = ', '.join(f"{count} {check}" for check, count in failures.items())
+            lines.append(f"• Audit: {'Approved after review' if review['approved'] else '⚠️ Failed'} ({found} violations)")
+    lines.append("")
+    insights = (outputs.get('Interpreter') or {}).get('insights')
+    if insights:
+        lines += ["📊 **Business Insights:**"] + [f"• {insight}" for insight in insights] + [""]
+    lines += [
+        "🔍 **Model Details:**",
+        f"• Problem Type: {model.get('type', 'LP')}",
+        f"• Variables: {model.get('variables', len(execution['variables']))} decision variables",
+        f"• Constraints: {model.get('inequalities', 0) + model.get('equalities', 0)}",
+    ]
+    return '\n'.join(lines)
@@ -0,0 +1,123 @@
+"""
+Incremental JSON parsing for OptiMind
+Extracts a top-level string field from a JSON object while it is still being streamed
+"""
+
+from typing import Optional
+
+_SIMPLE_ESCAPES = {
+    '"': '"',
+    '\\': '\\',
+    '/': '/',
+    'b': '\b',
+    'f': '\f',
+    'n': '\n',
+    'r': '\r',
+    't': '\t',
+}
+
+
+class JSONFieldStreamer:
+    """Pulls the value of one top-level string field out of a partial JSON document"""
+
+    def __init__(self, field: str):
+        """
+        Initialize the streamer
+
+        Args:
+            field: Name of the top-level string field to extract
+        """
+        self.field = field
+        self.depth = 0
+        self.in_string = False
+        self.capturing = False
+        self.done = False
+        self.value = ""
+        self._escape: Optional[str] = None
+        self._high_surrogate: Optional[int] = None
+        self._key_position = False
+        self._value_position = False
+        self._string_buffer = []
+        self._last_key: Optional[str] = None
+
+    def feed(self, chunk: str) -> str:
+        """
+        Feed the next piece of raw model output
+
+        Args:
+            chunk: Raw text delta
+
+        Returns:
+            Newly decoded text of the field (empty if none)
+        """
+        emitted = []
+        for char in chunk:
+            if self.in_string:
+                decoded = self._consume_string_char(char)
+                if decoded and self.capturing:
+                    emitted.append(decoded)
+                continue
+            if char == '"':
+                self.in_string = True
+                self._string_buffer = []
+                self.capturing = (self.depth == 1 and self._value_position and
+                                  self._last_key == self.field and not self.done)
+            elif char in '{[':
+                self.depth += 1
+                self._key_position = char == '{' and self.depth == 1
+                self._value_position = False
+            elif char in '}]':
+                self.depth -= 1
+            elif char == ',' and self.depth == 1:
+                self._key_position = True
+                self._value_position = False
+            elif char == ':' and self.depth == 1:
+                self._value_position = True
+        text = "".join(emitted)
+        self.value += text
+        return text
+
+    def _consume_string_char(self, char: str) -> str:
+        """Advance the string state machine by one character and return decoded text"""
+        if self._escape is not None:
+            self._escape += char
+            if self._escape[0] != 'u':
+                decoded = _SIMPLE_ESCAPES.get(self._escape, self._escape)
+                self._escape = None
+                return self._append(decoded)
+            if len(self._escape) < 5:
+                return ""
+            try:
+                code = int(self._escape[1:], 16)
+            except ValueError:
+                code = ord('?')
+            self._escape = None
+            if 0xD800 <= code <= 0xDBFF:
+                self._high_surrogate = code
+                return ""
+            if 0xDC00 <= code <= 0xDFFF and self._high_surrogate is not None:
+                code = 0x10000 + ((self._high_surrogate - 0xD800) << 10) + (code - 0xDC00)
+            self._high_surrogate = None
+            return self._append(chr(code))
+        if char == '\\':
+            self._escape = ""
+            return ""
+        if char == '"':
+            self._close_string()
+            return ""
+        return self._append(char)
+
+    def _append(self, text: str) -> str:
+        if not self.capturing:
+            self._string_buffer.append(text)
+        return text
+
+    def _close_string(self):
+        self.in_string = False
+        if self.capturing:
+            self.capturing = False
+            self.done = True
+        elif self.depth == 1 and self._key_position:
+            self._last_key = "".join(self._string_buffer)
+            self._key_position = False
+        self._value_position = False
@@ -0,0 +1 @@
+# Optimization module for OptiMind 
\ No newline at end of file
@@ -0,0 +1,109 @@
+"""
+Solution Auditor for OptiMind
+Deterministic check of a solver result against the compiled model
+
+Every constraint is evaluated at once with sparse matrix-vector products over the compiled
+matrices, so auditing a 100k-row model takes milliseconds. The audit reports:
+
+- feasibility residuals of inequalities (A_ub x - b_ub > 0) and equalities (|A_eq x - b_eq|);
+- bound violations, including 'bound' constraints folded into the variable bounds;
+- integrality gaps of Integer/Binary variables;
+- the objective recomputed from the solution against the value the solver reported
+  ('solver_objective'; skipped for results without one).
+
+Tolerances are relative: a residual r on a row with right-hand side b fails when r > tol * (1 + |b|).
+"""
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from optimization.linear_model import LinearModel
+
+FEASIBILITY_TOL = 1e-6
+INTEGRALITY_TOL = 1e-5
+OBJECTIVE_TOL = 1e-6
+# Violações listadas no relatório (as piores de cada verificação)
+MAX_REPORTED = 10
+
+
+def _worst(check: str, names, amounts: np.ndarray, failed: np.ndarray) -> List[Dict[str, Any]]:
+    """The largest failing amounts of one check, worst first"""
+    rows = np.flatnonzero(failed)
+    if len(rows) > MAX_REPORTED:
+        rows = rows[np.argpartition(-amounts[rows], MAX_REPORTED)[:MAX_REPORTED]]
+    rows = rows[np.argsort(-amounts[rows], kind='stable')]
+    return [{'check': check, 'name': names[i], 'amount': float(amounts[i])} for i in rows]
+
+
+def audit(model: LinearModel, result: Dict[str, Any], feasibility_tol: float = FEASIBILITY_TOL,
+          integrality_tol: float = INTEGRALITY_TOL, objective_tol: float = OBJECTIVE_TOL) -> Dict[str, Any]:
+    """
+    Audit a solver result against the model it claims to solve
+
+    Args:
+        model: Compiled model
+        result: Solver result with 'variables' (name -> value) and 'solver_objective'
+
+    Returns:
+        JSON-serializable report: 'passed', the largest residual of each check, the number of
+        failing rows/variables per check and the worst violations
+    """
+    values = result.get('variables') or {}
+    missing = [name for name in model.variables if name not in values]
+    if missing:
+        return {'passed': False, 'checks': {}, 'failures': {'missing_variables': len(missing)},
+                'violations': [{'check': 'missing_variables', 'name': name, 'amount': None}
+                               for name in missing[:MAX_REPORTED]]}
+    x = np.fromiter((values[name] for name in model.variables), dtype=float, count=len(model.variables))
+    if not np.all(np.isfinite(x)):
+        bad = np.flatnonzero(~np.isfinite(x))
+        return {'passed': False, 'checks': {}, 'failures': {'non_finite_values': len(bad)},
+                'violations': [{'check': 'non_finite_values', 'name': model.variables[j], 'amount': None}
+                               for j in bad[:MAX_REPORTED]]}
+
+    ub_excess = model.A_ub @ x - model.b_ub
+    eq_residual = np.abs(model.A_eq @ x - model.b_eq)
+    below = np.where(np.isfinite(model.lb), model.lb - x, -np.inf)
+    above = np.where(np.isfinite(model.ub), x - model.ub, -np.inf)
+    bound_excess = np.maximum(below, above)
+    integer = model.integrality.astype(bool)
+    gap = np.where(integer, np.abs(x - np.round(x)), 0.0)
+
+    ub_failed = ub_excess > feasibility_tol * (1.0 + np.abs(model.b_ub))
+    eq_failed = eq_residual > feasibility_tol * (1.0 + np.abs(model.b_eq))
+    bound_scale = np.where(below > above, np.abs(model.lb), np.abs(model.ub))
+    bound_failed = bound_excess > feasibility_tol * (1.0 + np.where(np.isfinite(bound_scale), bound_scale, 0.0))
+    gap_failed = gap > integrality_tol
+
+    objective = float(model.c @ x + model.c0)
+    reported: Optional[float] = result.get('solver_objective')
+    objective_error = abs(objective - reported) if reported is not None else None
+    objective_failed = objective_error is not None and objective_error > objective_tol * (1.0 + abs(objective))
+
+    violations = (_worst('inequality', model.ub_names, ub_excess, ub_failed)
+                  + _worst('equality', model.eq_names, eq_residual, eq_failed)
+                  + _worst('bound', model.variables, bound_excess, bound_failed)
+                  + _worst('integrality', model.variables, gap, gap_failed))
+    if objective_failed:
+        violations.append({'check': 'objective', 'name': 'objective', 'amount': objective_error})
+    failures = {
+        'inequality': int(ub_failed.sum()),
+        'equality': int(eq_failed.sum()),
+        'bound': int(bound_failed.sum()),
+        'integrality': int(gap_failed.sum()),
+        'objective': int(objective_failed),
+    }
+    return {
+        'passed': not any(failures.values()),
+        'checks': {
+            'max_inequality_violation': float(max(ub_excess.max(initial=0.0), 0.0)),
+            'max_equality_residual': float(eq_residual.max(initial=0.0)),
+            'max_bound_violation': float(max(bound_excess.max(initial=0.0), 0.0)),
+            'max_integrality_gap': float(gap.max(initial=0.0)),
+            'objective_recomputed': objective,
+            'objective_error': objective_error,
+        },
+        'failures': {check: count for check, count in failures.items() if count},
+        'violations': violations,
+    }
@@ -0,0 +1,216 @@
+"""
+Canonical Model Fingerprints for OptiMind
+Stable hash of a compiled LP/MIP, independent of how the problem was written
+
+Two restatements of the same model (renamed variables, reordered or rescaled constraints,
+'maximize f' vs 'minimize -f', data inlined vs referenced) compile to matrices that differ only
+by a permutation of columns/rows and row scaling. The canonical form undoes those differences:
+
+- the objective is turned into a minimization (its constant term does not change the solution);
+- every row is scaled so its largest coefficient is 1 (equalities also get a canonical sign);
+- columns are ordered by a colour refinement of the variable/constraint graph (their cost, bounds,
+  type and the rows they appear in), rows by their content once the columns are fixed.
+
+Everything runs as NumPy array operations over the sparse matrices: colours are ranks of sorted
+signatures (np.unique), and the multiset of neighbours of a row or column is hashed by summing
+64-bit mixes of its entries over the CSR/CSC segments. Colour collisions only weaken the ordering;
+the final hash covers the full canonical matrices.
+
+Columns that remain indistinguishable after refinement keep their relative order, so highly
+symmetric models may get different fingerprints for different namings (never the same fingerprint
+for different models).
+"""
+
+import hashlib
+from typing import NamedTuple, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from optimization.linear_model import LinearModel
+
+# Dígitos significativos mantidos ao normalizar coeficientes (absorve ruído de ponto flutuante)
+PRECISION = 12
+# Máximo de rodadas; o refinamento para antes se o número de cores não aumenta
+REFINEMENT_ROUNDS = 8
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX_2 = np.uint64(0x94D049BB133111EB)
+
+
+class Fingerprint(NamedTuple):
+    """Hash of the canonical form and the original column of each canonical column"""
+    hash: str
+    columns: Tuple[int, ...]
+
+
+def _round(values: np.ndarray) -> np.ndarray:
+    """Values rounded to PRECISION significant digits (exactly: integer mantissa and exponent)"""
+    values = np.asarray(values, dtype=float)
+    finite = np.isfinite(values) & (values != 0)
+    magnitude = np.abs(np.where(finite, values, 1.0))
+    exponent = np.floor(np.log10(magnitude)) - (PRECISION - 1)
+    mantissa = np.round(np.where(finite, values, 0.0) / 10.0 ** exponent)
+    # log10 arredondado perto de potências de 10 pode deixar a mantissa com um dígito a mais
+    carry = np.abs(mantissa) >= 10.0 ** PRECISION
+    mantissa, exponent = np.where(carry, np.round(mantissa / 10), mantissa), exponent + carry
+    # Dividir por 10^-e (exato) em vez de multiplicar por 10^e (inexato): 1.0 continua 1.0
+    scaled = np.where(exponent < 0, mantissa / 10.0 ** -np.minimum(exponent, 0),
+                      mantissa * 10.0 ** np.maximum(exponent, 0))
+    return np.where(finite, scaled, values) + 0.0  # + 0.0 normaliza -0.0
+
+
+def _mix(*arrays: np.ndarray) -> np.ndarray:
+    """64-bit hash (splitmix64) of aligned integer arrays"""
+    h = np.zeros(len(arrays[0]), dtype=np.uint64)
+    for array in arrays:
+        z = (h ^ np.asarray(array).astype(np.uint64)) + _GOLDEN
+        z = (z ^ (z >> np.uint64(30))) * _MIX_1
+        z = (z ^ (z >> np.uint64(27))) * _MIX_2
+        h = z ^ (z >> np.uint64(31))
+    return h
+
+
+def _bits(values: np.ndarray) -> np.ndarray:
+    return np.ascontiguousarray(values, dtype=float).view(np.uint64)
+
+
+def _segment_sums(h: np.ndarray, indptr: np.ndarray) -> np.ndarray:
+    """Sum (mod 2^64) of h over each segment indptr[k]:indptr[k + 1] — an order-free multiset hash"""
+    sums = np.zeros(len(indptr) - 1, dtype=np.uint64)
+    non_empty = indptr[:-1] < indptr[1:]
+    if non_empty.any():
+        sums[non_empty] = np.add.reduceat(h, indptr[:-1][non_empty])
+    return sums
+
+
+def _ranks(*columns: np.ndarray) -> np.ndarray:
+    """Colour of each item: rank of its signature among the distinct signatures"""
+    keys = [_bits(c) if c.dtype.kind == 'f' else c.astype(np.uint64) for c in columns]
+    order = np.lexsort(keys[::-1])
+    new = np.zeros(len(order), dtype=bool)
+    for key in keys:
+        new[1:] |= key[order][1:] != key[order][:-1]
+    ranks = np.empty(len(order), dtype=np.int64)
+    ranks[order] = np.cumsum(new)
+    return ranks
+
+
+def _count(colors: np.ndarray) -> int:
+    return int(colors.max()) + 1 if len(colors) else 0
+
+
+def _canonical_signs(A: sparse.csr_array, b: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    +1/-1 per equality row: the sign whose sorted coefficients (then right-hand side) are larger
+
+    Also flags the rows that read the same negated (e.g. x - y == 0); they are oriented later,
+    once the canonical column order is known.
+    """
+    m = A.shape[0]
+    if not m:
+        return np.ones(0), np.zeros(0, dtype=bool)
+    lengths = np.diff(A.indptr)
+    row = np.repeat(np.arange(m), lengths)
+    ascending = A.data[np.lexsort((A.data, row))]
+    # sorted(-vals) é o negativo de sorted(vals) lido de trás para frente, dentro de cada linha
+    start = A.indptr[:-1][row]
+    negated = -ascending[start + (A.indptr[1:][row] - 1) - np.arange(len(row))]
+    where = np.flatnonzero(negated != ascending)
+    first = np.full(m, -1)
+    differing, at = np.unique(row[where], return_index=True)
+    first[differing] = where[at]
+    flip = np.where(first >= 0, negated[np.maximum(first, 0)] > ascending[np.maximum(first, 0)], -b > b)
+    return np.where(flip, -1.0, 1.0), (first < 0) & (b == 0)
+
+
+def _scaled(A, b: np.ndarray, equality: bool) -> Tuple[sparse.csr_array, np.ndarray, np.ndarray]:
+    """Rows scaled to max |a| = 1 (empty rows to |b| = 1) and rounded; equalities take the larger of ±row"""
+    A = sparse.csr_array(A, dtype=float, copy=True)
+    A.sum_duplicates()
+    A.eliminate_zeros()
+    lengths = np.diff(A.indptr)
+    b = np.asarray(b, dtype=float)
+    # Linha vazia (0 <= b ou 0 == b): só o sinal do lado direito importa
+    scale = np.where(b != 0, np.abs(b), 1.0)
+    non_empty = lengths > 0
+    if non_empty.any():
+        scale[non_empty] = np.maximum.reduceat(np.abs(A.data), A.indptr[:-1][non_empty])
+    A.data = _round(A.data / np.repeat(scale, lengths))
+    b = _round(b / scale)
+    ambiguous = np.zeros(A.shape[0], dtype=bool)
+    if equality:
+        signs, ambiguous = _canonical_signs(A, b)
+        A.data = A.data * np.repeat(signs, lengths) + 0.0
+        b = b * signs + 0.0
+    return A, b, ambiguous
+
+
+def fingerprint(model: LinearModel) -> Fingerprint:
+    """Canonical hash of a compiled model and the column permutation it was computed with"""
+    n = len(model.variables)
+    sign = -1.0 if model.sense == 'maximize' else 1.0
+    cost = _round(sign * np.asarray(model.c, dtype=float))
+    lb, ub = _round(model.lb), _round(model.ub)
+    integer = np.asarray(model.integrality, dtype=np.int64)
+    A_ub, b_ub, _ = _scaled(model.A_ub, model.b_ub, equality=False)
+    A_eq, b_eq, ambiguous = _scaled(model.A_eq, model.b_eq, equality=True)
+    A = sparse.csr_array(sparse.vstack([A_ub, A_eq], format='csr'))
+    kind = np.concatenate((np.zeros(A_ub.shape[0], dtype=np.int64), np.ones(A_eq.shape[0], dtype=np.int64)))
+    rhs = np.concatenate((b_ub, b_eq))
+    lengths = np.diff(A.indptr)
+    rows = np.repeat(np.arange(A.shape[0]), lengths)
+    columns = A.indices.astype(np.int64)
+    coefficient = _bits(A.data)
+    # Linhas sem sinal canônico: hash da linha igual para ±linha, colunas veem só |a|
+    ambiguous = np.concatenate((np.zeros(A_ub.shape[0], dtype=bool), ambiguous))
+    negated = _bits(-A.data + 0.0)
+    magnitude = np.where(ambiguous[rows], _bits(np.abs(A.data)), coefficient)
+    by_column = np.argsort(columns, kind='stable')
+    column_indptr = np.concatenate(([0], np.cumsum(np.bincount(columns, minlength=n))))
+
+    column_color = _ranks(cost, lb, ub, integer) if n else np.zeros(0, dtype=np.int64)
+    row_color = _ranks(kind, rhs, lengths) if A.shape[0] else np.zeros(0, dtype=np.int64)
+    colors = _count(column_color) + _count(row_color)
+    # Refinamento de cores (Weisfeiler-Lehman) no grafo bipartido variáveis x restrições
+    for _ in range(REFINEMENT_ROUNDS):
+        if A.shape[0]:
+            sums = _segment_sums(_mix(column_color[columns], coefficient), A.indptr)
+            if ambiguous.any():
+                flipped = _segment_sums(_mix(column_color[columns], negated), A.indptr)
+                sums = np.where(ambiguous, np.minimum(sums, flipped), sums)
+            row_color = _ranks(row_color, sums)
+        if n:
+            neighbours = _mix(row_color[rows], magnitude)[by_column]
+            column_color = _ranks(column_color, _segment_sums(neighbours, column_indptr))
+        refined = _count(column_color) + _count(row_color)
+        if refined == colors:
+            break
+        colors = refined
+
+    order = np.lexsort((np.arange(n), column_color))
+    position = np.empty(n, dtype=np.int64)
+    position[order] = np.arange(n)
+    data = A.data
+    if ambiguous.any():
+        # Orienta cada linha ambígua pelo sinal do coeficiente na primeira coluna canônica
+        first = np.full(A.shape[0], n)
+        np.minimum.at(first, rows, position[columns])
+        leading = position[columns] == first[rows]
+        flip = np.zeros(A.shape[0], dtype=bool)
+        flip[rows[leading]] = data[leading] < 0
+        data = np.where(ambiguous[rows] & flip[rows], -data, data) + 0.0
+        coefficient = _bits(data)
+    # Linhas ordenadas pelo conteúdo já com as colunas canônicas
+    content = _segment_sums(_mix(position[columns], coefficient), A.indptr)
+    row_order = np.lexsort((content, lengths, rhs, kind))
+    canonical = sparse.csr_array((data, position[columns], A.indptr), shape=A.shape)[row_order]
+    canonical.sort_indices()
+
+    digest = hashlib.sha256()
+    for array in (cost[order], lb[order], ub[order], integer[order], kind[row_order], rhs[row_order],
+                  canonical.indptr.astype('<i8'), canonical.indices.astype('<i8'), canonical.data):
+        digest.update(np.ascontiguousarray(array, dtype='<i8' if array.dtype.kind in 'iu' else '<f8').tobytes())
+        digest.update(b'|')
+    return Fingerprint(digest.hexdigest(), tuple(order.tolist()))
@@ -0,0 +1,169 @@
+"""
+Columnar Model Data for OptiMind
+Sets and indexed parameters stored as NumPy arrays instead of inline JSON
+
+In a problem JSON, large sets/parameters reference arrays by hash ({"$array": "<sha256>"}, stored
+with utils.db.put_array) or a Parquet column ({"$parquet": "path", "column": "demand"}), so the
+problem (and the prompts built from it) stays small however many elements the model has.
+
+Problem JSON comes from the LLM, so Parquet paths are only resolved inside DATA_DIR: absolute
+paths, '..' components, URLs and symlinks leaving the directory are rejected.
+"""
+
+import os
+from pathlib import Path, PurePath
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+import numpy as np
+
+ArrayLoader = Callable[[str], np.ndarray]
+
+DATA_DIR = os.getenv('OPTIMIND_DATA_DIR', os.path.join(os.path.dirname(__file__), '..', 'data'))
+# Elementos por conjunto: {"size": n} vem do LLM ou do usuário e não pode alocar sem limite
+MAX_SET_SIZE = int(os.getenv('OPTIMIND_MAX_SET_SIZE', '1000000'))
+
+
+def _default_loader(blob_hash: str) -> np.ndarray:
+    from utils import db
+    return db.get_array(blob_hash)
+
+
+def data_path(path: Any) -> Path:
+    """Resolve a Parquet reference relative to DATA_DIR, refusing anything that leaves it"""
+    if not isinstance(path, str) or not path:
+        raise ValueError('Parquet reference must be a relative path')
+    if urlparse(path).scheme or PurePath(path).is_absolute() or '..' in PurePath(path).parts \
+            or os.path.isabs(path):
+        raise ValueError(f"Parquet path '{path}' must be relative to the data directory")
+    root = Path(DATA_DIR).resolve()
+    resolved = (root / path).resolve()
+    if root not in resolved.parents:
+        raise ValueError(f"Parquet path '{path}' leaves the data directory")
+    return resolved
+
+
+def load_column(spec: Any, arrays: Optional[ArrayLoader] = None) -> Optional[np.ndarray]:
+    """Resolve an array reference ($array / $parquet); None if spec is inline JSON"""
+    if not isinstance(spec, dict):
+        return None
+    if '$array' in spec:
+        return np.asarray((arrays or _default_loader)(spec['$array']))
+    if '$parquet' in spec:
+        import pandas as pd
+        column = spec.get('column')
+        try:
+            frame = pd.read_parquet(data_path(spec['$parquet']), columns=[column] if column else None)
+        except (OSError, ImportError, TypeError, NotImplementedError, ValueError) as e:
+            # Arquivo ausente, pyarrow não instalado ou Parquet inválido (os erros do pyarrow herdam
+            # destas classes): ValueError vira ModelError no compilador
+            raise ValueError(f"Cannot read Parquet reference '{spec['$parquet']}': {e}") from None
+        return frame[column].to_numpy() if column else frame.iloc[:, 0].to_numpy()
+    return None
+
+
+def load_set(spec: Any, arrays: Optional[ArrayLoader] = None) -> np.ndarray:
+    """
+    Elements of a set: a list, {"elements": [...]}, {"size": n} (0..n-1),
+    {"start": a, "stop": b} or an array reference
+    """
+    column = load_column(spec, arrays)
+    if column is not None:
+        return _bounded(column)
+    if isinstance(spec, dict):
+        if 'elements' in spec:
+            return load_set(spec['elements'], arrays)
+        if 'size' in spec:
+            return np.arange(_bounded_size(int(spec['size'])))
+        if 'stop' in spec:
+            start = int(spec.get('start', 0))
+            return np.arange(start, start + _bounded_size(int(spec['stop']) - start))
+        raise ValueError(f"Invalid set definition {spec}")
+    elements = np.asarray(spec)
+    if elements.ndim != 1:
+        raise ValueError('Set elements must be a flat list')
+    return _bounded(elements)
+
+
+def _bounded_size(size: int) -> int:
+    if size > MAX_SET_SIZE:
+        raise ValueError(f"Set has {size} elements (limit {MAX_SET_SIZE})")
+    return max(size, 0)
+
+
+def _bounded(elements: np.ndarray) -> np.ndarray:
+    _bounded_size(len(elements))
+    return elements
+
+
+def load_parameter(spec: Any, shape: Tuple[int, ...], positions: Sequence[Callable[[Any], int]],
+                   arrays: Optional[ArrayLoader] = None) -> np.ndarray:
+    """
+    Values of an indexed parameter as an array of the given shape
+
+    spec['values'] may be a (nested) list in set order, a (nested) dict keyed by set elements,
+    or an array reference; missing dict entries take spec['default'] (0 if absent).
+    """
+    values = spec.get('values')
+    column = load_column(values, arrays)
+    if column is not None:
+        return np.asarray(column, dtype=float).reshape(shape)
+    if isinstance(values, dict):
+        out = np.full(shape, float(spec.get('default', 0.0)))
+        _fill(out, values, (), positions)
+        return out
+    out = np.asarray(values, dtype=float)
+    if out.shape != shape:
+        raise ValueError(f"Parameter values have shape {out.shape}, expected {shape}")
+    return out
+
+
+def _fill(out: np.ndarray, values: Dict[Any, Any], prefix: Tuple[int, ...], positions: Sequence[Callable[[Any], int]]):
+    locate = positions[len(prefix)]
+    for key, value in values.items():
+        at = prefix + (locate(key),)
+        if isinstance(value, dict):
+            _fill(out, value, at, positions)
+        else:
+            out[at] = float(value)
+
+
+def parameters_from_table(frame, index: Sequence[str], values: Sequence[str],
+                          store: Optional[Callable[[np.ndarray], str]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Convert a long table (one row per index combination) into columnar sets and parameters
+
+    Args:
+        frame: pandas DataFrame
+        index: Columns that index the parameters; each becomes a set named after the column
+        values: Columns that become parameters indexed by those sets
+        store: Persists an array and returns its hash (defaults to utils.db.put_array)
+
+    Returns:
+        {'sets': {...}, 'parameters': {...}} to merge into a problem JSON
+    """
+    if store is None:
+        from utils import db
+        store = db.put_array
+    codes, sets = [], {}
+    for column in index:
+        code, uniques = _factorize(frame[column].to_numpy())
+        codes.append(code)
+        sets[column] = {'$array': store(uniques.astype(str) if uniques.dtype == object else uniques)}
+    shape = tuple(len(np.unique(code)) for code in codes)
+    flat = np.ravel_multi_index(codes, shape) if codes else np.zeros(len(frame), dtype=np.int64)
+    parameters = {}
+    for column in values:
+        array = np.zeros(int(np.prod(shape)))
+        array[flat] = frame[column].to_numpy(dtype=float)
+        parameters[column] = {'index': list(index), 'values': {'$array': store(array.reshape(shape))}}
+    return {'sets': sets, 'parameters': parameters}
+
+
+def _factorize(column: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Codes and unique values of a column, in order of first appearance"""
+    uniques, first, codes = np.unique(column, return_index=True, return_inverse=True)
+    order = np.argsort(first)
+    remap = np.empty_like(order)
+    remap[order] = np.arange(len(order))
+    return remap[codes.ravel()], uniques[order]
@@ -0,0 +1,363 @@
+"""
+Vectorized Expression Compiler for OptiMind
+Evaluates objective/constraint expressions over indexed sets into NumPy-backed affine expressions
+
+An expression is affine in the decision variables and may have free index axes (e.g. inside a
+constraint declared `for_all: "i in I"`): its constant part is an array over those axes and each
+linear term carries a coefficient array over the free axes plus any axes summed inside it.
+Sums use Python generator syntax: `sum(cost[i] * x[i] for i in I)`.
+"""
+
+import ast
+import itertools
+import re
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+
+class ModelError(ValueError):
+    """The problem cannot be compiled into a linear model"""
+
+
+class Term(NamedTuple):
+    """coef * var[index]; index entries are axis ids or fixed positions, coef spans `axes`"""
+    var: str
+    index: Tuple[Union[str, int], ...]
+    axes: Tuple[str, ...]
+    coef: np.ndarray
+
+
+class Expr:
+    """Affine expression with free index axes; every term's axes start with the free axes"""
+
+    __slots__ = ('axes', 'const', 'terms')
+
+    def __init__(self, axes: Tuple[str, ...], const: np.ndarray, terms: Optional[List[Term]] = None):
+        self.axes = axes
+        self.const = const
+        self.terms = terms or []
+
+    @property
+    def is_constant(self) -> bool:
+        return not self.terms
+
+
+def constant(value: float) -> Expr:
+    return Expr((), np.asarray(float(value)))
+
+
+def _arrange(array: np.ndarray, src: Sequence[str], dst: Sequence[str], sizes: Dict[str, int]) -> np.ndarray:
+    """Broadcast an array labeled by axes `src` to the axes `dst` (src must be a subset of dst)"""
+    array = np.asarray(array, dtype=float)
+    order = [src.index(ax) for ax in dst if ax in src]
+    array = array.transpose(order) if order != list(range(len(order))) else array
+    shape = []
+    present = iter(array.shape)
+    for ax in dst:
+        shape.append(next(present) if ax in src else 1)
+    return np.broadcast_to(array.reshape(shape), tuple(sizes[ax] for ax in dst))
+
+
+class ExpressionCompiler:
+    """
+    Evaluates expression ASTs over sets, parameters and variable blocks
+
+    Args:
+        sets: Set name -> element array
+        blocks: Variable name -> tuple of set names it is indexed by (() for scalars)
+        parameter: Resolves a parameter/data name to (array, set names) or None if unknown
+        auxiliary: Scalar auxiliary variable name -> defining equation
+    """
+
+    def __init__(self, sets: Dict[str, np.ndarray], blocks: Dict[str, Tuple[str, ...]],
+                 parameter: Callable[[str], Optional[Tuple[np.ndarray, Tuple[str, ...]]]],
+                 auxiliary: Optional[Dict[str, str]] = None):
+        self.sets = sets
+        self.blocks = blocks
+        self.parameter = parameter
+        self.auxiliary = auxiliary or {}
+        self.sizes: Dict[str, int] = {}
+        self.axis_set: Dict[str, str] = {}
+        self.scope: Dict[str, str] = {}
+        self._positions: Dict[str, Dict[Any, int]] = {}
+        self._aux_cache: Dict[str, Expr] = {}
+        self._aux_stack: List[str] = []
+        self._counter = itertools.count()
+
+    # --- parsing e escopo dos índices ---
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Rewrite the notation used in problem JSON into Python syntax"""
+        text = text.replace('≤', '<=').replace('≥', '>=').replace('−', '-').replace('^', '**')
+        text = re.sub(r'(?<![<>=!])=(?!=)', '==', text)
+        return text.strip()
+
+    def parse(self, text: str) -> ast.AST:
+        try:
+            return ast.parse(self.normalize(text), mode='eval').body
+        except SyntaxError as e:
+            raise ModelError(f"Invalid expression '{text}': {e.msg}") from None
+
+    def bind(self, index: str, set_name: str) -> str:
+        """Bind an index name (e.g. 'i') to a fresh axis over a set; returns the axis id"""
+        if set_name not in self.sets:
+            raise ModelError(f"Unknown set '{set_name}'")
+        if index in self.scope:
+            raise ModelError(f"Index '{index}' is already in use")
+        axis = f'{index}#{next(self._counter)}'
+        self.sizes[axis] = len(self.sets[set_name])
+        self.axis_set[axis] = set_name
+        self.scope[index] = axis
+        return axis
+
+    def unbind(self, index: str):
+        self.scope.pop(index, None)
+
+    def parse_domain(self, text: str) -> List[Tuple[str, str]]:
+        """Parse 'i in I, j in J' into [(index, set name), ...]"""
+        domain = []
+        for part in filter(None, (p.strip() for p in re.split(r',|\band\b', text))):
+            match = re.fullmatch(r'(\w+)\s+(?:in|∈)\s+(\w+)', part)
+            if not match:
+                raise ModelError(f"Invalid index domain '{text}'")
+            domain.append((match.group(1), match.group(2)))
+        return domain
+
+    def position(self, set_name: str, element: Any) -> int:
+        """Position of an element in a set (string and numeric keys are matched loosely)"""
+        positions = self._positions.get(set_name)
+        if positions is None:
+            positions = self._positions[set_name] = {}
+            for k, e in enumerate(self.sets[set_name].tolist()):
+                positions.setdefault(e, k)
+                positions.setdefault(str(e), k)
+        for key in (element, str(element)):
+            if key in positions:
+                return positions[key]
+        raise ModelError(f"'{element}' is not an element of set '{set_name}'")
+
+    # --- álgebra vetorizada ---
+
+    def align(self, expr: Expr, axes: Tuple[str, ...]) -> Expr:
+        if expr.axes == axes:
+            return expr
+        const = _arrange(expr.const, expr.axes, axes, self.sizes)
+        terms = []
+        for term in expr.terms:
+            bound = term.axes[len(expr.axes):]
+            new_axes = axes + bound
+            terms.append(term._replace(axes=new_axes, coef=_arrange(term.coef, term.axes, new_axes, self.sizes)))
+        return Expr(axes, const, terms)
+
+    def add(self, a: Expr, b: Expr, sign: float = 1.0) -> Expr:
+        axes = a.axes + tuple(ax for ax in b.axes if ax not in a.axes)
+        a, b = self.align(a, axes), self.align(b, axes)
+        terms = a.terms + ([t._replace(coef=-t.coef) for t in b.terms] if sign < 0 else b.terms)
+        return Expr(axes, a.const + sign * b.const, terms)
+
+    def scale(self, expr: Expr, factor: Expr) -> Expr:
+        """Multiply an expression by a constant expression (possibly indexed)"""
+        axes = expr.axes + tuple(ax for ax in factor.axes if ax not in expr.axes)
+        expr = self.align(expr, axes)
+        values = _arrange(factor.const, factor.axes, axes, self.sizes)
+        terms = []
+        for term in expr.terms:
+            extra = len(term.axes) - len(axes)
+            terms.append(term._replace(coef=term.coef * values.reshape(values.shape + (1,) * extra)))
+        return Expr(axes, expr.const * values, terms)
+
+    def summation(self, expr: Expr, summed: Sequence[str]) -> Expr:
+        """Sum over index axes: constants are reduced, terms keep the axes as bound (internal) axes"""
+        keep = tuple(ax for ax in expr.axes if ax not in summed)
+        summed = tuple(ax for ax in expr.axes if ax in summed)
+        const = expr.const.sum(axis=tuple(expr.axes.index(ax) for ax in summed)) if summed else expr.const
+        terms = []
+        for term in expr.terms:
+            new_axes = keep + summed + term.axes[len(expr.axes):]
+            order = [term.axes.index(ax) for ax in new_axes]
+            terms.append(term._replace(axes=new_axes, coef=term.coef.transpose(order)))
+        return Expr(keep, np.asarray(const, dtype=float), terms)
+
+    # --- avaliação da AST ---
+
+    def eval(self, node: ast.AST) -> Expr:
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+            return constant(node.value)
+        if isinstance(node, ast.Name):
+            return self._name(node.id)
+        if isinstance(node, ast.Subscript):
+            return self._subscript(node)
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+            value = self.eval(node.operand)
+            return self.scale(value, constant(-1.0)) if isinstance(node.op, ast.USub) else value
+        if isinstance(node, ast.BinOp):
+            return self._binop(node)
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == 'sum':
+            return self._sum(node)
+        raise ModelError(f"Unsupported expression '{ast.unparse(node)}'")
+
+    def _binop(self, node: ast.BinOp) -> Expr:
+        left, right = self.eval(node.left), self.eval(node.right)
+        if isinstance(node.op, (ast.Add, ast.Sub)):
+            return self.add(left, right, 1.0 if isinstance(node.op, ast.Add) else -1.0)
+        if isinstance(node.op, ast.Mult):
+            if not left.is_constant and not right.is_constant:
+                raise ModelError(f"Nonlinear term '{ast.unparse(node)}'")
+            return self.scale(right, left) if left.is_constant else self.scale(left, right)
+        if isinstance(node.op, ast.Div):
+            if not right.is_constant:
+                raise ModelError(f"Nonlinear term '{ast.unparse(node)}'")
+            if np.any(right.const == 0):
+                raise ModelError(f"Division by zero in '{ast.unparse(node)}'")
+            return self.scale(left, Expr(right.axes, 1.0 / right.const))
+        if isinstance(node.op, ast.Pow) and right.is_constant:
+            if left.is_constant:
+                axes = left.axes + tuple(ax for ax in right.axes if ax not in left.axes)
+                return Expr(axes, self.align(left, axes).const ** self.align(right, axes).const)
+            if not right.axes and float(right.const) == 1.0:
+                return left
+        raise ModelError(f"Nonlinear term '{ast.unparse(node)}'")
+
+    def _sum(self, node: ast.Call) -> Expr:
+        if len(node.args) != 1 or not isinstance(node.args[0], ast.GeneratorExp):
+            raise ModelError(f"sum() needs a generator such as 'sum(x[i] for i in I)': '{ast.unparse(node)}'")
+        generator = node.args[0]
+        bound = []
+        try:
+            for comp in generator.generators:
+                if comp.ifs or not isinstance(comp.target, ast.Name) or not isinstance(comp.iter, ast.Name):
+                    raise ModelError(f"Unsupported sum domain in '{ast.unparse(node)}'")
+                bound.append((comp.target.id, self.bind(comp.target.id, comp.iter.id)))
+            body = self.eval(generator.elt)
+        finally:
+            for index, _ in bound:
+                self.unbind(index)
+        summed = [axis for _, axis in bound]
+        # Axes que o corpo não usa ainda contam |I| vezes
+        missing = tuple(ax for ax in summed if ax not in body.axes)
+        if missing:
+            body = self.align(body, body.axes + missing)
+        return self.summation(body, summed)
+
+    def _name(self, name: str) -> Expr:
+        if name in self.scope:
+            axis = self.scope[name]
+            elements = self.sets[self.axis_set[axis]]
+            if not np.issubdtype(elements.dtype, np.number):
+                raise ModelError(f"Index '{name}' is not numeric and can only be used as a subscript")
+            return Expr((axis,), elements.astype(float))
+        if name in self.blocks:
+            if self.blocks[name]:
+                raise ModelError(f"Variable '{name}' is indexed by {list(self.blocks[name])}; use {name}[...]")
+            return Expr((), np.asarray(0.0), [Term(name, (), (), np.asarray(1.0))])
+        if name in self.auxiliary:
+            return self._auxiliary(name)
+        resolved = self.parameter(name)
+        if resolved is None:
+            raise ModelError(f"Unknown name '{name}'")
+        values, index_sets = resolved
+        if index_sets is None:
+            return Expr((), np.asarray(_number(values, name)))
+        if index_sets:
+            raise ModelError(f"Parameter '{name}' is indexed by {list(index_sets)}; use {name}[...]")
+        return Expr((), np.asarray(values, dtype=float))
+
+    def _auxiliary(self, name: str) -> Expr:
+        # Variáveis auxiliares são definidas por equações lineares: substitui a definição
+        if name not in self._aux_cache:
+            if name in self._aux_stack:
+                raise ModelError(f"Circular definition of auxiliary variable '{name}'")
+            self._aux_stack.append(name)
+            try:
+                self._aux_cache[name] = self.eval(self.parse(self.auxiliary[name]))
+            finally:
+                self._aux_stack.pop()
+        return self._aux_cache[name]
+
+    def _index(self, node: ast.Subscript, index_sets: Tuple[str, ...]) -> List[Union[str, int]]:
+        """Resolve a subscript into axis ids (bound indices) or fixed element positions"""
+        items = node.slice.elts if isinstance(node.slice, ast.Tuple) else [node.slice]
+        if len(items) != len(index_sets):
+            raise ModelError(f"'{ast.unparse(node)}' needs {len(index_sets)} indices")
+        resolved: List[Union[str, int]] = []
+        for item, set_name in zip(items, index_sets):
+            if isinstance(item, ast.Name) and item.id in self.scope:
+                axis = self.scope[item.id]
+                if self.axis_set[axis] != set_name:
+                    raise ModelError(f"Index '{item.id}' runs over '{self.axis_set[axis]}', "
+                                     f"but '{ast.unparse(node)}' expects '{set_name}'")
+                resolved.append(axis)
+            elif isinstance(item, ast.Constant):
+                resolved.append(self.position(set_name, item.value))
+            elif isinstance(item, ast.Name):
+                resolved.append(self.position(set_name, item.id))
+            elif isinstance(item, ast.UnaryOp) and isinstance(item.op, ast.USub) and isinstance(item.operand, ast.Constant):
+                resolved.append(self.position(set_name, -item.operand.value))
+            else:
+                raise ModelError(f"Unsupported index '{ast.unparse(item)}' in '{ast.unparse(node)}'")
+        return resolved
+
+    def _subscript(self, node: ast.Subscript) -> Expr:
+        if not isinstance(node.value, ast.Name):
+            raise ModelError(f"Unsupported subscript '{ast.unparse(node)}'")
+        name = node.value.id
+        if name in self.blocks:
+            index = self._index(node, self.blocks[name])
+            axes = tuple(dict.fromkeys(ax for ax in index if isinstance(ax, str)))
+            coef = np.ones(tuple(self.sizes[ax] for ax in axes))
+            return Expr(axes, np.zeros(coef.shape), [Term(name, tuple(index), axes, coef)])
+        resolved = self.parameter(name)
+        if resolved is None:
+            raise ModelError(f"Unknown name '{name}'")
+        values, index_sets = resolved
+        if index_sets is None:
+            return self._lookup(node, values)
+        index = self._index(node, index_sets)
+        selected = values[tuple(slice(None) if isinstance(ax, str) else ax for ax in index)]
+        axes = tuple(ax for ax in index if isinstance(ax, str))
+        if len(set(axes)) != len(axes):
+            raise ModelError(f"Repeated index in '{ast.unparse(node)}'")
+        return Expr(axes, np.asarray(selected, dtype=float))
+
+    def _lookup(self, node: ast.Subscript, container: Any) -> Expr:
+        """Index plain JSON data (dicts/lists) such as price['A'] or price[i] with i over a set"""
+        items = node.slice.elts if isinstance(node.slice, ast.Tuple) else [node.slice]
+        keys: List[Tuple[bool, Any]] = []
+        for item in items:
+            if isinstance(item, ast.Name) and item.id in self.scope:
+                keys.append((True, self.scope[item.id]))
+            elif isinstance(item, ast.Constant):
+                keys.append((False, item.value))
+            elif isinstance(item, ast.Name):
+                keys.append((False, item.id))
+            else:
+                raise ModelError(f"Unsupported index '{ast.unparse(item)}' in '{ast.unparse(node)}'")
+        axes = tuple(dict.fromkeys(key for is_axis, key in keys if is_axis))
+        out = np.empty(tuple(self.sizes[ax] for ax in axes))
+        elements = {ax: self.sets[self.axis_set[ax]].tolist() for ax in axes}
+        for combo in itertools.product(*(range(self.sizes[ax]) for ax in axes)):
+            at = dict(zip(axes, combo))
+            value = container
+            for is_axis, key in keys:
+                value = _get(value, elements[key][at[key]] if is_axis else key, node)
+            out[combo] = _number(value, ast.unparse(node))
+        return Expr(axes, out)
+
+
+def _get(container: Any, key: Any, node: ast.AST) -> Any:
+    try:
+        if isinstance(container, list):
+            return container[int(key)]
+        if isinstance(container, dict):
+            return container[key] if key in container else container[str(key)]
+    except (KeyError, IndexError, ValueError):
+        pass
+    raise ModelError(f"Missing data '{ast.unparse(node)}' for key '{key}'")
+
+
+def _number(value: Any, label: str) -> float:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ModelError(f"Data '{label}' is not a number")
+    return float(value)
@@ -0,0 +1,400 @@
+"""
+Incremental Re-solve for OptiMind
+Keeps the last compiled model of a chat in memory and re-solves edits as deltas
+
+When the user tweaks a bound or a coefficient, the new model is diffed against the previous one
+(changed costs/bounds/right-hand sides/coefficients, added/removed rows) and the delta is applied to
+a persistent model instead of rebuilding it:
+
+- with highspy installed, the delta is applied to a live HiGHS instance (built at the first edit;
+  the first solve of a session always goes through cold_solve), which re-solves warm from the
+  previous basis (LP) or starts from the previous incumbent (MIP);
+- otherwise the previous solution is reused when it is provably still optimal (nothing changed, or
+  the edit only tightened the model and the solution is still feasible), and the model is solved
+  from scratch with SciPy when it is not.
+
+Sessions live in the worker process (LRU of MAX_SESSIONS models), keyed by job id: the next job of
+the same chat passes previous_job_id and continues from the previous session.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from optimization.linear_model import LinearModel
+
+try:
+    import highspy
+except ImportError:  # highspy é opcional; sem ele o re-solve usa SciPy
+    highspy = None
+
+MAX_SESSIONS = 32
+# Tolerância de viabilidade ao reaproveitar uma solução anterior
+FEASIBILITY_TOL = 1e-7
+
+Solver = Callable[[LinearModel], Dict[str, Any]]
+
+
+class Row(NamedTuple):
+    """A constraint row: lower <= sum(values * x[columns]) <= upper"""
+    name: str
+    kind: str
+    columns: Tuple[int, ...]
+    values: Tuple[float, ...]
+    lower: float
+    upper: float
+
+
+def model_rows(model: LinearModel) -> List[Row]:
+    """Rows of a compiled model, inequalities first"""
+    rows = []
+    for kind, A, b, names in (('<=', model.A_ub, model.b_ub, model.ub_names),
+                              ('==', model.A_eq, model.b_eq, model.eq_names)):
+        A = A.tocsr()
+        for i in range(A.shape[0]):
+            start, end = A.indptr[i], A.indptr[i + 1]
+            rhs = float(b[i])
+            rows.append(Row(names[i], kind, tuple(A.indices[start:end].tolist()), tuple(A.data[start:end].tolist()),
+                            -np.inf if kind == '<=' else rhs, rhs))
+    return rows
+
+
+class ModelDelta(NamedTuple):
+    """Changes that turn a previous model (and its row order) into a new one"""
+    rebuild: bool
+    sense: Optional[str]
+    offset: Optional[float]
+    costs: List[Tuple[int, float]]
+    bounds: List[Tuple[int, float, float]]
+    rhs: List[Tuple[int, float, float]]
+    coefficients: List[Tuple[int, int, float]]
+    removed_rows: List[int]
+    added_rows: List[Row]
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.rebuild or self.sense or self.costs or self.bounds or self.rhs or self.coefficients
+                    or self.removed_rows or self.added_rows) and self.offset is None
+
+    def summary(self) -> Dict[str, Any]:
+        """Counts of each kind of change, JSON-serializable"""
+        return {
+            'rebuild': self.rebuild,
+            'sense_changed': self.sense is not None,
+            'costs': len(self.costs),
+            'bounds': len(self.bounds),
+            'rhs': len(self.rhs),
+            'coefficients': len(self.coefficients),
+            'removed_rows': len(self.removed_rows),
+            'added_rows': len(self.added_rows),
+        }
+
+
+def diff_models(old: LinearModel, old_rows: List[Row], new: LinearModel, new_rows: List[Row]) -> ModelDelta:
+    """
+    Delta from old (with rows in old_rows order) to new
+
+    Variables are matched by name; a change in the variable set or their types requires a rebuild.
+    Rows are matched by identical coefficients first (a right-hand side edit), then by name
+    (a coefficient edit); the rest are added or removed.
+    """
+    if old.variables != new.variables or not np.array_equal(old.integrality, new.integrality):
+        return ModelDelta(True, None, None, [], [], [], [], [], [])
+
+    costs = [(int(j), float(new.c[j])) for j in np.flatnonzero(old.c != new.c)]
+    changed = np.flatnonzero((old.lb != new.lb) | (old.ub != new.ub))
+    bounds = [(int(j), float(new.lb[j]), float(new.ub[j])) for j in changed]
+
+    by_content: Dict[Tuple, List[int]] = {}
+    for i, row in enumerate(old_rows):
+        by_content.setdefault((row.kind, row.columns, row.values), []).append(i)
+    matched: Dict[int, int] = {}
+    leftover = []
+    for k, row in enumerate(new_rows):
+        candidates = by_content.get((row.kind, row.columns, row.values))
+        if candidates:
+            same_name = [i for i in candidates if old_rows[i].name == row.name]
+            i = (same_name or candidates)[0]
+            candidates.remove(i)
+            matched[k] = i
+        else:
+            leftover.append(k)
+    taken = set(matched.values())
+    unmatched_old = {old_rows[i].name: i for i in range(len(old_rows)) if i not in taken}
+    added = []
+    for k in leftover:
+        i = unmatched_old.get(new_rows[k].name)
+        if i is not None and old_rows[i].kind == new_rows[k].kind:
+            del unmatched_old[new_rows[k].name]
+            matched[k] = i
+        else:
+            added.append(new_rows[k])
+
+    rhs, coefficients = [], []
+    for k, i in matched.items():
+        before, after = old_rows[i], new_rows[k]
+        if (before.lower, before.upper) != (after.lower, after.upper):
+            rhs.append((i, after.lower, after.upper))
+        if (before.columns, before.values) != (after.columns, after.values):
+            old_entries, new_entries = dict(zip(before.columns, before.values)), dict(zip(after.columns, after.values))
+            for j in sorted(set(old_entries) | set(new_entries)):
+                if old_entries.get(j, 0.0) != new_entries.get(j, 0.0):
+                    coefficients.append((i, j, new_entries.get(j, 0.0)))
+
+    return ModelDelta(
+        rebuild=False,
+        sense=new.sense if new.sense != old.sense else None,
+        offset=new.c0 if new.c0 != old.c0 else None,
+        costs=costs, bounds=bounds, rhs=rhs, coefficients=coefficients,
+        removed_rows=sorted(unmatched_old.values()), added_rows=added,
+    )
+
+
+def is_feasible(model: LinearModel, x: np.ndarray, tol: float = FEASIBILITY_TOL) -> bool:
+    """Whether x satisfies every row, bound and integrality requirement of the model"""
+    if len(x) != len(model.variables):
+        return False
+    if np.any(x < model.lb - tol) or np.any(x > model.ub + tol):
+        return False
+    if model.A_ub.shape[0] and np.any(model.A_ub @ x > model.b_ub + tol):
+        return False
+    if model.A_eq.shape[0] and np.any(np.abs(model.A_eq @ x - model.b_eq) > tol):
+        return False
+    integer = model.integrality.astype(bool)
+    return not np.any(np.abs(x[integer] - np.round(x[integer])) > tol)
+
+
+def _only_tightens(delta: ModelDelta, old_rows: List[Row]) -> bool:
+    """The new rows define a subset of the old region and the objective did not change (bounds are checked apart)"""
+    if delta.rebuild or delta.sense or delta.costs or delta.coefficients or delta.removed_rows:
+        return False
+    return all(lower >= old_rows[i].lower and upper <= old_rows[i].upper for i, lower, upper in delta.rhs)
+
+
+class IncrementalModel:
+    """The last model of a chat, its row order and its last solution"""
+
+    def __init__(self, model: LinearModel, result: Optional[Dict[str, Any]] = None):
+        self.model = model
+        self.rows = model_rows(model)
+        self.result = result
+        self.delta: Optional[ModelDelta] = None
+        self._tightened = False
+        self._highs = None
+
+    def update(self, model: LinearModel) -> ModelDelta:
+        """Diff a new version of the model against the current one and apply the delta"""
+        rows = model_rows(model)
+        delta = diff_models(self.model, self.rows, model, rows)
+        tightened = _only_tightens(delta, self.rows) and self._bounds_tightened(model)
+        if self._highs is not None:
+            if delta.rebuild:
+                self._highs = None
+            else:
+                self._apply_to_highs(delta)
+        if delta.rebuild:
+            self.rows = rows
+        else:
+            removed = set(delta.removed_rows)
+            self.rows = [row for i, row in enumerate(self._current_rows(delta)) if i not in removed] + delta.added_rows
+        self.model, self.delta, self._tightened = model, delta, tightened
+        return delta
+
+    def _bounds_tightened(self, model: LinearModel) -> bool:
+        return bool(np.all(model.lb >= self.model.lb) and np.all(model.ub <= self.model.ub))
+
+    def _current_rows(self, delta: ModelDelta) -> List[Row]:
+        # Linhas antigas com os novos coeficientes/lados direitos (mesma ordem da instância HiGHS)
+        rows = list(self.rows)
+        for i, lower, upper in delta.rhs:
+            rows[i] = rows[i]._replace(lower=lower, upper=upper)
+        edits: Dict[int, Dict[int, float]] = {}
+        for i, j, value in delta.coefficients:
+            edits.setdefault(i, dict(zip(rows[i].columns, rows[i].values)))[j] = value
+        for i, entries in edits.items():
+            entries = {j: v for j, v in sorted(entries.items()) if v != 0.0}
+            rows[i] = rows[i]._replace(columns=tuple(entries), values=tuple(entries.values()))
+        return rows
+
+    def solve(self, cold_solve: Solver, time_limit: Optional[float] = None) -> Dict[str, Any]:
+        """Re-solve after update(); the result's 'incremental' entry tells how it was obtained"""
+        start = time.perf_counter()
+        if highspy is not None:
+            result, warm_start = self._solve_highs(time_limit), 'highs'
+        elif self._previous_still_optimal():
+            result, warm_start = self._reuse_previous(), 'previous_solution'
+        else:
+            result, warm_start = cold_solve(self.model), 'cold'
+        self.result = result
+        return dict(result, incremental={
+            'warm_start': warm_start,
+            'delta': self.delta.summary() if self.delta else None,
+            'resolve_time': time.perf_counter() - start,
+        })
+
+    def _previous_x(self) -> Optional[np.ndarray]:
+        if not self.result or not self.result.get('variables'):
+            return None
+        variables = self.result['variables']
+        if set(variables) != set(self.model.variables):
+            return None
+        return np.array([variables[name] for name in self.model.variables], dtype=float)
+
+    def _previous_still_optimal(self) -> bool:
+        if self.delta is None or not self.result or self.result.get('status') != 'optimal':
+            return False
+        x = self._previous_x()
+        if x is None:
+            return False
+        # Mesmo modelo, ou região menor que ainda contém o ótimo anterior: o ótimo não muda
+        return (self.delta.is_empty or self._tightened) and is_feasible(self.model, x)
+
+    def _reuse_previous(self) -> Dict[str, Any]:
+        x = self._previous_x()
+        objective = float(self.model.c @ x + self.model.c0)
+        result = dict(self.result, objective_value=objective,
+                      message='Previous solution is still optimal for the edited model', solve_time=0.0)
+        if self.result.get('solver_objective') is not None:
+            # Custos iguais: só a constante do objetivo pode ter mudado
+            result['solver_objective'] = self.result['solver_objective'] + objective - self.result['objective_value']
+        return result
+
+    # --- Backend HiGHS persistente (highspy) ---
+
+    def _solve_highs(self, time_limit: Optional[float]) -> Dict[str, Any]:
+        h = self._highs
+        previous = self._previous_x()
+        if h is None:
+            h = self._highs = self._build_highs()
+        if previous is not None and self.model.is_mip:
+            solution = highspy.HighsSolution()
+            solution.col_value = previous.tolist()
+            h.setSolution(solution)
+        h.setOptionValue('time_limit', float(time_limit) if time_limit else highspy.kHighsInf)
+        start = time.perf_counter()
+        h.run()
+        elapsed = time.perf_counter() - start
+        status = {
+            highspy.HighsModelStatus.kOptimal: 'optimal',
+            highspy.HighsModelStatus.kInfeasible: 'infeasible',
+            highspy.HighsModelStatus.kUnbounded: 'unbounded',
+            highspy.HighsModelStatus.kUnboundedOrInfeasible: 'infeasible',
+            highspy.HighsModelStatus.kTimeLimit: 'limit',
+        }.get(h.getModelStatus(), 'error')
+        result = {'status': status, 'message': h.modelStatusToString(h.getModelStatus()), 'solver': 'highspy',
+                  'solve_time': elapsed, 'objective_value': None, 'variables': {}}
+        if status in ('optimal', 'limit') and h.getSolution().value_valid:
+            x = np.array(h.getSolution().col_value)
+            x = np.where(self.model.integrality.astype(bool), np.round(x), x)
+            result['objective_value'] = float(self.model.c @ x + self.model.c0)
+            result['solver_objective'] = float(h.getInfo().objective_function_value)
+            result['variables'] = dict(zip(self.model.variables, x.tolist()))
+        return result
+
+    def _build_highs(self):
+        model = self.model
+        h = highspy.Highs()
+        h.setOptionValue('output_flag', False)
+        lp = highspy.HighsLp()
+        lp.num_col_ = len(model.variables)
+        lp.num_row_ = len(self.rows)
+        lp.col_cost_ = model.c
+        lp.col_lower_ = model.lb
+        lp.col_upper_ = model.ub
+        lp.offset_ = model.c0
+        lp.row_lower_ = np.array([row.lower for row in self.rows])
+        lp.row_upper_ = np.array([row.upper for row in self.rows])
+        lp.a_matrix_.format_ = highspy.MatrixFormat.kRowwise
+        lp.a_matrix_.num_col_ = lp.num_col_
+        lp.a_matrix_.num_row_ = lp.num_row_
+        lp.a_matrix_.start_ = np.cumsum([0] + [len(row.columns) for row in self.rows])
+        lp.a_matrix_.index_ = np.array([j for row in self.rows for j in row.columns], dtype=np.int32)
+        lp.a_matrix_.value_ = np.array([v for row in self.rows for v in row.values], dtype=float)
+        lp.sense_ = highspy.ObjSense.kMaximize if model.sense == 'maximize' else highspy.ObjSense.kMinimize
+        if model.is_mip:
+            lp.integrality_ = [highspy.HighsVarType.kInteger if flag else highspy.HighsVarType.kContinuous
+                               for flag in model.integrality]
+        h.passModel(lp)
+        return h
+
+    def _apply_to_highs(self, delta: ModelDelta):
+        h = self._highs
+        if delta.sense:
+            h.changeObjectiveSense(highspy.ObjSense.kMaximize if delta.sense == 'maximize'
+                                   else highspy.ObjSense.kMinimize)
+        if delta.offset is not None:
+            h.changeObjectiveOffset(delta.offset)
+        if delta.costs:
+            index, cost = zip(*delta.costs)
+            h.changeColsCost(len(index), np.array(index, dtype=np.int32), np.array(cost))
+        if delta.bounds:
+            index, lower, upper = zip(*delta.bounds)
+            h.changeColsBounds(len(index), np.array(index, dtype=np.int32), np.array(lower), np.array(upper))
+        if delta.rhs:
+            index, lower, upper = zip(*delta.rhs)
+            h.changeRowsBounds(len(index), np.array(index, dtype=np.int32), np.array(lower), np.array(upper))
+        for i, j, value in delta.coefficients:
+            h.changeCoeff(i, j, value)
+        if delta.removed_rows:
+            h.deleteRows(len(delta.removed_rows), np.array(delta.removed_rows, dtype=np.int32))
+        if delta.added_rows:
+            rows = delta.added_rows
+            h.addRows(len(rows), np.array([row.lower for row in rows]), np.array([row.upper for row in rows]),
+                      sum(len(row.columns) for row in rows),
+                      np.cumsum([0] + [len(row.columns) for row in rows[:-1]]).astype(np.int32),
+                      np.array([j for row in rows for j in row.columns], dtype=np.int32),
+                      np.array([v for row in rows for v in row.values], dtype=float))
+
+
+class SessionStore:
+    """Incremental models of recent jobs (LRU), shared by the stages of a worker process"""
+
+    def __init__(self, max_sessions: int = MAX_SESSIONS):
+        self.max_sessions = max_sessions
+        self._sessions: 'OrderedDict[str, IncrementalModel]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def resolve(self, key: str, model: LinearModel, cold_solve: Solver, previous_key: Optional[str] = None,
+                restore: Optional[Callable[[], Optional[Tuple[LinearModel, Dict[str, Any]]]]] = None,
+                time_limit: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Solve a model as an edit of the previous job's model when possible
+
+        Args:
+            key: Job id the session is saved under
+            model: New compiled model
+            cold_solve: Solves a model from scratch (first solve, or when no warm start applies)
+            previous_key: Job id of the previous version of this model
+            restore: Rebuilds (model, result) of previous_key when this process has no session for it
+        """
+        with self._lock:
+            session = self._sessions.pop(previous_key, None) if previous_key else None
+        if session is None and previous_key and restore is not None:
+            previous = restore()
+            if previous is not None:
+                session = IncrementalModel(*previous)
+        if session is None:
+            # Primeiro solve sempre pelo cold_solve (portfólio, ranking e registro das corridas);
+            # a instância HiGHS só é montada quando chega o primeiro delta
+            session = IncrementalModel(model)
+            result = cold_solve(model)
+            session.result = result
+        else:
+            session.update(model)
+            result = session.solve(cold_solve, time_limit)
+        with self._lock:
+            self._sessions[key] = session
+            self._sessions.move_to_end(key)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return result
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._sessions
+
+
+sessions = SessionStore()
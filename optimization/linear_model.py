@@ -0,0 +1,393 @@
+"""
+Linear Model Builder for OptiMind
+Compiles the problem JSON (objective, decision_variables, constraints, sets, parameters, data)
+into sparse matrices and solves LP/MIP models directly with SciPy's HiGHS interface
+
+Indexed models declare sets and parameters and index variables by sets; constraints with
+`for_all: "i in I"` expand into one row per element, built with vectorized NumPy operations.
+"""
+
+import ast
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+from scipy.optimize import Bounds, LinearConstraint, linprog, milp
+
+from optimization.columnar import ArrayLoader, load_parameter, load_set
+from optimization.expressions import Expr, ExpressionCompiler, ModelError
+
+__all__ = ['ModelError', 'LinearModel', 'compile_problem', 'is_linear_problem', 'solve', 'solve_problem']
+
+
+class VariableBlock(NamedTuple):
+    """A (possibly indexed) decision variable occupying columns offset .. offset + size"""
+    offset: int
+    shape: Tuple[int, ...]
+    sets: Tuple[str, ...]
+
+    @property
+    def size(self) -> int:
+        return int(np.prod(self.shape, dtype=np.int64))
+
+
+class LinearModel(NamedTuple):
+    """Sparse LP/MIP: optimize c·x + c0  s.t.  A_ub x <= b_ub,  A_eq x = b_eq,  lb <= x <= ub"""
+    variables: Tuple[str, ...]
+    sense: str
+    c: np.ndarray
+    c0: float
+    A_ub: sparse.csr_array
+    b_ub: np.ndarray
+    ub_names: Tuple[str, ...]
+    A_eq: sparse.csr_array
+    b_eq: np.ndarray
+    eq_names: Tuple[str, ...]
+    lb: np.ndarray
+    ub: np.ndarray
+    integrality: np.ndarray
+    blocks: Optional[Dict[str, VariableBlock]] = None
+    # +1 para linhas escritas como '<=', -1 para '>=' (guardadas negadas em A_ub)
+    ub_signs: Optional[np.ndarray] = None
+
+    @property
+    def is_mip(self) -> bool:
+        return bool(self.integrality.any())
+
+    def summary(self) -> Dict[str, Any]:
+        """Size of the model, JSON-serializable"""
+        return {
+            'type': 'MIP' if self.is_mip else 'LP',
+            'sense': self.sense,
+            'variables': len(self.variables),
+            'integer_variables': int(self.integrality.sum()),
+            'inequalities': int(self.A_ub.shape[0]),
+            'equalities': int(self.A_eq.shape[0]),
+            'nonzeros': int(self.A_ub.nnz + self.A_eq.nnz),
+        }
+
+
+# Operadores aceitos nas restrições; < e > são tratados como <= e >= (modelos contínuos)
+_COMPARE = {ast.LtE: '<=', ast.Lt: '<=', ast.GtE: '>=', ast.Gt: '>=', ast.Eq: '=='}
+
+
+def _labels(elements_by_axis: List[np.ndarray]) -> List[str]:
+    """'A,1'-style labels for every combination of the given set elements (C order)"""
+    if not elements_by_axis:
+        return ['']
+    grids = np.meshgrid(*[e.astype(str) for e in elements_by_axis], indexing='ij')
+    flat = [g.ravel() for g in grids]
+    labels = flat[0]
+    for column in flat[1:]:
+        labels = np.char.add(np.char.add(labels, ','), column)
+    return labels.tolist()
+
+
+class _ProblemCompiler:
+    """Builds the column layout, bounds and sparse rows of a problem"""
+
+    def __init__(self, problem: Dict[str, Any], arrays: Optional[ArrayLoader]):
+        self.problem = problem
+        self.arrays = arrays
+        try:
+            self.sets = {name: load_set(spec, arrays) for name, spec in (problem.get('sets') or {}).items()}
+        except (ValueError, KeyError) as e:
+            raise ModelError(f"Invalid set: {e}") from None
+        self.parameters = problem.get('parameters') or {}
+        self.data = problem.get('data') or {}
+        self._parameter_cache: Dict[str, Tuple[np.ndarray, Tuple[str, ...]]] = {}
+
+        decision = problem.get('decision_variables') or {}
+        if not decision:
+            raise ModelError('Problem has no decision variables')
+        self.blocks: Dict[str, VariableBlock] = {}
+        offset = 0
+        for name, spec in decision.items():
+            index_sets = tuple(spec.get('index') or ())
+            for set_name in index_sets:
+                if set_name not in self.sets:
+                    raise ModelError(f"Variable '{name}' is indexed by unknown set '{set_name}'")
+            shape = tuple(len(self.sets[s]) for s in index_sets)
+            self.blocks[name] = VariableBlock(offset, shape, index_sets)
+            offset += self.blocks[name].size
+        self.n = offset
+
+        auxiliary = {}
+        for name, spec in (problem.get('auxiliary_variables') or {}).items():
+            if not spec.get('equation'):
+                raise ModelError(f"Auxiliary variable '{name}' has no equation")
+            auxiliary[name] = spec['equation']
+        self.expressions = ExpressionCompiler(self.sets, {n: b.sets for n, b in self.blocks.items()},
+                                              self._parameter, auxiliary)
+
+    def _parameter(self, name: str):
+        if name in self.parameters:
+            if name not in self._parameter_cache:
+                spec = self.parameters[name]
+                index_sets = tuple(spec.get('index') or ())
+                for set_name in index_sets:
+                    if set_name not in self.sets:
+                        raise ModelError(f"Parameter '{name}' is indexed by unknown set '{set_name}'")
+                shape = tuple(len(self.sets[s]) for s in index_sets)
+                positions = [lambda key, s=s: self.expressions.position(s, key) for s in index_sets]
+                try:
+                    values = load_parameter(spec, shape, positions, self.arrays)
+                except (ValueError, TypeError, KeyError) as e:
+                    raise ModelError(f"Invalid parameter '{name}': {e}") from None
+                self._parameter_cache[name] = (values, index_sets)
+            return self._parameter_cache[name]
+        if name in self.data:
+            return self.data[name], None
+        return None
+
+    def variable_names(self) -> List[str]:
+        names: List[str] = []
+        for name, block in self.blocks.items():
+            if block.sets:
+                names.extend(f'{name}[{label}]' for label in _labels([self.sets[s] for s in block.sets]))
+            else:
+                names.append(name)
+        return names
+
+    def bounds(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        lb, ub, integrality = np.empty(self.n), np.empty(self.n), np.zeros(self.n, dtype=np.uint8)
+        decision = self.problem['decision_variables']
+        for name, block in self.blocks.items():
+            spec = decision[name]
+            var_type = spec.get('type', 'Real')
+            columns = slice(block.offset, block.offset + block.size)
+            bounds = spec.get('bounds') or [None, None]
+            lb[columns] = self._bound(name, block, bounds[0], -np.inf)
+            ub[columns] = self._bound(name, block, bounds[1], np.inf)
+            if var_type == 'Binary':
+                lb[columns] = np.maximum(lb[columns], 0.0)
+                ub[columns] = np.minimum(ub[columns], 1.0)
+            integrality[columns] = var_type in ('Integer', 'Binary')
+        return lb, ub, integrality
+
+    def _bound(self, name: str, block: VariableBlock, value: Any, default: float) -> np.ndarray:
+        """A bound is a number, null, or the name of a parameter indexed like the variable"""
+        if value is None:
+            return np.full(block.size, default)
+        if isinstance(value, str):
+            resolved = self._parameter(value)
+            if resolved is None or resolved[1] != block.sets:
+                raise ModelError(f"Bound '{value}' of '{name}' must be a parameter indexed by {list(block.sets)}")
+            return np.asarray(resolved[0], dtype=float).ravel()
+        return np.full(block.size, float(value))
+
+    def linear_rows(self, expr: Expr, domain_axes: Tuple[str, ...]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """COO entries (rows, cols, values) and constants of an expression, one row per domain element"""
+        expr = self.expressions.align(expr, domain_axes)
+        sizes = self.expressions.sizes
+        free_shape = tuple(sizes[ax] for ax in domain_axes)
+        rows, cols, vals = [], [], []
+        for term in expr.terms:
+            block = self.blocks[term.var]
+            shape = term.coef.shape
+            grids = [np.arange(sizes[ax]).reshape([-1 if k == i else 1 for k in range(len(shape))])
+                     for i, ax in enumerate(term.axes)]
+            if domain_axes:
+                row = np.ravel_multi_index(np.broadcast_arrays(*grids[:len(domain_axes)]), free_shape)
+            else:
+                row = np.zeros((), dtype=np.int64)
+            if block.sets:
+                index = [grids[term.axes.index(ax)] if isinstance(ax, str) else np.asarray(ax)
+                         for ax in term.index]
+                col = block.offset + np.ravel_multi_index(np.broadcast_arrays(*index), block.shape)
+            else:
+                col = np.asarray(block.offset)
+            row, col, val = np.broadcast_arrays(row, col, term.coef)
+            mask = val != 0
+            rows.append(row[mask])
+            cols.append(col[mask])
+            vals.append(val[mask])
+        empty = np.zeros(0)
+        return (np.concatenate(rows) if rows else empty.astype(np.int64),
+                np.concatenate(cols) if cols else empty.astype(np.int64),
+                np.concatenate(vals) if vals else empty,
+                np.asarray(expr.const, dtype=float).ravel() if domain_axes else np.asarray(expr.const, dtype=float).reshape(1))
+
+
+class _RowBuffer:
+    """Accumulates constraint rows as COO blocks"""
+
+    def __init__(self):
+        self.rows: List[np.ndarray] = []
+        self.cols: List[np.ndarray] = []
+        self.vals: List[np.ndarray] = []
+        self.rhs: List[np.ndarray] = []
+        self.names: List[str] = []
+        self.signs: List[np.ndarray] = []
+        self.count = 0
+
+    def add(self, rows, cols, vals, rhs, names: List[str], sign: float = 1.0):
+        self.rows.append(rows + self.count)
+        self.cols.append(cols)
+        self.vals.append(sign * vals)
+        self.rhs.append(sign * rhs)
+        self.names.extend(names)
+        self.signs.append(np.full(len(rhs), sign))
+        self.count += len(rhs)
+
+    def matrix(self, n: int) -> Tuple[sparse.csr_array, np.ndarray]:
+        if not self.count:
+            return sparse.csr_array((0, n)), np.zeros(0)
+        coo = sparse.coo_array((np.concatenate(self.vals), (np.concatenate(self.rows), np.concatenate(self.cols))),
+                               shape=(self.count, n))
+        return coo.tocsr(), np.concatenate(self.rhs)
+
+
+def compile_problem(problem: Dict[str, Any], arrays: Optional[ArrayLoader] = None) -> LinearModel:
+    """
+    Compile a problem JSON into a sparse linear model
+
+    Variables without bounds are free (as in Pyomo); Binary variables are bounded to [0, 1].
+    Single-variable scalar constraints of type 'bound' tighten the variable bounds instead of adding rows.
+
+    Args:
+        problem: Problem JSON (problem_schema.json)
+        arrays: Loads arrays referenced as {"$array": hash} (defaults to utils.db.get_array)
+
+    Raises:
+        ModelError: If the objective or a constraint is not linear, or references unknown names
+    """
+    compiler = _ProblemCompiler(problem, arrays)
+    expressions = compiler.expressions
+    n = compiler.n
+    lb, ub, integrality = compiler.bounds()
+
+    sense = problem.get('sense', 'minimize')
+    if sense not in ('minimize', 'maximize'):
+        raise ModelError(f"Unknown sense '{sense}'")
+    objective = expressions.eval(expressions.parse(problem.get('objective', '')))
+    if objective.axes:
+        raise ModelError("Objective has free indices; wrap indexed terms in sum(... for i in I)")
+    _, obj_cols, obj_vals, obj_const = compiler.linear_rows(objective, ())
+    c = np.zeros(n)
+    np.add.at(c, obj_cols, obj_vals)
+
+    inequalities, equalities = _RowBuffer(), _RowBuffer()
+    for i, constraint in enumerate(problem.get('constraints') or []):
+        text = constraint.get('expression', '')
+        node = expressions.parse(text)
+        if not isinstance(node, ast.Compare):
+            raise ModelError(f"Constraint '{text}' has no comparison")
+        name = constraint.get('name') or f'c{i + 1}'
+        domain = expressions.parse_domain(constraint['for_all']) if constraint.get('for_all') else []
+        bound = []
+        try:
+            for index, set_name in domain:
+                bound.append((index, expressions.bind(index, set_name)))
+            operands = [expressions.eval(operand) for operand in [node.left] + node.comparators]
+        finally:
+            for index, _ in bound:
+                expressions.unbind(index)
+        domain_axes = tuple(axis for _, axis in bound)
+        labels = _labels([compiler.sets[set_name] for _, set_name in domain])
+
+        for k, op in enumerate(node.ops):
+            if type(op) not in _COMPARE:
+                raise ModelError(f"Unsupported comparison in '{text}'")
+            relation = _COMPARE[type(op)]
+            expr = expressions.add(operands[k], operands[k + 1], -1.0)  # lhs - rhs (op) 0
+            stray = [ax for ax in expr.axes if ax not in domain_axes]
+            if stray:
+                raise ModelError(f"Constraint '{text}' uses indices outside its for_all domain")
+            rows, cols, vals, const = compiler.linear_rows(expr, domain_axes)
+            row_name = name if len(node.ops) == 1 else f'{name}_{k + 1}'
+            names = [f'{row_name}[{label}]' for label in labels] if domain else [row_name]
+            if constraint.get('type') == 'bound' and not domain and len(vals) == 1:
+                j, a, value = int(cols[0]), float(vals[0]), -float(const[0]) / float(vals[0])
+                if relation == '==':
+                    lb[j], ub[j] = max(lb[j], value), min(ub[j], value)
+                elif (relation == '<=') == (a > 0):
+                    ub[j] = min(ub[j], value)
+                else:
+                    lb[j] = max(lb[j], value)
+            elif relation == '==':
+                equalities.add(rows, cols, vals, -const, names)
+            else:
+                inequalities.add(rows, cols, vals, -const, names, 1.0 if relation == '<=' else -1.0)
+
+    A_ub, b_ub = inequalities.matrix(n)
+    A_eq, b_eq = equalities.matrix(n)
+    return LinearModel(
+        variables=tuple(compiler.variable_names()), sense=sense, c=c, c0=float(obj_const[0]),
+        A_ub=A_ub, b_ub=b_ub, ub_names=tuple(inequalities.names),
+        A_eq=A_eq, b_eq=b_eq, eq_names=tuple(equalities.names),
+        lb=lb, ub=ub, integrality=integrality, blocks=compiler.blocks,
+        ub_signs=np.concatenate(inequalities.signs) if inequalities.signs else np.zeros(0),
+    )
+
+
+def is_linear_problem(problem: Dict[str, Any], arrays: Optional[ArrayLoader] = None) -> bool:
+    """Whether the problem can be compiled and solved directly"""
+    try:
+        compile_problem(problem, arrays)
+        return True
+    except ModelError:
+        return False
+
+
+# Códigos de status de linprog/milp (HiGHS)
+_STATUS = {0: 'optimal', 1: 'limit', 2: 'infeasible', 3: 'unbounded', 4: 'error'}
+
+
+def solve(model: LinearModel, time_limit: Optional[float] = None, method: str = 'highs',
+          sensitivity: bool = True) -> Dict[str, Any]:
+    """
+    Solve a compiled model with HiGHS (linprog for LP, milp for MIP)
+
+    method selects the linprog algorithm for LPs ('highs', 'highs-ds' or 'highs-ipm'). Optimal LP
+    results also carry a 'sensitivity' report (optimization/sensitivity.py) unless disabled.
+
+    Returns:
+        JSON-serializable result with status, objective_value (recomputed from the variables),
+        solver_objective (as reported by HiGHS), variables, solver and solve_time
+    """
+    sign = -1.0 if model.sense == 'maximize' else 1.0
+    options = {'time_limit': time_limit} if time_limit else {}
+    start = time.perf_counter()
+    if model.is_mip:
+        constraints = []
+        if model.A_ub.shape[0]:
+            constraints.append(LinearConstraint(model.A_ub, -np.inf, model.b_ub))
+        if model.A_eq.shape[0]:
+            constraints.append(LinearConstraint(model.A_eq, model.b_eq, model.b_eq))
+        res = milp(sign * model.c, constraints=constraints, integrality=model.integrality,
+                   bounds=Bounds(model.lb, model.ub), options=options)
+    else:
+        res = linprog(sign * model.c,
+                      A_ub=model.A_ub if model.A_ub.shape[0] else None, b_ub=model.b_ub if model.A_ub.shape[0] else None,
+                      A_eq=model.A_eq if model.A_eq.shape[0] else None, b_eq=model.b_eq if model.A_eq.shape[0] else None,
+                      bounds=np.column_stack((model.lb, model.ub)), method=method, options=options)
+    elapsed = time.perf_counter() - start
+
+    result = {
+        'status': _STATUS.get(res.status, 'error'),
+        'message': res.message,
+        'solver': 'highs-milp' if model.is_mip else f'{method}-linprog',
+        'solve_time': elapsed,
+        'objective_value': None,
+        'variables': {},
+    }
+    if res.x is not None:
+        x = np.where(model.integrality.astype(bool), np.round(res.x), res.x)
+        result['objective_value'] = float(model.c @ x + model.c0)
+        result['variables'] = dict(zip(model.variables, x.tolist()))
+    if res.x is not None and res.fun is not None:
+        # O HiGHS minimiza sign * c (sem a constante): volta para o objetivo do problema
+        result['solver_objective'] = float(sign * res.fun + model.c0)
+    if sensitivity and result['status'] == 'optimal' and not model.is_mip:
+        from optimization.sensitivity import from_linprog
+        result['sensitivity'] = from_linprog(model, res)
+    return result
+
+
+def solve_problem(problem: Dict[str, Any], time_limit: Optional[float] = None,
+                  arrays: Optional[ArrayLoader] = None) -> Dict[str, Any]:
+    """Compile and solve a problem JSON; includes the model summary in the result"""
+    model = compile_problem(problem, arrays)
+    return dict(solve(model, time_limit), model=model.summary())
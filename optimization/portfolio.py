@@ -0,0 +1,272 @@
+"""
+Solver Portfolio for OptiMind
+Races a compiled model on every locally available solver and keeps the first proven result
+
+Solve times of the same MIP vary widely between solvers, so the Executor can launch the model on
+several solvers in parallel processes (race), take the first proven-optimal (or infeasible/unbounded)
+answer and kill the others. Each race is recorded per problem_type in the solver_stats table, and
+single-solver runs (solve_with_best) start with the historically fastest solver.
+
+SciPy's HiGHS is always available; CBC, GLPK and HiGHS (highspy) join through Pyomo when installed.
+"""
+
+import contextlib
+import json
+import multiprocessing
+import os
+import signal
+import time
+from multiprocessing.connection import wait
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from optimization.linear_model import LinearModel, solve
+
+SOLVER_MODE = os.getenv('OPTIMIND_SOLVER_MODE', 'single')
+MAX_PARALLEL = int(os.getenv('OPTIMIND_SOLVER_PARALLEL', str(max(2, min(4, os.cpu_count() or 2)))))
+# Folga após o time limit para os solvers devolverem a melhor solução encontrada
+DEADLINE_GRACE = 5.0
+# Time limit dos solves do pipeline: abaixo do timeout da etapa Executor (flows/optimind_flow.toml),
+# para a corrida devolver a melhor solução antes de a etapa ser abandonada
+TIME_LIMIT = float(os.getenv('OPTIMIND_SOLVER_TIME_LIMIT', '240'))
+
+# Status que encerram a corrida: o solver provou o resultado
+PROVEN = ('optimal', 'infeasible', 'unbounded')
+
+# Solvers externos via Pyomo e a opção de time limit de cada um
+_PYOMO_TIME_OPTION = {'cbc': 'sec', 'glpk': 'tmlim', 'appsi_highs': 'time_limit'}
+
+
+def _scipy_solver(method: str) -> Callable[[LinearModel, Optional[float]], Dict[str, Any]]:
+    def run(model: LinearModel, time_limit: Optional[float]) -> Dict[str, Any]:
+        return solve(model, time_limit, method=method)
+    return run
+
+
+def _pyomo_solver(name: str) -> Callable[[LinearModel, Optional[float]], Dict[str, Any]]:
+    def run(model: LinearModel, time_limit: Optional[float]) -> Dict[str, Any]:
+        return _solve_with_pyomo(name, model, time_limit)
+    return run
+
+
+def _solve_with_pyomo(name: str, model: LinearModel, time_limit: Optional[float]) -> Dict[str, Any]:
+    """Rebuild the sparse model as a Pyomo ConcreteModel and solve it with an external solver"""
+    import pyomo.environ as pyo
+    from pyomo.opt import TerminationCondition
+
+    n = len(model.variables)
+    m = pyo.ConcreteModel()
+    m.x = pyo.Var(range(n))
+    for j in range(n):
+        m.x[j].setlb(None if np.isinf(model.lb[j]) else float(model.lb[j]))
+        m.x[j].setub(None if np.isinf(model.ub[j]) else float(model.ub[j]))
+        if model.integrality[j]:
+            m.x[j].domain = pyo.Integers
+
+    def row(A, i):
+        start, end = A.indptr[i], A.indptr[i + 1]
+        return pyo.quicksum(float(A.data[k]) * m.x[int(A.indices[k])] for k in range(start, end))
+
+    def ub_rule(m, i):
+        return row(model.A_ub, i) <= float(model.b_ub[i]) if model.A_ub.indptr[i + 1] > model.A_ub.indptr[i] \
+            else pyo.Constraint.Skip
+
+    def eq_rule(m, i):
+        return row(model.A_eq, i) == float(model.b_eq[i]) if model.A_eq.indptr[i + 1] > model.A_eq.indptr[i] \
+            else pyo.Constraint.Skip
+
+    m.ub_rows = pyo.Constraint(range(model.A_ub.shape[0]), rule=ub_rule)
+    m.eq_rows = pyo.Constraint(range(model.A_eq.shape[0]), rule=eq_rule)
+    m.obj = pyo.Objective(expr=pyo.quicksum(float(c) * m.x[j] for j, c in enumerate(model.c) if c) + model.c0,
+                          sense=pyo.maximize if model.sense == 'maximize' else pyo.minimize)
+
+    solver = pyo.SolverFactory(name)
+    if time_limit:
+        solver.options[_PYOMO_TIME_OPTION[name]] = time_limit
+    start = time.perf_counter()
+    results = solver.solve(m, load_solutions=False)
+    elapsed = time.perf_counter() - start
+
+    condition = results.solver.termination_condition
+    status = {
+        TerminationCondition.optimal: 'optimal',
+        TerminationCondition.infeasible: 'infeasible',
+        TerminationCondition.unbounded: 'unbounded',
+        TerminationCondition.maxTimeLimit: 'limit',
+    }.get(condition, 'error')
+    result = {'status': status, 'message': str(condition), 'solver': name, 'solve_time': elapsed,
+              'objective_value': None, 'variables': {}}
+    if len(results.solution) and status in ('optimal', 'limit'):
+        m.solutions.load_from(results)
+        x = np.array([pyo.value(m.x[j], exception=False) or 0.0 for j in range(n)])
+        x = np.where(model.integrality.astype(bool), np.round(x), x)
+        result['objective_value'] = float(model.c @ x + model.c0)
+        result['variables'] = dict(zip(model.variables, x.tolist()))
+        # Objetivo informado pelo solver: o limite primal (superior ao minimizar, inferior ao maximizar)
+        reported = results.problem.lower_bound if model.sense == 'maximize' else results.problem.upper_bound
+        with contextlib.suppress(TypeError, ValueError):
+            if np.isfinite(float(reported)):
+                result['solver_objective'] = float(reported)
+    return result
+
+
+# Ordem padrão quando não há histórico; variantes LP-only são ignoradas em MIPs
+SOLVERS: Dict[str, Callable[[LinearModel, Optional[float]], Dict[str, Any]]] = {
+    'highs': _scipy_solver('highs'),
+    'highs-ds': _scipy_solver('highs-ds'),
+    'highs-ipm': _scipy_solver('highs-ipm'),
+    'appsi_highs': _pyomo_solver('appsi_highs'),
+    'cbc': _pyomo_solver('cbc'),
+    'glpk': _pyomo_solver('glpk'),
+}
+LP_ONLY = ('highs-ds', 'highs-ipm')
+
+
+def available_solvers(model: LinearModel) -> List[str]:
+    """Solvers that can run this model here, in default order"""
+    names = []
+    for name in SOLVERS:
+        if model.is_mip and name in LP_ONLY:
+            continue
+        if name in _PYOMO_TIME_OPTION and not _pyomo_available(name):
+            continue
+        names.append(name)
+    return names
+
+
+_availability: Dict[str, bool] = {}
+
+
+def _pyomo_available(name: str) -> bool:
+    if name not in _availability:
+        try:
+            import pyomo.environ as pyo
+            _availability[name] = bool(pyo.SolverFactory(name).available(exception_flag=False))
+        except Exception:
+            _availability[name] = False
+    return _availability[name]
+
+
+def rank_solvers(model: LinearModel, problem_type: Optional[str] = None) -> List[str]:
+    """Available solvers, historically best first for this problem type"""
+    names = available_solvers(model)
+    if not problem_type:
+        return names
+    from utils import db
+    history = [row['solver'] for row in db.solver_ranking(problem_type) if row['wins']]
+    return sorted(names, key=lambda name: history.index(name) if name in history else len(history))
+
+
+def solve_with_best(model: LinearModel, problem_type: Optional[str] = None,
+                    time_limit: Optional[float] = None) -> Dict[str, Any]:
+    """Solve with the historically fastest available solver for this problem type"""
+    name = rank_solvers(model, problem_type)[0]
+    return dict(SOLVERS[name](model, time_limit), solver=name)
+
+
+def _entrant(connection, name: str, model: LinearModel, time_limit: Optional[float]):
+    # Grupo de processos próprio: cancelar a corrida também mata os executáveis dos solvers
+    if hasattr(os, 'setsid'):
+        os.setsid()
+    try:
+        result = dict(SOLVERS[name](model, time_limit), solver=name)
+    except Exception as e:
+        result = {'status': 'error', 'message': f"{type(e).__name__}: {e}", 'solver': name,
+                  'solve_time': 0.0, 'objective_value': None, 'variables': {}}
+    connection.send_bytes(json.dumps(result).encode('utf-8'))
+    connection.close()
+
+
+def _cancel(process):
+    if not process.is_alive():
+        return
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (AttributeError, ProcessLookupError, PermissionError):
+        process.kill()
+
+
+def _best_incumbent(model: LinearModel, results: Dict[str, Dict[str, Any]]) -> Optional[str]:
+    candidates = [name for name, result in results.items() if result.get('objective_value') is not None]
+    if not candidates:
+        return None
+    pick = max if model.sense == 'maximize' else min
+    return pick(candidates, key=lambda name: results[name]['objective_value'])
+
+
+def race(model: LinearModel, problem_type: Optional[str] = None, solvers: Optional[List[str]] = None,
+         time_limit: Optional[float] = None, max_parallel: int = MAX_PARALLEL, record: bool = True) -> Dict[str, Any]:
+    """
+    Solve the model on several solvers in parallel processes and keep the first proven result
+
+    Args:
+        model: Compiled model
+        problem_type: Key of the win history (e.g. 'LP', 'MIP'); the best solvers get the slots first
+        solvers: Entrants (defaults to every available solver); unavailable ones are dropped
+        time_limit: Per-solver time limit; at the deadline the best incumbent found is returned
+        max_parallel: Maximum number of solver processes
+        record: Save the outcome in the solver_stats table
+
+    Returns:
+        The winning solver's result, with a 'portfolio' entry describing the race
+    """
+    available = rank_solvers(model, problem_type)
+    entrants = [name for name in solvers if name in available] if solvers else available
+    entrants = entrants[:max(1, max_parallel)]
+    context = multiprocessing.get_context('spawn')
+    pending, processes = {}, []
+    for name in entrants:
+        receiver, sender = context.Pipe(duplex=False)
+        process = context.Process(target=_entrant, args=(sender, name, model, time_limit), daemon=True,
+                                  name=f'optimind-solver-{name}')
+        process.start()
+        sender.close()
+        pending[receiver] = name
+        processes.append(process)
+
+    deadline = time.monotonic() + time_limit + DEADLINE_GRACE if time_limit else None
+    results: Dict[str, Dict[str, Any]] = {}
+    winner = None
+    try:
+        while pending and winner is None:
+            timeout = None if deadline is None else deadline - time.monotonic()
+            if timeout is not None and timeout <= 0:
+                break
+            for connection in wait(list(pending), timeout):
+                name = pending.pop(connection)
+                try:
+                    results[name] = json.loads(connection.recv_bytes())
+                except (EOFError, OSError):
+                    results[name] = {'status': 'error', 'message': 'Solver process exited', 'solver': name,
+                                     'solve_time': 0.0, 'objective_value': None, 'variables': {}}
+                connection.close()
+                if results[name]['status'] in PROVEN:
+                    winner = name
+                    break
+    finally:
+        for process in processes:
+            _cancel(process)
+            process.join(timeout=1)
+        for connection in pending:
+            connection.close()
+
+    if record and problem_type:
+        from utils import db
+        db.record_solver_race(problem_type, entrants, winner,
+                              results[winner]['solve_time'] if winner else 0.0)
+
+    chosen = winner or _best_incumbent(model, results)
+    if chosen:
+        result = dict(results[chosen])
+    else:
+        errors = '; '.join(f"{name}: {r.get('message')}" for name, r in results.items())
+        result = {'status': 'limit' if len(results) < len(entrants) else 'error',
+                  'message': errors or 'No solver finished before the deadline', 'solver': None,
+                  'solve_time': 0.0, 'objective_value': None, 'variables': {}}
+    result['portfolio'] = {
+        'entrants': entrants,
+        'winner': winner,
+        'results': {name: {'status': r['status'], 'solve_time': r['solve_time']} for name, r in results.items()},
+    }
+    return result
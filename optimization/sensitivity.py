@@ -0,0 +1,228 @@
+"""
+Sensitivity Analysis for OptiMind
+Shadow prices, reduced costs, slacks and ranging of an LP optimum, without re-solving
+
+Duals and reduced costs come straight from the solver result (HiGHS marginals). When a result has
+none (cached or incremental solutions), they are recovered from the optimal basis, identified from
+the solution itself. Ranging uses the same basis: one dense factorization gives the interval of each
+right-hand side over which its shadow price holds, and of each cost over which the solution stays
+optimal. Values are reported in the problem's own terms: duals are d(objective)/d(rhs) for the
+objective sense and constraint direction as written.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from optimization.linear_model import LinearModel
+
+# Ranging fatora a base densa; acima disso (linhas x colunas) só duais, custos reduzidos e folgas
+RANGING_MAX_ENTRIES = 4_000_000
+TOLERANCE = 1e-9
+
+
+def _number(value: float) -> Optional[float]:
+    return float(value) if np.isfinite(value) else None
+
+
+def _standard_form(model: LinearModel, x: np.ndarray):
+    """[A_ub I; A_eq 0] over (x, slacks), its bounds and the point (x, b_ub - A_ub x)"""
+    m_ub, m_eq = model.A_ub.shape[0], model.A_eq.shape[0]
+    M = np.zeros((m_ub + m_eq, len(x) + m_ub))
+    M[:m_ub, :len(x)] = model.A_ub.toarray()
+    M[m_ub:, :len(x)] = model.A_eq.toarray()
+    M[:m_ub, len(x):] = np.eye(m_ub)
+    lower = np.concatenate((model.lb, np.zeros(m_ub)))
+    upper = np.concatenate((model.ub, np.full(m_ub, np.inf)))
+    z = np.concatenate((x, model.b_ub - model.A_ub @ x))
+    return M, lower, upper, z
+
+
+def _basis(M: np.ndarray, lower: np.ndarray, upper: np.ndarray, z: np.ndarray,
+           reduced: Optional[np.ndarray]) -> Optional[List[int]]:
+    """Columns of an optimal basis: those strictly between bounds, completed (if degenerate) by
+    the columns with the smallest reduced cost that keep it non-singular"""
+    m = M.shape[0]
+    scale = TOLERANCE * (1.0 + np.abs(z))
+    between = (z - lower > scale) & (upper - z > scale)
+    order = list(np.flatnonzero(between))
+    rest = np.flatnonzero(~between)
+    if reduced is not None:
+        rest = rest[np.argsort(np.abs(reduced[rest]), kind='stable')]
+    order += list(rest)
+    columns, Q = [], np.zeros((m, 0))
+    for j in order:
+        v = M[:, j]
+        norm = np.linalg.norm(v)
+        if not norm:
+            continue
+        r = v - Q @ (Q.T @ v)
+        if np.linalg.norm(r) > 1e-8 * norm:
+            Q = np.column_stack((Q, r / np.linalg.norm(r)))
+            columns.append(int(j))
+            if len(columns) == m:
+                return columns
+        elif between[j]:
+            return None  # Colunas "básicas" dependentes: a solução não é um vértice
+    return columns if len(columns) == m else None
+
+
+def _rhs_ranges(B_inv: np.ndarray, z_B: np.ndarray, lower_B: np.ndarray,
+                upper_B: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Steps of each right-hand side over which every basic variable stays within its bounds"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        to_upper = (upper_B - z_B)[:, None] / B_inv
+        to_lower = (lower_B - z_B)[:, None] / B_inv
+    up = np.where(B_inv > TOLERANCE, to_upper, np.where(B_inv < -TOLERANCE, to_lower, np.inf))
+    down = np.where(B_inv > TOLERANCE, to_lower, np.where(B_inv < -TOLERANCE, to_upper, -np.inf))
+    return down.max(axis=0, initial=-np.inf), up.min(axis=0, initial=np.inf)
+
+
+def _cost_ranges(model: LinearModel, M: np.ndarray, B_inv: np.ndarray, basis: List[int], z: np.ndarray,
+                 upper: np.ndarray, reduced: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Steps of each (minimization) cost over which the basis stays optimal"""
+    n = len(model.variables)
+    down, up = np.full(n, -np.inf), np.full(n, np.inf)
+    nonbasic = np.setdiff1d(np.arange(M.shape[1]), basis)
+    # Não-básicas no limite superior têm custo reduzido <= 0; as demais >= 0
+    at_upper = np.isfinite(upper[nonbasic]) & (np.abs(z[nonbasic] - upper[nonbasic]) <= TOLERANCE * (1 + np.abs(z[nonbasic])))
+    sign = np.where(at_upper, -1.0, 1.0)
+    fixed = np.append(model.lb == model.ub, np.zeros(M.shape[1] - n, dtype=bool))[nonbasic]
+
+    structural = nonbasic < n
+    for j, s, is_fixed in zip(nonbasic[structural], sign[structural], fixed[structural]):
+        if is_fixed:
+            continue
+        if s > 0:
+            down[j] = -reduced[j]
+        else:
+            up[j] = -reduced[j]
+
+    # Básicas: mudar o custo em δ altera os custos reduzidos das não-básicas em -δ·(linha do tableau)
+    active = ~fixed
+    tableau = B_inv @ M[:, nonbasic[active]]
+    alpha = tableau * sign[active]
+    margin = np.maximum(reduced[nonbasic[active]] * sign[active], 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = margin / alpha
+    up_basic = np.where(alpha > TOLERANCE, ratio, np.inf).min(axis=1, initial=np.inf)
+    down_basic = np.where(alpha < -TOLERANCE, ratio, -np.inf).max(axis=1, initial=-np.inf)
+    for position, j in enumerate(basis):
+        if j < n:
+            down[j], up[j] = down_basic[position], up_basic[position]
+    return down, up
+
+
+def analyze(model: LinearModel, x: np.ndarray, duals_ub: Optional[np.ndarray] = None,
+            duals_eq: Optional[np.ndarray] = None, reduced_costs: Optional[np.ndarray] = None) -> Dict[str, Any]:
+    """
+    Sensitivity report of an optimal LP solution
+
+    Args:
+        model: Compiled LP
+        x: Optimal solution, in model.variables order
+        duals_ub, duals_eq, reduced_costs: Solver marginals of the minimization form
+            (d objective / d b); recovered from the optimal basis when omitted
+
+    Returns:
+        JSON-serializable dict with a 'constraints' and a 'variables' entry per name, the binding
+        constraints and whether ranging was computed
+    """
+    sign = -1.0 if model.sense == 'maximize' else 1.0
+    m_ub = model.A_ub.shape[0]
+    x = np.asarray(x, dtype=float)
+    slack = np.concatenate((model.b_ub - model.A_ub @ x, np.zeros(model.A_eq.shape[0])))
+    rows = m_ub + model.A_eq.shape[0]
+    ranging = rows * (len(x) + m_ub) <= RANGING_MAX_ENTRIES
+    unavailable = {'constraints': {}, 'variables': {}, 'binding': [], 'ranging': False,
+                   'message': 'Sensitivity is unavailable for this solution'}
+
+    basis = None
+    if ranging:
+        M, lower, upper, z = _standard_form(model, x)
+        hint = np.concatenate((reduced_costs, -duals_ub)) if reduced_costs is not None else None
+        basis = _basis(M, lower, upper, z, hint)
+    if basis is not None:
+        B_inv = np.linalg.inv(M[:, basis])
+        c_full = np.concatenate((sign * model.c, np.zeros(m_ub)))
+        y = B_inv.T @ c_full[basis]
+        basis_reduced = c_full - M.T @ y
+        if duals_ub is None:
+            duals_ub, duals_eq = y[:m_ub], y[m_ub:]
+            reduced_costs = basis_reduced[:len(x)]
+    if duals_ub is None:
+        return unavailable
+
+    # Duais na forma do problema: sentido do objetivo e direção da restrição como escritos
+    row_signs = model.ub_signs if model.ub_signs is not None else np.ones(m_ub)
+    duals = np.concatenate((sign * row_signs * duals_ub, sign * np.asarray(duals_eq)))
+    reduced = sign * np.asarray(reduced_costs)
+
+    rhs_low = rhs_high = cost_low = cost_high = None
+    if basis is not None:
+        down, up = _rhs_ranges(B_inv, z[basis], lower[basis], upper[basis])
+        rhs = np.concatenate((model.b_ub, model.b_eq))
+        low, high = rhs + down, rhs + up
+        # Linhas '>=' foram guardadas negadas: volta para o lado direito original
+        flip = np.concatenate((row_signs < 0, np.zeros(len(model.b_eq), dtype=bool)))
+        rhs_low, rhs_high = np.where(flip, -high, low), np.where(flip, -low, high)
+        down, up = _cost_ranges(model, M, B_inv, basis, z, upper, basis_reduced)
+        cost_low, cost_high = (model.c + down, model.c + up) if sign > 0 else (model.c - up, model.c - down)
+
+    names = model.ub_names + model.eq_names
+    rhs = np.abs(np.concatenate((model.b_ub, model.b_eq)))
+    binding = np.abs(slack) <= 1e-7 * (1.0 + rhs)
+    constraints = {}
+    for i, name in enumerate(names):
+        entry = {'slack': float(slack[i]), 'dual': float(duals[i]) + 0.0}
+        if rhs_low is not None:
+            entry['rhs_range'] = [_number(rhs_low[i]), _number(rhs_high[i])]
+        constraints[name] = entry
+    variables = {}
+    for j, name in enumerate(model.variables):
+        entry = {'reduced_cost': float(reduced[j]) + 0.0, 'cost': float(model.c[j])}
+        if cost_low is not None:
+            entry['cost_range'] = [_number(cost_low[j]), _number(cost_high[j])]
+        variables[name] = entry
+    return {'constraints': constraints, 'variables': variables,
+            'binding': [name for name, tight in zip(names, binding) if tight], 'ranging': rhs_low is not None}
+
+
+def from_linprog(model: LinearModel, res) -> Optional[Dict[str, Any]]:
+    """Sensitivity report from a scipy.optimize.linprog (HiGHS) result"""
+    if res.x is None or getattr(res, 'ineqlin', None) is None:
+        return None
+    m_ub, m_eq = model.A_ub.shape[0], model.A_eq.shape[0]
+    duals_ub = np.asarray(res.ineqlin.marginals) if m_ub else np.zeros(0)
+    duals_eq = np.asarray(res.eqlin.marginals) if m_eq else np.zeros(0)
+    reduced = np.asarray(res.lower.marginals) + np.asarray(res.upper.marginals)
+    return analyze(model, res.x, duals_ub, duals_eq, reduced)
+
+
+def describe(report: Dict[str, Any], limit: int = 5) -> List[str]:
+    """Plain-language insights from a sensitivity report (binding constraints, shadow prices, slack)"""
+    if not report or not report.get('constraints'):
+        return []
+    constraints = report['constraints']
+    binding = set(report['binding'])
+    lines = []
+    priced = sorted((name for name in binding if constraints[name]['dual']),
+                    key=lambda name: -abs(constraints[name]['dual']))
+    for name in priced[:limit]:
+        entry = constraints[name]
+        line = f"{name} is binding: one more unit changes the objective by {entry['dual']:,.6g}"
+        if entry.get('rhs_range'):
+            low, high = entry['rhs_range']
+            line += f" (valid for right-hand side in [{_bound_text(low, '-∞')}, {_bound_text(high, '∞')}])"
+        lines.append(line)
+    loose = [name for name in constraints if name not in binding]
+    if loose:
+        shown = ', '.join(f"{name} ({constraints[name]['slack']:,.6g})" for name in loose[:limit])
+        lines.append(f"Constraints with slack: {shown}")
+    elif constraints:
+        lines.append("No slack in constraints: every constraint is binding")
+    return lines
+
+
+def _bound_text(value: Optional[float], infinite: str) -> str:
+    return f"{value:,.6g}" if value is not None else infinite
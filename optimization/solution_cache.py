@@ -0,0 +1,67 @@
+"""
+Solution Cache for OptiMind
+Reuses proven-optimal solutions of models that were already solved, however they were restated
+
+Solutions are stored in the canonical column order of optimization/canonical.py, so a cached
+entry can be mapped back onto the variable names of any restatement of the same model.
+"""
+
+import time
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+from optimization.canonical import Fingerprint, fingerprint
+from optimization.linear_model import LinearModel
+from utils import db
+
+CACHE_SOLVER = 'solution-cache'
+
+
+def lookup(model: LinearModel, key: Optional[Fingerprint] = None) -> Optional[Dict[str, Any]]:
+    """Result of a cached optimal solution for this model, in the model's own variable names"""
+    key = key or fingerprint(model)
+    entry = db.get_cached_solution(key.hash)
+    if entry is None or len(entry['solution']) != len(key.columns):
+        return None
+    start = time.perf_counter()
+    sign = -1.0 if model.sense == 'maximize' else 1.0
+    x = np.empty(len(key.columns))
+    x[list(key.columns)] = entry['solution']
+    return {
+        'status': 'optimal',
+        'message': f"Reused the optimal solution found by {entry['solver']}",
+        'solver': CACHE_SOLVER,
+        'solve_time': time.perf_counter() - start,
+        'objective_value': float(model.c @ x + model.c0),
+        # Objetivo informado pelo solver original: a auditoria compara com o recalculado
+        'solver_objective': sign * entry['objective_value'] + model.c0,
+        'variables': dict(zip(model.variables, x.tolist())),
+        'cache': {'hit': True, 'fingerprint': key.hash, 'original_solver': entry['solver'],
+                  'original_solve_time': entry['solve_time']},
+    }
+
+
+def store(model: LinearModel, key: Fingerprint, result: Dict[str, Any], problem_type: Optional[str] = None):
+    """Cache a solver result if it is proven optimal"""
+    if result.get('status') != 'optimal' or not result.get('variables'):
+        return
+    x = np.array([result['variables'][name] for name in model.variables])
+    # Forma canônica do fingerprint: minimização e sem a constante ('maximize f' e 'minimize -f'
+    # compartilham a entrada, e modelos com o mesmo fingerprint podem ter constantes diferentes)
+    sign = -1.0 if model.sense == 'maximize' else 1.0
+    objective = sign * (result.get('solver_objective', result['objective_value']) - model.c0)
+    db.put_cached_solution(key.hash, x[list(key.columns)].tolist(), objective,
+                           result.get('solver'), result.get('solve_time', 0.0), problem_type)
+
+
+def solve_cached(model: LinearModel, solve: Callable[[LinearModel], Dict[str, Any]],
+                 problem_type: Optional[str] = None) -> Dict[str, Any]:
+    """Return the cached solution of the model, or solve it and cache the optimal result"""
+    key = fingerprint(model)
+    cached = lookup(model, key)
+    if cached is not None:
+        return cached
+    result = solve(model)
+    store(model, key, result, problem_type)
+    return dict(result, cache={'hit': False, 'fingerprint': key.hash})
@@ -0,0 +1,362 @@
+"""
+Parameter Sweeps for OptiMind
+Solves many what-if scenarios of one problem ("what if capacity were 10% higher?") as a batch
+
+A sweep takes a base problem and a grid (or random sample) of values for entries of its `data`
+field. The problem is compiled once at the base point plus once per swept parameter; when the model
+is affine in the swept values (the usual case: data used as coefficients, bounds or right-hand
+sides) every scenario matrix is then a cheap sparse combination of those compilations instead of a
+new compile. Scenarios are solved in a process pool and collected into a columnar table (one NumPy
+column per parameter, status, objective and variable).
+
+Sweep specification:
+    {
+        "mode": "grid",                      # or "sample" (random draws)
+        "samples": 100, "seed": 0,           # sample mode only
+        "parameters": [
+            {"path": "capacity", "values": [100, 110, 120]},       # absolute values of data.capacity
+            {"path": "profit", "scale": [0.9, 1.0, 1.1]},          # multiplies every number under data.profit
+            {"path": "demand.A", "low": 50, "high": 80}            # uniform range (sample mode)
+        ]
+    }
+"""
+
+import copy
+import itertools
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from optimization.linear_model import LinearModel, ModelError, compile_problem, solve
+
+MAX_WORKERS = int(os.getenv('OPTIMIND_SWEEP_WORKERS', str(max(1, min(4, os.cpu_count() or 1)))))
+# Abaixo disso o custo de subir processos supera o ganho; resolve no próprio processo
+PARALLEL_THRESHOLD = 32
+CHUNK_SIZE = 16
+MAX_SCENARIOS = 10_000
+# Time limit de cada cenário (o time limit pedido a run_sweep é limitado a este valor)
+SCENARIO_TIME_LIMIT = float(os.getenv('OPTIMIND_SWEEP_SCENARIO_SECONDS', '10'))
+# Tolerância ao verificar se o modelo é afim nos parâmetros varridos
+AFFINE_TOL = 1e-9
+
+STATUSES = ('optimal', 'limit', 'infeasible', 'unbounded', 'error')
+
+_MATRIX_FIELDS = ('A_ub', 'A_eq')
+_VECTOR_FIELDS = ('c', 'b_ub', 'b_eq', 'lb', 'ub')
+
+
+class SweepParameter(NamedTuple):
+    """A swept data entry: absolute values, or factors applied to every number under the path"""
+    path: Tuple[str, ...]
+    scale: bool
+
+    @property
+    def name(self) -> str:
+        return '.'.join(self.path) + ('*' if self.scale else '')
+
+
+def _get(data: Dict[str, Any], path: Tuple[str, ...]) -> Any:
+    value = data
+    for key in path:
+        if not isinstance(value, dict) or key not in value:
+            raise ModelError(f"Sweep parameter '{'.'.join(path)}' is not in the problem data")
+        value = value[key]
+    return value
+
+
+def _scaled(value: Any, factor: float) -> Any:
+    if isinstance(value, dict):
+        return {key: _scaled(item, factor) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_scaled(item, factor) for item in value]
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value * factor
+    return value
+
+
+def apply_scenario(problem: Dict[str, Any], parameters: List[SweepParameter], point: np.ndarray) -> Dict[str, Any]:
+    """Copy of the problem with the swept data entries set to one scenario's values"""
+    scenario = copy.deepcopy(problem)
+    for parameter, value in zip(parameters, point.tolist()):
+        parent = scenario.setdefault('data', {})
+        for key in parameter.path[:-1]:
+            parent = parent[key]
+        key = parameter.path[-1]
+        parent[key] = _scaled(parent[key], value) if parameter.scale else value
+    return scenario
+
+
+def scenario_grid(problem: Dict[str, Any], spec: Dict[str, Any]) -> Tuple[List[SweepParameter], np.ndarray]:
+    """Swept parameters and the (scenarios x parameters) matrix of their values"""
+    entries = spec.get('parameters') or []
+    if not entries:
+        raise ModelError('Sweep has no parameters')
+    data = problem.get('data') or {}
+    parameters, axes = [], []
+    mode = spec.get('mode', 'grid')
+    rng = np.random.default_rng(spec.get('seed'))
+    samples = int(spec.get('samples', 100))
+    if mode == 'sample' and samples > MAX_SCENARIOS:
+        raise ModelError(f"Sweep has {samples} scenarios (limit {MAX_SCENARIOS})")
+    for entry in entries:
+        if not isinstance(entry, dict) or 'path' not in entry:
+            raise ModelError("Every sweep parameter needs a 'path'")
+        parameter = SweepParameter(tuple(str(entry['path']).split('.')), 'scale' in entry)
+        current = _get(data, parameter.path)
+        if not parameter.scale and not isinstance(current, (int, float)):
+            raise ModelError(f"Sweep parameter '{entry['path']}' must be a number; use 'scale' for tables")
+        if 'low' in entry:
+            if mode != 'sample':
+                raise ModelError("'low'/'high' ranges are only valid in sample mode")
+            if 'high' not in entry:
+                raise ModelError(f"Sweep parameter '{entry['path']}' has 'low' but no 'high'")
+            axes.append(rng.uniform(float(entry['low']), float(entry['high']), samples))
+        else:
+            key = 'scale' if parameter.scale else 'values'
+            if key not in entry:
+                raise ModelError(f"Sweep parameter '{entry['path']}' needs 'values', 'scale' or 'low'/'high'")
+            values = np.asarray(entry[key], dtype=float).ravel()
+            if not len(values):
+                raise ModelError(f"Sweep parameter '{entry['path']}' has no {key}")
+            axes.append(rng.choice(values, samples) if mode == 'sample' else values)
+        parameters.append(parameter)
+    if mode == 'sample':
+        points = np.column_stack(axes)
+    elif mode == 'grid':
+        # Conta antes de enumerar: o produto cartesiano pode ser enorme
+        size = int(np.prod([len(axis) for axis in axes], dtype=float))
+        if size > MAX_SCENARIOS:
+            raise ModelError(f"Sweep has {size} scenarios (limit {MAX_SCENARIOS})")
+        points = np.array(list(itertools.product(*axes)), dtype=float).reshape(-1, len(axes))
+    else:
+        raise ModelError(f"Unknown sweep mode '{mode}'")
+    if not len(points):
+        raise ModelError('Sweep has no scenarios')
+    if len(points) > MAX_SCENARIOS:
+        raise ModelError(f"Sweep has {len(points)} scenarios (limit {MAX_SCENARIOS})")
+    return parameters, points
+
+
+class AffineModel(NamedTuple):
+    """model(t) = base + sum_k (t_k - t0_k) * derivatives[k], for a model that is affine in the swept values"""
+    base: LinearModel
+    origin: np.ndarray
+    derivatives: List[Dict[str, Any]]
+
+    def at(self, point: np.ndarray) -> LinearModel:
+        fields = {name: getattr(self.base, name) for name in _MATRIX_FIELDS + _VECTOR_FIELDS + ('c0',)}
+        for step, derivative in zip(point - self.origin, self.derivatives):
+            if step:
+                for name, change in derivative.items():
+                    fields[name] = fields[name] + step * change
+        for name in _MATRIX_FIELDS:
+            fields[name] = fields[name].tocsr()
+        return self.base._replace(**fields)
+
+
+def _difference(a: LinearModel, b: LinearModel) -> Optional[Dict[str, Any]]:
+    """Non-zero differences b - a of every numeric field, or None if the structure differs"""
+    if (a.variables, a.ub_names, a.eq_names, a.sense) != (b.variables, b.ub_names, b.eq_names, b.sense) \
+            or not np.array_equal(a.integrality, b.integrality):
+        return None
+    changes: Dict[str, Any] = {}
+    for name in _VECTOR_FIELDS:
+        before, after = getattr(a, name), getattr(b, name)
+        if not np.array_equal(np.isinf(before), np.isinf(after)) or not np.array_equal(before[np.isinf(before)],
+                                                                                       after[np.isinf(after)]):
+            return None
+        finite = np.where(np.isinf(after), 0.0, after) - np.where(np.isinf(before), 0.0, before)
+        if np.any(finite):
+            changes[name] = finite
+    for name in _MATRIX_FIELDS:
+        change = (getattr(b, name) - getattr(a, name)).tocsr()
+        change.eliminate_zeros()
+        if change.nnz:
+            changes[name] = change
+    if b.c0 != a.c0:
+        changes['c0'] = b.c0 - a.c0
+    return changes
+
+
+def _dense(value: Any) -> np.ndarray:
+    return value.toarray() if hasattr(value, 'toarray') else np.asarray(value, dtype=float)
+
+
+def _close(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+    for name in set(a) | set(b):
+        left, right = _dense(a.get(name, 0.0)), _dense(b.get(name, 0.0))
+        if np.any(np.abs(left - right) > AFFINE_TOL * (1.0 + np.abs(right))):
+            return False
+    return True
+
+
+def build_affine(problem: Dict[str, Any], parameters: List[SweepParameter], points: np.ndarray) -> Optional[AffineModel]:
+    """Compile the model once per parameter and check it is affine in them; None if it is not"""
+    origin = np.array([1.0 if p.scale else float(_get(problem.get('data') or {}, p.path)) for p in parameters])
+    base = compile_problem(apply_scenario(problem, parameters, origin))
+    steps = np.ptp(points, axis=0)
+    steps[steps == 0] = 1.0
+    derivatives = []
+    for k in range(len(parameters)):
+        point = origin.copy()
+        point[k] += steps[k]
+        changes = _difference(base, compile_problem(apply_scenario(problem, parameters, point)))
+        if changes is None:
+            return None
+        derivatives.append({name: change / steps[k] for name, change in changes.items()})
+    # Verificação: todos os parâmetros movidos juntos (2x) devem somar as derivadas individuais
+    probe = origin + 2 * steps
+    changes = _difference(base, compile_problem(apply_scenario(problem, parameters, probe)))
+    predicted: Dict[str, Any] = {}
+    for k, derivative in enumerate(derivatives):
+        for name, change in derivative.items():
+            predicted[name] = predicted.get(name, 0.0) + 2 * steps[k] * change
+    if changes is None or not _close(changes, predicted):
+        return None
+    return AffineModel(base, origin, derivatives)
+
+
+# --- Execução dos cenários (no processo atual ou nos workers do pool) ---
+
+_worker_state: Dict[str, Any] = {}
+
+
+def _init_worker(affine: Optional[AffineModel], problem: Dict[str, Any], parameters: List[SweepParameter],
+                 time_limit: Optional[float]):
+    _worker_state.update(affine=affine, problem=problem, parameters=parameters, time_limit=time_limit)
+
+
+def _solve_chunk(indices: np.ndarray, points: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Solve scenarios; returns (indices, status codes, objective values, variable values)"""
+    affine, problem, parameters = _worker_state['affine'], _worker_state['problem'], _worker_state['parameters']
+    status = np.empty(len(points), dtype=np.int8)
+    objective = np.full(len(points), np.nan)
+    values = None
+    for row, point in enumerate(points):
+        try:
+            model = affine.at(point) if affine else compile_problem(apply_scenario(problem, parameters, point))
+            result = solve(model, _worker_state['time_limit'], sensitivity=False)
+        except Exception as e:
+            # Falha de um cenário (modelo ou solver) não derruba o chunk nem a varredura
+            message = str(e) if isinstance(e, ModelError) else f"{type(e).__name__}: {e}"
+            result = {'status': 'error', 'message': message, 'variables': {}, 'objective_value': None}
+        if values is None and result['variables']:
+            values = np.full((len(points), len(result['variables'])), np.nan)
+        status[row] = STATUSES.index(result['status']) if result['status'] in STATUSES else STATUSES.index('error')
+        if result['objective_value'] is not None:
+            objective[row] = result['objective_value']
+            values[row] = list(result['variables'].values())
+    return indices, status, objective, values
+
+
+class SweepResult(NamedTuple):
+    """Columnar sweep results: one entry per scenario in every column"""
+    parameters: List[str]
+    points: np.ndarray
+    status: np.ndarray
+    objective: np.ndarray
+    variables: Tuple[str, ...]
+    values: np.ndarray
+    affine: bool
+
+    def to_frame(self, include_variables: bool = True):
+        """pandas DataFrame with parameter, status, objective and (optionally) variable columns"""
+        import pandas as pd
+        columns: Dict[str, Any] = {name: self.points[:, k] for k, name in enumerate(self.parameters)}
+        columns['status'] = pd.Categorical.from_codes(self.status, categories=list(STATUSES))
+        columns['objective_value'] = self.objective
+        if include_variables:
+            columns.update({name: self.values[:, j] for j, name in enumerate(self.variables)})
+        return pd.DataFrame(columns)
+
+    def to_parquet(self, path: str):
+        self.to_frame().to_parquet(path, index=False)
+
+    def summary(self) -> Dict[str, Any]:
+        """Scenario counts by status and objective range, JSON-serializable"""
+        solved = self.objective[~np.isnan(self.objective)]
+        counts = np.bincount(self.status, minlength=len(STATUSES))
+        return {
+            'scenarios': int(len(self.status)),
+            'statuses': {name: int(n) for name, n in zip(STATUSES, counts) if n},
+            'objective_min': float(solved.min()) if len(solved) else None,
+            'objective_max': float(solved.max()) if len(solved) else None,
+            'objective_mean': float(solved.mean()) if len(solved) else None,
+            'affine': self.affine,
+        }
+
+
+def run_sweep(problem: Dict[str, Any], spec: Dict[str, Any], workers: Optional[int] = None,
+              time_limit: Optional[float] = None,
+              on_progress: Optional[Callable[[int, int], None]] = None) -> SweepResult:
+    """
+    Solve every scenario of a sweep
+
+    Args:
+        problem: Base problem JSON
+        spec: Sweep specification (see module docstring)
+        workers: Solver processes (defaults to MAX_WORKERS; small sweeps run in this process)
+        time_limit: Per-scenario time limit (at most SCENARIO_TIME_LIMIT)
+        on_progress: Called with (scenarios done, total) as chunks finish
+    """
+    parameters, points = scenario_grid(problem, spec)
+    time_limit = min(time_limit or SCENARIO_TIME_LIMIT, SCENARIO_TIME_LIMIT)
+    affine = build_affine(problem, parameters, points)
+    total = len(points)
+    variables = affine.base.variables if affine else compile_problem(problem).variables
+    status = np.full(total, STATUSES.index('error'), dtype=np.int8)
+    objective = np.full(total, np.nan)
+    values = np.full((total, len(variables)), np.nan)
+
+    chunks = [np.arange(start, min(start + CHUNK_SIZE, total)) for start in range(0, total, CHUNK_SIZE)]
+    workers = MAX_WORKERS if workers is None else workers
+    init_args = (affine, problem, parameters, time_limit)
+    done = 0
+
+    def collect(indices, chunk_status, chunk_objective, chunk_values):
+        nonlocal done
+        status[indices], objective[indices] = chunk_status, chunk_objective
+        if chunk_values is not None:
+            values[indices] = chunk_values
+        done += len(indices)
+        if on_progress:
+            on_progress(done, total)
+
+    if workers <= 1 or total < PARALLEL_THRESHOLD:
+        _init_worker(*init_args)
+        for indices in chunks:
+            collect(*_solve_chunk(indices, points[indices]))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_worker, initargs=init_args) as pool:
+            futures = [pool.submit(_solve_chunk, indices, points[indices]) for indices in chunks]
+            for future in as_completed(futures):
+                collect(*future.result())
+
+    return SweepResult([p.name for p in parameters], points, status, objective, tuple(variables), values,
+                       affine is not None)
+
+
+def store(result: SweepResult) -> Dict[str, Any]:
+    """Save the result columns in the blob store; returns a JSON-serializable reference plus summary"""
+    from utils import db
+    return dict(result.summary(), table={
+        'parameters': result.parameters,
+        'variables': list(result.variables),
+        'points': db.put_array(result.points),
+        'status': db.put_array(result.status),
+        'objective': db.put_array(result.objective),
+        'values': db.put_array(result.values),
+    })
+
+
+def load(stored: Dict[str, Any]) -> SweepResult:
+    """Rebuild a SweepResult saved with store"""
+    from utils import db
+    table = stored['table']
+    return SweepResult(table['parameters'], db.get_array(table['points']), db.get_array(table['status']),
+                       db.get_array(table['objective']), tuple(table['variables']),
+                       db.get_array(table['values']), stored.get('affine', False))
@@ -61,4 +61,30 @@ with st.expander("Test OpenAI API Connection", expanded=False):
                 except Exception as e:
                     st.error(f"Error connecting to OpenAI API: {e}")
 
+# --- Solution Cache ---
+st.header("Solution Cache")
+st.caption("Proven-optimal solutions reused for models that are equivalent to one already solved.")
+
+from utils import db
+import pandas as pd
+
+cache_stats = db.solution_cache_stats()
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("Cached Models", cache_stats['entries'])
+col2.metric("Hits", cache_stats['hits'])
+col3.metric("Hit Rate", f"{cache_stats['hit_rate']:.1%}", help=f"{cache_stats['misses']} misses")
+col4.metric("Solver Time Saved", f"{cache_stats['saved_seconds']:.2f}s")
+
+cached = db.list_cached_solutions()
+if cached:
+    df = pd.DataFrame(cached)
+    df['fingerprint'] = df['fingerprint'].str[:12]
+    df['created_at'] = pd.to_datetime(df['created_at'], unit='s')
+    df['last_hit'] = pd.to_datetime(df['last_hit'], unit='s')
+    st.dataframe(df, use_container_width=True, hide_index=True)
+if st.button("Clear Solution Cache", key="clear_solution_cache"):
+    db.clear_solution_cache()
+    st.success("Solution cache cleared.")
+    st.rerun()
+
 # Future tools can be added below 
\ No newline at end of file
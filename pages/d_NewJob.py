@@ -18,6 +18,10 @@ from utils import db
 try:
     from agents.meaning_agent import MeaningAgent
     from agents.researcher_agent import ResearcherAgent
+    from agents import job_runner
+    from agents.stages import problem_from_context
+    from optimization import sweep
+    from optimization.linear_model import ModelError
 except ImportError as e:
     st.error(f"Error importing agents: {e}")
     st.stop()
@@ -288,6 +292,28 @@ def compile_user_messages(chat_messages):
     
     return '\n'.join(compiled)
 
+@st.fragment(run_every=2)
+def show_job_progress(job_id):
+    """Acompanha o job executado em background, lendo o status persistido pelos workers"""
+    progress = job_runner.get_progress(job_id)
+    if progress is None:
+        st.session_state.pipeline_running = False
+        return
+    worker_messages = db.get_conversations(job_id)[st.session_state.pipeline_message_count:]
+    if progress['done']:
+        # Traz as mensagens dos agentes para o chat e recarrega a página inteira
+        st.session_state.chat_messages.extend(
+            {'sender': msg['sender'], 'message': msg['message']} for msg in worker_messages
+        )
+        st.session_state.pipeline_running = False
+        st.rerun()
+    for msg in worker_messages:
+        with st.chat_message(msg['sender']):
+            st.markdown(msg['message'])
+    with st.chat_message('assistant'):
+        label = f"Running: {progress['stage']}" if progress['stage'] else "Waiting for a worker..."
+        st.progress(progress['completed_stages'] / progress['total_stages'], text=label)
+
 def main():
     """New Job Page - Interactive chat with Meaning Agent (simplified)"""
     
@@ -484,116 +510,69 @@ def main():
                     with st.expander('Data (Refined)', expanded=False):
                         st.json(refined_problem_data['data'])
                 
+                # Varredura de cenários opcional: mesma especificação de optimization/sweep.py
+                sweep_spec = None
+                with st.expander('🔁 Scenario Sweep (optional)', expanded=False):
+                    st.caption('Solve what-if scenarios over entries of the problem data instead of a single solve. '
+                               'Example: {"mode": "grid", "parameters": [{"path": "capacity", "values": [100, 110, 120]}]}')
+                    sweep_text = st.text_area('Sweep specification (JSON)', key=f'sweep_spec_{idx}', height=120)
+                    if sweep_text.strip():
+                        try:
+                            sweep_spec = json.loads(sweep_text)
+                            problem = problem_from_context({'problem': st.session_state.final_problem_data,
+                                                            'refined_problem': st.session_state.refined_problem_data})
+                            _, points = sweep.scenario_grid(problem, sweep_spec)
+                            st.success(f'{len(points)} scenarios will be solved.')
+                        except (ValueError, TypeError, AttributeError, ModelError) as e:
+                            sweep_spec = False
+                            st.error(f'Invalid sweep specification: {e}')
+
                 st.markdown("---")
                 # BOTÃO 2: Start (executa pipeline completo)
-                if st.button("🚀 Start Optimization", type="primary", key=f"start_optimization_{idx}"):
+                if st.button("🚀 Start Optimization", type="primary", key=f"start_optimization_{idx}",
+                             disabled=sweep_spec is False):
                     # Marcar pipeline como iniciado
                     st.session_state.pipeline_complete = True
                     
-                    # Executar pipeline com spinners individuais para cada agente
-                    with st.spinner("📐 Mathematician Agent is generating the mathematical model..."):
-                        import time
-                        time.sleep(2)  # Simular processamento
-                        st.session_state.chat_messages.append({
-                            'sender': 'assistant',
-                            'message': "📐 **Mathematician Agent** built the mathematical formulation successfully!"
-                        })
-                    
-                    with st.spinner("💻 Formulator Agent is generating Pyomo code..."):
-                        time.sleep(2)  # Simular processamento
-                        st.session_state.chat_messages.append({
-                            'sender': 'assistant',
-                            'message': "💻 **Formulator Agent** generated the Pyomo code successfully!"
-                        })
-                    
-                    with st.spinner("⚡ Executor Agent is running the optimization model..."):
-                        time.sleep(3)  # Simular processamento mais longo
-                        st.session_state.chat_messages.append({
-                            'sender': 'assistant',
-                            'message': "⚡ **Executor Agent** ran the optimization model successfully!"
-                        })
-                    
-                    with st.spinner("📊 Interpreter Agent is analyzing the results..."):
-                        time.sleep(2)  # Simular processamento
-                        st.session_state.chat_messages.append({
-                            'sender': 'assistant',
-                            'message': "📊 **Interpreter Agent** analyzed the results successfully!"
-                        })
-                    
-                    with st.spinner("🔍 Auditor Agent is validating the solution..."):
-                        time.sleep(2)  # Simular processamento
-                        st.session_state.chat_messages.append({
-                            'sender': 'assistant',
-                            'message': "🔍 **Auditor Agent** validated the solution successfully!"
-                        })
-                    
-                    # Mensagem final de conclusão
-                    st.session_state.chat_messages.append({
-                        'sender': 'assistant',
-                        'message': "✅ **Optimization pipeline completed successfully!** All agents have finished their work."
-                    })
-                    
-                    # Salvar no banco de dados
-                    jobs_db = db.get_jobs()
-                    next_id = str(len(jobs_db) + 1).zfill(3)
+                    # Criar o job e enfileirar para os workers em background
+                    next_id = str(db.next_job_number()).zfill(3)
                     now = datetime.datetime.now()
                     date_str = now.strftime('%Y%m%d-%H:%M:%S')
                     job_title = st.session_state.final_problem_data.get('business_context', {}).get('domain', 'OptimizationJob')
                     job_id = f"job_{next_id}_{date_str}_{job_title.replace(' ', '_')}"
                     
-                    # Resultado final para salvar no banco
-                    final_message = """✅ Optimization complete! Here are your results:
-
-🎯 **Optimal Solution Found:**
-• Optimal Value: $1,200
-• x = 15 units  
-• y = 5 units
-
-📈 **Performance Metrics:**
-• Solver: CBC
-• Execution Time: 0.05 seconds
-• Status: Optimal
-• Iterations: 3
-
-📊 **Business Insights:**
-• Maximum profit achieved at capacity limit
-• Product X is more profitable (5 vs 3)
-• Solution uses 100% of available capacity
-• No slack in constraints
-
-🔍 **Model Details:**
-• Problem Type: Linear Programming (LP)
-• Variables: 2 decision variables
-• Constraints: 3 (1 capacity + 2 non-negativity)
-• Objective: Maximize 5x + 3y
-
-Your optimization problem has been successfully solved! 🎉"""
-                    
-                    db.insert_job({
-                        'id': job_id,
-                        'created_at': now.isoformat(),
-                        'user_input': compile_user_messages(st.session_state.chat_messages),
-                        'job_title': job_title,
-                        'status': 'Completed',
-                        'final_message': final_message,
-                    })
-                    
-                    # Salvar conversas e outputs
-                    for msg in st.session_state.chat_messages:
-                        db.insert_conversation(job_id, msg['sender'], msg['message'], now.isoformat())
+                    # Job, conversas e outputs já produzidos vão para o banco junto com a entrada da fila
+                    timestamp = now.isoformat()
+                    agent_outputs = [
+                        ('Meaning', st.session_state.final_problem_data),
+                        ('Researcher', st.session_state.refined_problem_data),
+                    ]
+                    job_runner.submit_job(
+                        {
+                            'id': job_id,
+                            'created_at': timestamp,
+                            'user_input': compile_user_messages(st.session_state.chat_messages),
+                            'job_title': job_title,
+                        },
+                        [{'sender': msg['sender'], 'message': msg['message'], 'timestamp': timestamp}
+                         for msg in st.session_state.chat_messages],
+                        [{'agent_name': agent, 'json_output': json.dumps(output), 'timestamp': timestamp}
+                         for agent, output in agent_outputs],
+                        {
+                            'problem': st.session_state.final_problem_data,
+                            'refined_problem': st.session_state.refined_problem_data,
+                            # Job anterior do mesmo chat: o Executor re-resolve só o que mudou
+                            'previous_job_id': st.session_state.get('current_job_id'),
+                            'sweep': sweep_spec or None,
+                        }
+                    )
                     
-                    db.insert_agent_output(job_id, 'Meaning', json.dumps(st.session_state.final_problem_data), now.isoformat())
-                    db.insert_agent_output(job_id, 'Researcher', json.dumps(st.session_state.refined_problem_data), now.isoformat())
-                    db.insert_agent_output(job_id, 'Mathematician', json.dumps({'output': 'Fake model output'}), now.isoformat())
-                    db.insert_agent_output(job_id, 'Formulator', json.dumps({'output': 'Fake code output'}), now.isoformat())
-                    db.insert_agent_output(job_id, 'Executor', json.dumps({'output': 'Fake execution output'}), now.isoformat())
-                    db.insert_agent_output(job_id, 'Interpreter', json.dumps({'output': 'Fake analysis output'}), now.isoformat())
-                    db.insert_agent_output(job_id, 'Auditor', json.dumps({'output': 'Fake validation output'}), now.isoformat())
-                    
-                    # Salvar job_id para acessar na página de resultados
+                    # Salvar job_id para acompanhar o progresso e acessar na página de resultados
                     st.session_state.current_job_id = job_id
+                    st.session_state.pipeline_running = True
+                    st.session_state.pipeline_message_count = len(st.session_state.chat_messages)
                     
-                    # Recarregar a página para mostrar as novas mensagens
+                    # Recarregar a página para mostrar o progresso
                     st.rerun()
             
             # FLUXO 3: Se é a mensagem final do pipeline completo (mostrar botão Ver Resultados)
@@ -610,6 +589,10 @@ Your optimization problem has been successfully solved! 🎉"""
                     st.session_state['jobs'] = []
                     st.switch_page('pages/e_Results.py')
     
+    # Acompanhar o pipeline executado pelos workers em background
+    if st.session_state.get('pipeline_running'):
+        show_job_progress(st.session_state.current_job_id)
+    
     # Chat input usando st.chat_input
     if prompt := st.chat_input("Describe your optimization problem here..."):
         st.session_state.chat_messages.append({
@@ -621,7 +604,9 @@ Your optimization problem has been successfully solved! 🎉"""
         with st.chat_message("assistant"):
             with st.spinner("🤖 Meaning Agent is analyzing your problem..."):
                 try:
-                    agent_result = st.session_state.meaning_agent.process(prompt)
+                    # Mostra a clarification enquanto o JSON ainda está sendo gerado
+                    st.write_stream(st.session_state.meaning_agent.stream_clarification(prompt))
+                    agent_result = st.session_state.meaning_agent.last_result
                     # print('DEBUG agent_result:', agent_result)
                     clarification = agent_result.get('clarification')
                     if not clarification and 'result' in agent_result:
@@ -650,6 +635,10 @@ Your optimization problem has been successfully solved! 🎉"""
                             # Atualiza o estado global com o último problem_data válido
                             st.session_state.final_problem_data = problem_data
                             st.session_state.problem_ready = True
+                            # Edição depois de um job concluído (what-if): recomeça o ciclo Researcher → Start
+                            if st.session_state.pipeline_complete and not st.session_state.get('pipeline_running'):
+                                st.session_state.refined_problem_data = None
+                                st.session_state.pipeline_complete = False
                         else:
                             st.session_state.chat_messages.append({
                                 'sender': 'assistant',
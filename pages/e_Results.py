@@ -3,7 +3,7 @@ from datetime import datetime
 from utils import db
 from utils.auth import require_auth
 from utils.sidebar import create_sidebar
-import json
+from utils.output_viewer import render_agent_outputs
 
 # Page configuration
 st.set_page_config(
@@ -41,11 +41,10 @@ def main():
     st.markdown('---')
 
     # Buscar o job mais recente do banco
-    jobs = db.get_jobs()
-    if not jobs:
+    last_job = db.get_latest_job()
+    if not last_job:
         st.info('No optimization job has been processed yet.')
         return
-    last_job = jobs[0]  # jobs já vem ordenado do mais recente para o mais antigo
     st.markdown(f"**Job ID:** `{last_job['id']}`")
     st.markdown(f"**Title:** {last_job['job_title']}")
     st.markdown(f"**Status:** {last_job['status']}")
@@ -53,19 +52,9 @@ def main():
     st.markdown(f"**User input:** {last_job['user_input']}")
     st.markdown('---')
 
-    # Buscar outputs dos agentes
-    agent_outputs = db.get_agent_outputs(last_job['id'])
-    if not agent_outputs:
-        st.warning('No agent outputs found for this job.')
+    # Outputs dos agentes (carregados sob demanda)
+    if not render_agent_outputs(last_job['id']):
         return
-    for output in agent_outputs:
-        agent = output['agent_name']
-        try:
-            data = json.loads(output['json_output'])
-        except Exception:
-            data = output['json_output']
-        with st.expander(f"{agent} Agent Output", expanded=False):
-            st.json(data)
 
     st.markdown('---')
     st.success(last_job.get('final_message', ''))
@@ -3,8 +3,9 @@ import pandas as pd
 from utils import db
 from utils.auth import require_auth
 from utils.sidebar import create_sidebar
-import json
-from streamlit_extras.dataframe_explorer import dataframe_explorer
+from utils.output_viewer import render_agent_outputs
+from agents import job_runner
+from datetime import timedelta
 
 # Page configuration
 st.set_page_config(
@@ -41,29 +42,85 @@ def display_job_details(job):
     st.markdown(f"**Job ID:** `{job['id']}`")
     st.markdown(f"**Title:** {job['job_title']}")
     st.markdown(f"**Status:** {job['status']}")
+    if job['status'] == 'Failed' and st.button('🔁 Resume job', key=f"resume_{job['id']}"):
+        # Etapas já concluídas são restauradas dos checkpoints; só a etapa que falhou em diante roda de novo
+        if job_runner.resume_job(job['id']):
+            st.success('Job queued again. Completed stages will be reused.')
+        else:
+            st.warning('This job cannot be resumed.')
     st.markdown('---')
     st.markdown(f"**User input:** {job['user_input']}")
     st.markdown('---')
-    agent_outputs = db.get_agent_outputs(job['id'])
-    if not agent_outputs:
-        st.warning('No agent outputs found for this job.')
+    if not render_agent_outputs(job['id']):
         return
-    for output in agent_outputs:
-        agent = output['agent_name']
-        try:
-            data = json.loads(output['json_output'])
-        except Exception:
-            data = output['json_output']
-        with st.expander(f"{agent} Agent Output", expanded=False):
-            st.json(data)
     st.markdown('---')
     st.success(job.get('final_message', ''))
 
+PAGE_SIZE = 25
+
+def build_filters(title, statuses, dates):
+    """Converte os widgets de filtro no formato aceito por db.list_jobs"""
+    filters = {}
+    if title:
+        filters['title'] = title
+    if statuses:
+        filters['status'] = statuses
+    if dates:
+        filters['created_from'] = dates[0].isoformat()
+        end = dates[1] if len(dates) > 1 else dates[0]
+        filters['created_to'] = (end + timedelta(days=1)).isoformat()
+    return filters
+
+def show_search_results(query):
+    """Busca full-text no conteúdo dos jobs (inputs, mensagens e resultados)"""
+    results = db.search_jobs(query, limit=PAGE_SIZE)
+    if not results:
+        st.warning('No jobs match your search.')
+        return
+    sources = {'user_input': 'User input', 'final_message': 'Result', 'conversation': 'Chat'}
+    df = pd.DataFrame([
+        {
+            'ID': result['id'],
+            'Created at': result['created_at'],
+            'Title': result['job_title'],
+            'Status': result['status'],
+            'Found in': sources.get(result['source'], result['source']),
+            'Match': result['snippet'],
+        }
+        for result in results
+    ])
+    st.dataframe(df, use_container_width=True, hide_index=True)
+    selected_id = st.selectbox('Select a job to view details:', df['ID'].tolist())
+    selected_job = db.get_job(selected_id)
+    if selected_job:
+        display_job_details(selected_job)
+
 def main():
     st.title('📜 Optimization Job History')
-    jobs = db.get_jobs()
+    query = st.text_input('🔍 Search jobs by what was typed or answered', placeholder='e.g. snowboards capacity')
+    if query.strip():
+        show_search_results(query)
+        return
+    st.markdown('🔎 Use the filters below to explore your jobs:')
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        title = st.text_input('Title contains')
+    with col2:
+        statuses = st.multiselect('Status', db.list_job_statuses())
+    with col3:
+        dates = st.date_input('Created between', value=())
+    filters = build_filters(title, statuses, dates)
+
+    # Reinicia a paginação quando os filtros mudam
+    if st.session_state.get('history_filters') != filters:
+        st.session_state.history_filters = filters
+        st.session_state.history_cursors = [None]
+    cursors = st.session_state.history_cursors
+
+    page = db.list_jobs(filters, cursor=cursors[-1], limit=PAGE_SIZE)
+    jobs = page['jobs']
     if not jobs:
-        st.info('No jobs found.')
+        st.warning('No jobs match the selected filters.' if filters else 'No jobs found.')
         return
     df = pd.DataFrame([
         {
@@ -74,16 +131,25 @@ def main():
         }
         for job in jobs
     ])
-    st.markdown('🔎 Use the filters below to explore your jobs:')
-    filtered_df = dataframe_explorer(df)
-    st.dataframe(filtered_df, use_container_width=True, hide_index=True)
-    if filtered_df.empty:
-        st.warning('No jobs match the selected filters.')
-        return
-    job_ids = filtered_df['ID'].tolist()
+    st.dataframe(df, use_container_width=True, hide_index=True)
+
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        if st.button('⬅️ Previous', disabled=len(cursors) == 1, use_container_width=True):
+            cursors.pop()
+            st.rerun()
+    with col2:
+        st.markdown(f"<div style='text-align: center;'>Page {len(cursors)}</div>", unsafe_allow_html=True)
+    with col3:
+        if st.button('Next ➡️', disabled=page['next_cursor'] is None, use_container_width=True):
+            cursors.append(page['next_cursor'])
+            st.rerun()
+
+    job_ids = df['ID'].tolist()
     selected_id = st.selectbox('Select a job to view details:', job_ids)
-    selected_job = next(job for job in jobs if job['id'] == selected_id)
-    display_job_details(selected_job)
+    selected_job = db.get_job(selected_id)
+    if selected_job:
+        display_job_details(selected_job)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
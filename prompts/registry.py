@@ -0,0 +1,107 @@
+"""
+Prompt Registry for OptiMind
+Loads agent prompts relative to this package, caches them and tracks their hashes
+"""
+
+import hashlib
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+PROMPTS_DIR = Path(__file__).parent
+DEFAULT_VERSION = "default"
+
+
+class Prompt(NamedTuple):
+    """A loaded prompt and its identity"""
+    name: str
+    version: str
+    text: str
+    hash: str
+
+
+class PromptRegistry:
+    """In-memory cache of prompt files with mtime-based hot reload"""
+
+    def __init__(self, prompts_dir: Optional[Path] = None, check_interval: float = 2.0):
+        """
+        Initialize the registry
+
+        Args:
+            prompts_dir: Directory containing the prompt files
+            check_interval: Minimum seconds between mtime checks of a cached prompt
+        """
+        self.prompts_dir = Path(prompts_dir) if prompts_dir else PROMPTS_DIR
+        self.check_interval = check_interval
+        self._cache: Dict[Tuple[str, str], Tuple[float, float, Prompt]] = {}
+        self._lock = threading.Lock()
+
+    def path_for(self, name: str, version: Optional[str] = None) -> Path:
+        """
+        Resolve the file of a prompt variant
+
+        The default variant lives in '<name>.txt', other versions in '<name>@<version>.txt'.
+        """
+        if not version or version == DEFAULT_VERSION:
+            return self.prompts_dir / f"{name}.txt"
+        return self.prompts_dir / f"{name}@{version}.txt"
+
+    def get(self, name: str, version: Optional[str] = None) -> Prompt:
+        """
+        Get a prompt, reading the file only when it changed on disk
+
+        Args:
+            name: Prompt name (e.g. 'meaning')
+            version: Prompt variant; defaults to OPTIMIND_PROMPT_<NAME> or the default file
+
+        Returns:
+            The loaded Prompt
+
+        Raises:
+            FileNotFoundError: If the prompt file does not exist
+        """
+        version = version or os.getenv(f"OPTIMIND_PROMPT_{name.upper()}") or DEFAULT_VERSION
+        key = (name, version)
+        now = time.monotonic()
+        cached = self._cache.get(key)
+        if cached is not None and now - cached[1] < self.check_interval:
+            return cached[2]
+
+        path = self.path_for(name, version)
+        mtime = path.stat().st_mtime
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] == mtime:
+                self._cache[key] = (mtime, now, cached[2])
+                return cached[2]
+            text = path.read_text(encoding="utf-8")
+            prompt = Prompt(name=name, version=version, text=text,
+                            hash=hashlib.sha256(text.encode("utf-8")).hexdigest())
+            self._cache[key] = (mtime, now, prompt)
+            return prompt
+
+    def list_versions(self, name: str) -> List[str]:
+        """List the available variants of a prompt"""
+        versions = [DEFAULT_VERSION] if self.path_for(name).exists() else []
+        versions.extend(sorted(path.stem.split("@", 1)[1] for path in self.prompts_dir.glob(f"{name}@*.txt")))
+        return versions
+
+
+_registry: Optional[PromptRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_prompt_registry() -> PromptRegistry:
+    """Get the process-wide prompt registry"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = PromptRegistry()
+        return _registry
+
+
+def get_prompt(name: str, version: Optional[str] = None) -> Prompt:
+    """Get a prompt from the shared registry"""
+    return get_prompt_registry().get(name, version)
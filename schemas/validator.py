@@ -4,25 +4,148 @@ Validates output from agents against defined schemas
 """
 
 import json
+import threading
+import time
 import jsonschema
 from pathlib import Path
-from typing import Dict, Any, Tuple, Optional
+from typing import Dict, Any, Tuple, Optional, List, Iterable
+
+class SchemaRegistry:
+    """Process-wide cache of parsed schemas and compiled validators"""
+
+    def __init__(self, schemas_dir: Optional[Path] = None, check_interval: float = 2.0):
+        """
+        Initialize the registry
+
+        Args:
+            schemas_dir: Directory containing the *.json schemas
+            check_interval: Minimum seconds between mtime checks for hot reload
+        """
+        self.schemas_dir = Path(schemas_dir) if schemas_dir else Path(__file__).parent
+        self.check_interval = check_interval
+        self.schemas: Dict[str, Dict[str, Any]] = {}
+        self._validators: Dict[str, Any] = {}
+        self._mtimes: Dict[str, float] = {}
+        self._last_check = 0.0
+        self._lock = threading.RLock()
+        self._refresh(force=True)
+
+    def _refresh(self, force: bool = False):
+        """Reload schemas whose files were added, changed or removed"""
+        now = time.monotonic()
+        if not force and now - self._last_check < self.check_interval:
+            return
+        with self._lock:
+            self._last_check = now
+            seen = set()
+            for schema_file in self.schemas_dir.glob("*.json"):
+                schema_name = schema_file.stem
+                seen.add(schema_name)
+                mtime = schema_file.stat().st_mtime
+                if self._mtimes.get(schema_name) == mtime:
+                    continue
+                with open(schema_file, 'r', encoding='utf-8') as f:
+                    self.schemas[schema_name] = json.load(f)
+                self._mtimes[schema_name] = mtime
+                self._validators.pop(schema_name, None)
+            for schema_name in set(self.schemas) - seen:
+                del self.schemas[schema_name]
+                self._mtimes.pop(schema_name, None)
+                self._validators.pop(schema_name, None)
+
+    def get_schema(self, schema_name: str) -> Optional[Dict[str, Any]]:
+        """Get schema by name"""
+        self._refresh()
+        return self.schemas.get(schema_name)
+
+    def get_validator(self, schema_name: str):
+        """
+        Get the compiled validator for a schema
+
+        Args:
+            schema_name: Name of the schema (file stem)
+
+        Returns:
+            jsonschema validator instance, or None if the schema does not exist
+        """
+        self._refresh()
+        validator = self._validators.get(schema_name)
+        if validator is not None:
+            return validator
+        with self._lock:
+            schema = self.schemas.get(schema_name)
+            if schema is None:
+                return None
+            validator_class = jsonschema.validators.validator_for(schema)
+            validator = validator_class(schema, format_checker=validator_class.FORMAT_CHECKER)
+            self._validators[schema_name] = validator
+            return validator
+
+    def validate(self, schema_name: str, data: Any) -> Tuple[bool, Optional[str]]:
+        """
+        Validate data against a schema
+
+        Args:
+            schema_name: Name of the schema (file stem)
+            data: Instance to validate
+
+        Returns:
+            (is_valid, error_message)
+        """
+        validator = self.get_validator(schema_name)
+        if validator is None:
+            return False, f"Schema '{schema_name}' not found"
+        error = jsonschema.exceptions.best_match(validator.iter_errors(data))
+        if error is None:
+            return True, None
+        return False, str(error)
+
+    def validate_many(self, schema_name: str, items: Iterable[Any]) -> List[Tuple[bool, Optional[str]]]:
+        """
+        Validate a batch of instances against the same schema
+
+        Args:
+            schema_name: Name of the schema (file stem)
+            items: Instances to validate
+
+        Returns:
+            List of (is_valid, error_message), one per item
+        """
+        validator = self.get_validator(schema_name)
+        if validator is None:
+            return [(False, f"Schema '{schema_name}' not found") for _ in items]
+        results = []
+        for item in items:
+            error = jsonschema.exceptions.best_match(validator.iter_errors(item))
+            results.append((True, None) if error is None else (False, str(error)))
+        return results
+
+    def list_schemas(self) -> list:
+        """List all available schemas"""
+        self._refresh()
+        return list(self.schemas.keys())
+
+_registry: Optional[SchemaRegistry] = None
+_registry_lock = threading.Lock()
+
+def get_registry() -> SchemaRegistry:
+    """Get the process-wide schema registry"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = SchemaRegistry()
+        return _registry
 
 class SchemaValidator:
     """Validates JSON output against schemas"""
     
     def __init__(self):
-        self.schemas = {}
-        self._load_schemas()
+        self.registry = get_registry()
     
-    def _load_schemas(self):
-        """Load all schema files from the schemas directory"""
-        schemas_dir = Path(__file__).parent
-        
-        for schema_file in schemas_dir.glob("*.json"):
-            schema_name = schema_file.stem
-            with open(schema_file, 'r', encoding='utf-8') as f:
-                self.schemas[schema_name] = json.load(f)
+    @property
+    def schemas(self) -> Dict[str, Dict[str, Any]]:
+        """Schemas loaded by the shared registry"""
+        return self.registry.schemas
     
     def validate_problem(self, data: Dict[str, Any]) -> Tuple[bool, Optional[str]]:
         """
@@ -34,13 +157,7 @@ class SchemaValidator:
         Returns:
             (is_valid, error_message)
         """
-        try:
-            jsonschema.validate(instance=data, schema=self.schemas["problem_schema"])
-            return True, None
-        except jsonschema.ValidationError as e:
-            return False, str(e)
-        except KeyError:
-            return False, "Schema 'problem_schema' not found"
+        return self.registry.validate("problem_schema", data)
     
     def validate_json_string(self, json_string: str, schema_name: str = "problem_schema") -> Tuple[bool, Optional[str]]:
         """
@@ -61,23 +178,25 @@ class SchemaValidator:
     
     def get_schema(self, schema_name: str) -> Optional[Dict[str, Any]]:
         """Get schema by name"""
-        return self.schemas.get(schema_name)
+        return self.registry.get_schema(schema_name)
     
     def list_schemas(self) -> list:
         """List all available schemas"""
-        return list(self.schemas.keys())
+        return self.registry.list_schemas()
 
 # Convenience function
 def validate_problem_output(data: Dict[str, Any]) -> Tuple[bool, Optional[str]]:
     """Quick validation function for problem output"""
-    validator = SchemaValidator()
-    return validator.validate_problem(data)
+    return get_registry().validate("problem_schema", data)
+
+def validate_many(schema_name: str, items: Iterable[Any]) -> List[Tuple[bool, Optional[str]]]:
+    """Validate a batch of instances against one schema using the shared registry"""
+    return get_registry().validate_many(schema_name.replace('.json', ''), items)
 
 # Utility function to load a schema by name
 def load_schema(schema_name: str):
     """Load a schema by name from the schemas directory."""
-    validator = SchemaValidator()
-    schema = validator.get_schema(schema_name.replace('.json', ''))
+    schema = get_registry().get_schema(schema_name.replace('.json', ''))
     if schema is None:
         raise ValueError(f"Schema '{schema_name}' not found in schemas directory.")
     return schema 
\ No newline at end of file
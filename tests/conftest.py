@@ -0,0 +1,43 @@
+"""
+Shared fixtures for the OptiMind tests
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import db
+
+# Extreme Downhill (prompts/problem_list.toml): centenas de esquis (x) e snowboards (y)
+SKIS = {
+    'sense': 'maximize',
+    'objective': '6000*x + 4000*y',
+    'decision_variables': {'x': {'type': 'Real', 'bounds': [0, None]},
+                           'y': {'type': 'Real', 'bounds': [0, 16]}},
+    'constraints': [{'name': 'molding', 'expression': '3*x + 2*y <= 115.5'},
+                    {'name': 'cutting', 'expression': 'x + 3*y <= 51'},
+                    {'name': 'van', 'expression': '2*x + y <= 48'}],
+}
+
+
+def make_problem(objective, constraints, names=('x', 'y'), sense='maximize', bounds=(0, None), variables=None,
+                 **extra):
+    """Structured problem over Real variables; constraints may be expressions or full dicts"""
+    variables = variables or {n: {'type': 'Real', 'bounds': list(bounds)} for n in names}
+    problem = {'sense': sense, 'objective': objective, 'decision_variables': variables,
+               'constraints': [c if isinstance(c, dict) else {'expression': c} for c in constraints]}
+    problem.update(extra)
+    return problem
+
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    """Point utils.db at an empty database file"""
+    monkeypatch.setattr(db, 'DB_PATH', str(tmp_path / 'test.db'))
+    db.close_all()
+    db.init_db()
+    yield db
+    db.close_all()
@@ -0,0 +1,87 @@
+"""
+Tests for the shared agent runtime (pooled clients, async processing, concurrency limit)
+"""
+
+import asyncio
+import pytest
+import sys
+import os
+import threading
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.base_agent import BaseAgent
+from agents.runtime import AgentRuntime, get_runtime, get_openai_client
+
+
+class EchoAgent(BaseAgent):
+    """Minimal agent used to exercise BaseAgent.process_async"""
+
+    def get_system_prompt(self) -> str:
+        return "You are a test agent."
+
+
+class FakeAsyncClient:
+    """Async client double that records peak concurrency"""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.in_flight = 0
+        self.peak = 0
+        self.calls = 0
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, **kwargs):
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(self.delay)
+        with self._lock:
+            self.in_flight -= 1
+        content = '{"echo": %s}' % len(kwargs["messages"][1]["content"])
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+                               usage=SimpleNamespace(total_tokens=3))
+
+
+def _agent(client):
+    agent = EchoAgent(name="Echo", use_cache=False)
+    agent.async_client = client
+    return agent
+
+
+def test_sync_client_is_shared_per_api_key():
+    pytest.importorskip("httpx")
+    assert get_openai_client("sk-test") is get_openai_client("sk-test")
+    assert get_openai_client("sk-test") is not get_openai_client("sk-other")
+
+
+def test_get_runtime_is_a_singleton():
+    assert get_runtime() is get_runtime()
+
+
+def test_process_async_from_foreign_event_loop():
+    agent = _agent(FakeAsyncClient(delay=0))
+    result = asyncio.run(agent.process_async("abc"))
+    assert result["success"]
+    assert result["result"] == {"echo": 3}
+
+
+def test_submit_respects_global_concurrency_limit():
+    runtime = get_runtime()
+    client = FakeAsyncClient()
+    agent = _agent(client)
+    futures = [agent.submit("x" * i) for i in range(runtime.max_concurrent_calls * 2)]
+    results = [future.result(timeout=10) for future in futures]
+    assert all(r["success"] for r in results)
+    assert client.calls == len(futures)
+    assert 1 < client.peak <= runtime.max_concurrent_calls
+
+
+def test_runtime_shutdown():
+    runtime = AgentRuntime(max_concurrent_calls=2)
+    assert runtime.call(asyncio.sleep(0, result=5)) == 5
+    runtime.shutdown()
+    assert not runtime.loop.is_running()
@@ -0,0 +1,96 @@
+"""
+Tests for the numeric solution auditor (optimization/audit.py)
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import conftest
+from agents import stages
+from optimization import audit
+from optimization.linear_model import compile_problem, solve
+
+# Versão MIP: snowboards inteiros e mix fixa entre os produtos
+SKIS = dict(conftest.SKIS,
+            decision_variables=dict(conftest.SKIS['decision_variables'], y={'type': 'Integer', 'bounds': [0, 16]}),
+            constraints=conftest.SKIS['constraints'] + [{'name': 'mix', 'expression': 'x - y == 8'}])
+
+
+def test_solver_results_pass():
+    model = compile_problem(SKIS)
+    report = audit.audit(model, solve(model))
+    assert report['passed'] and not report['violations'] and not report['failures']
+    assert report['checks']['objective_error'] == pytest.approx(0, abs=1e-6)
+
+
+def test_each_check_reports_its_violations():
+    model = compile_problem(SKIS)
+    result = {'objective_value': 246000.0, 'solver_objective': 150000.0, 'variables': {'x': 30.0, 'y': 16.5}}
+    report = audit.audit(model, result)
+    assert not report['passed']
+    assert report['failures'] == {'inequality': 3, 'equality': 1, 'bound': 1, 'integrality': 1, 'objective': 1}
+    assert [v['name'] for v in report['violations'][:3]] == ['cutting', 'van', 'molding']
+    assert report['checks']['max_inequality_violation'] == pytest.approx(28.5)
+    assert {'check': 'equality', 'name': 'mix', 'amount': pytest.approx(5.5)} in report['violations']
+    assert {'check': 'bound', 'name': 'y', 'amount': pytest.approx(0.5)} in report['violations']
+    assert report['checks']['max_integrality_gap'] == pytest.approx(0.5)
+    assert report['checks']['objective_recomputed'] == pytest.approx(246000.0)
+
+    assert audit.audit(model, {'objective_value': 0, 'variables': {'x': 1.0}})['failures'] == {'missing_variables': 1}
+
+
+def test_large_models_audit_in_milliseconds():
+    n = 100_000
+    problem = {
+        'sense': 'minimize',
+        'sets': {'I': {'size': n}},
+        'parameters': {'demand': {'index': ['I'], 'values': (np.arange(n) % 7 + 1.0).tolist()}},
+        'objective': 'sum(x[i] for i in I)',
+        'decision_variables': {'x': {'type': 'Real', 'index': ['I'], 'bounds': [0, None]}},
+        'constraints': [{'name': 'cover', 'expression': 'x[i] >= demand[i]', 'for_all': 'i in I'}],
+    }
+    model = compile_problem(problem)
+    x = np.arange(n) % 7 + 1.0
+    x[123] -= 0.5
+    result = {'objective_value': float(x.sum()), 'variables': dict(zip(model.variables, x.tolist()))}
+    start = time.perf_counter()
+    report = audit.audit(model, result)
+    assert time.perf_counter() - start < 0.5
+    assert report['failures'] == {'inequality': 1}
+    assert report['violations'][0]['name'] == 'cover[123]'
+
+
+def test_auditor_escalates_only_on_failure(monkeypatch):
+    calls = []
+    monkeypatch.setattr(stages, '_escalate_audit', lambda problem, execution, report: calls.append(report) or
+                        {'success': True, 'result': {'approved': False, 'diagnosis': 'Broken van capacity'}})
+    context = {'problem': SKIS, 'outputs': {'Mathematician': {'linear': True}}}
+    context['outputs']['Executor'] = dict(solve(compile_problem(SKIS)), model={})
+    output = stages._auditor(context)
+    assert output['approved'] and output['audit']['passed'] and not calls
+    assert 'Audit: Passed' in stages.build_final_message(dict(context['outputs'], Auditor=output))
+
+    context['outputs']['Executor']['variables'] = {'x': 30.0, 'y': 22.0}
+    output = stages._auditor(context)
+    assert not output['approved'] and len(calls) == 1
+    assert output['review']['diagnosis'] == 'Broken van capacity'
+    assert '⚠️ Failed' in stages.build_final_message(dict(context['outputs'], Auditor=output))
+    assert not stages.CONDITIONS['all_stages_valid'](output, context)
+
+
+def test_objective_is_checked_against_the_solver_report():
+    model = compile_problem(SKIS)
+    result = solve(model)
+    assert result['solver_objective'] == pytest.approx(result['objective_value'])
+    # Variáveis adulteradas: o objetivo recalculado diverge do informado pelo HiGHS
+    tampered = dict(result, variables=dict(result['variables'], x=result['variables']['x'] - 1e-3))
+    tampered['objective_value'] = float(model.c @ np.array(list(tampered['variables'].values())) + model.c0)
+    report = audit.audit(model, tampered)
+    assert report['failures']['objective'] == 1
+    assert report['checks']['objective_error'] == pytest.approx(6.0)
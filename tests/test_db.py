@@ -0,0 +1,257 @@
+"""
+Tests for the SQLite access layer (utils/db.py)
+"""
+
+import json
+import os
+import sys
+import threading
+from datetime import datetime
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import db
+
+
+def _job(job_id, created_at=None, **extra):
+    job = {
+        'id': job_id,
+        'created_at': created_at or datetime.now().isoformat(),
+        'user_input': 'Maximize 3x + 4y',
+        'job_title': 'Test',
+        'status': 'Completed',
+        'final_message': 'done',
+    }
+    job.update(extra)
+    return job
+
+
+def test_connection_uses_wal_and_is_reused(temp_db):
+    with db.get_conn() as conn:
+        assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        assert conn.execute('PRAGMA synchronous').fetchone()[0] == 1  # NORMAL
+        first = conn
+    with db.get_conn() as conn:
+        assert conn is first
+
+
+def test_transaction_commits_once_and_rolls_back_on_error(temp_db):
+    with db.transaction():
+        db.insert_job(_job('job_a'))
+        db.insert_conversation('job_a', 'user', 'hi', datetime.now().isoformat())
+    assert [j['id'] for j in db.get_jobs()] == ['job_a']
+
+    with pytest.raises(RuntimeError):
+        with db.transaction():
+            db.insert_job(_job('job_b'))
+            raise RuntimeError('boom')
+    assert [j['id'] for j in db.get_jobs()] == ['job_a']
+
+
+def test_concurrent_writers(temp_db):
+    errors = []
+
+    def writer(n):
+        try:
+            for i in range(20):
+                db.insert_conversation(f'job_{n}', 'user', f'message {i}', datetime.now().isoformat())
+        except Exception as e:  # pragma: no cover - surfaced by the assertion below
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert sum(len(db.get_conversations(f'job_{n}')) for n in range(6)) == 120
+
+
+def test_save_job_bundle(temp_db):
+    ts = datetime.now().isoformat()
+    db.save_job_bundle(
+        _job('job_bundle'),
+        [{'sender': 'user', 'message': f'msg {i}', 'timestamp': ts} for i in range(50)],
+        [{'agent_name': name, 'json_output': '{"ok": true}', 'timestamp': ts} for name in ['Meaning', 'Researcher']]
+    )
+    assert len(db.get_conversations('job_bundle')) == 50
+    assert [o['agent_name'] for o in db.get_agent_outputs('job_bundle')] == ['Meaning', 'Researcher']
+
+
+def test_save_job_bundle_is_atomic(temp_db):
+    ts = datetime.now().isoformat()
+    with pytest.raises(KeyError):
+        db.save_job_bundle(_job('job_broken'), [{'sender': 'user', 'message': 'hi', 'timestamp': ts}],
+                           [{'agent_name': 'Meaning'}])
+    assert db.get_jobs() == []
+    assert db.get_conversations('job_broken') == []
+
+
+def test_migrations_are_versioned_and_idempotent(temp_db):
+    assert db.schema_version() == len(db.MIGRATIONS)
+    db.init_db()
+    assert db.schema_version() == len(db.MIGRATIONS)
+
+
+@pytest.mark.parametrize('sql, params, index', [
+    ('SELECT * FROM jobs ORDER BY created_at DESC', (), 'idx_jobs_created_at'),
+    ("SELECT * FROM jobs WHERE status = ? ORDER BY created_at DESC", ('Completed',), 'idx_jobs_status'),
+    ('SELECT * FROM conversations WHERE job_id = ? ORDER BY timestamp', ('job_x',), 'idx_conversations_job_ts'),
+    ('SELECT * FROM agent_outputs WHERE job_id = ? ORDER BY timestamp', ('job_x',), 'idx_agent_outputs_job_ts'),
+])
+def test_queries_use_indexes(temp_db, sql, params, index):
+    plan = ' | '.join(db.explain_query_plan(sql, params))
+    assert index in plan, plan
+    assert 'TEMP B-TREE' not in plan, plan
+
+
+def _seed_jobs(n):
+    for i in range(n):
+        status = 'Completed' if i % 2 == 0 else 'Failed'
+        db.insert_job(_job(f'job_{i:03d}', created_at=f'2025-01-{1 + i % 28:02d}T10:00:00',
+                           job_title=f'Plan {i}', status=status))
+
+
+def test_list_jobs_keyset_pagination_covers_every_job_once(temp_db):
+    _seed_jobs(57)
+    seen, cursor, pages = [], None, 0
+    while True:
+        page = db.list_jobs(cursor=cursor, limit=10)
+        seen.extend(job['id'] for job in page['jobs'])
+        pages += 1
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+    assert pages == 6
+    assert sorted(seen) == sorted(j['id'] for j in db.get_jobs())
+    assert len(seen) == len(set(seen))
+    created = [db.get_job(job_id)['created_at'] for job_id in seen]
+    assert created == sorted(created, reverse=True)
+
+
+def test_list_jobs_filters_and_projection(temp_db):
+    _seed_jobs(30)
+    page = db.list_jobs({'status': ['Failed'], 'title': 'plan 1', 'created_from': '2025-01-10',
+                         'created_to': '2025-01-20'}, sort='oldest', limit=100)
+    assert page['next_cursor'] is None
+    assert page['jobs']
+    for job in page['jobs']:
+        assert set(job) == set(db.JOB_LIST_COLUMNS)
+        assert job['status'] == 'Failed'
+        assert job['job_title'].lower().startswith('plan 1')
+        assert '2025-01-10' <= job['created_at'] < '2025-01-20'
+    assert db.list_job_statuses() == ['Completed', 'Failed']
+    with pytest.raises(ValueError):
+        db.list_jobs(columns=('id', 'password'))
+
+
+def test_list_jobs_query_uses_index(temp_db):
+    plan = ' | '.join(db.explain_query_plan(
+        'SELECT created_at, id FROM jobs WHERE (created_at, id) < (?, ?) ORDER BY created_at DESC, id DESC LIMIT 26',
+        ('2025-01-01', 'job_001')))
+    assert 'idx_jobs_created_at' in plan, plan
+    assert 'TEMP B-TREE' not in plan, plan
+
+
+def test_get_latest_job_and_get_job(temp_db):
+    assert db.get_latest_job() is None
+    _seed_jobs(5)
+    latest = db.get_latest_job()
+    assert latest == db.get_jobs()[0]
+    assert db.get_job(latest['id']) == latest
+    assert db.get_job('missing') is None
+    plan = ' | '.join(db.explain_query_plan('SELECT * FROM jobs ORDER BY created_at DESC, id DESC LIMIT 1'))
+    assert 'idx_jobs_created_at' in plan and 'TEMP B-TREE' not in plan, plan
+
+
+def test_next_job_number_is_unique_under_concurrency(temp_db):
+    numbers = []
+    lock = threading.Lock()
+
+    def reserve():
+        for _ in range(25):
+            n = db.next_job_number()
+            with lock:
+                numbers.append(n)
+
+    threads = [threading.Thread(target=reserve) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(numbers) == list(range(1, 101))
+
+
+def test_search_jobs_ranks_and_tracks_changes(temp_db):
+    ts = datetime.now().isoformat()
+    db.save_job_bundle(_job('job_ski', user_input='How many skis and snowboards should EDC make?'),
+                       [{'sender': 'user', 'message': 'The molding machine runs 115.5 hours', 'timestamp': ts}], [])
+    db.save_job_bundle(_job('job_phone', user_input='Phone survey with landline calls'),
+                       [{'sender': 'assistant', 'message': 'Snowboard demand is irrelevant here', 'timestamp': ts}], [])
+    db.insert_job(_job('job_other', user_input='Portfolio risk'))
+
+    results = db.search_jobs('snowboards')
+    assert sorted(r['id'] for r in results) == ['job_phone', 'job_ski']
+    assert [r['score'] for r in results] == sorted(r['score'] for r in results)
+    assert '**' in results[0]['snippet']
+
+    assert [r['id'] for r in db.search_jobs('molding machine')] == ['job_ski']
+    assert db.search_jobs('"unbalanced (quote OR') == []
+    assert db.search_jobs('   ') == []
+
+    with db.transaction() as conn:
+        conn.execute("UPDATE jobs SET user_input = 'Transportation costs' WHERE id = 'job_other'")
+        conn.execute("DELETE FROM conversations WHERE job_id = 'job_ski'")
+    assert [r['id'] for r in db.search_jobs('transport')] == ['job_other']
+    assert db.search_jobs('molding') == []
+
+
+def test_agent_outputs_are_compressed_and_deduplicated(temp_db):
+    ts = datetime.now().isoformat()
+    meaning = {'problem_type': 'LP', 'objective': 'maximize', 'variables': [f'x{i}' for i in range(40)],
+               'constraints': [f'x{i} <= {i}' for i in range(40)]}
+    researcher = {'original_problem': meaning, 'refined': {'status': 'ok'}}
+    outputs = [{'agent_name': 'Meaning', 'json_output': json.dumps(meaning), 'timestamp': ts},
+               {'agent_name': 'Researcher', 'json_output': json.dumps(researcher), 'timestamp': ts},
+               {'agent_name': 'Executor', 'json_output': 'plain text log', 'timestamp': ts}]
+    db.save_job_bundle(_job('job_a'), [], outputs)
+    first = db.storage_stats()
+    db.save_job_bundle(_job('job_b'), [], outputs)
+    assert db.storage_stats() == first
+
+    loaded = db.get_agent_outputs('job_b')
+    assert json.loads(loaded[0]['json_output']) == meaning
+    assert list(json.loads(loaded[0]['json_output'])) == list(meaning)
+    assert json.loads(loaded[1]['json_output']) == researcher
+    assert loaded[2]['json_output'] == 'plain text log'
+    assert first['stored_bytes'] < first['raw_bytes']
+
+
+def test_blob_migration_backfills_inline_outputs(temp_db):
+    with db.transaction() as conn:
+        conn.execute("INSERT INTO agent_outputs (job_id, agent_name, json_output, timestamp) "
+                     "VALUES ('job_old', 'Meaning', '{\"a\": 1}', '2025-01-01')")
+        conn.execute('DROP TABLE blobs')
+        conn.execute('ALTER TABLE agent_outputs DROP COLUMN blob_hash')
+        db._migration_005_blob_store(conn)
+    with db.get_conn() as conn:
+        row = conn.execute("SELECT json_output, blob_hash FROM agent_outputs WHERE job_id = 'job_old'").fetchone()
+    assert row['json_output'] is None and row['blob_hash']
+    assert json.loads(db.get_agent_outputs('job_old')[0]['json_output']) == {'a': 1}
+
+
+def test_list_agent_outputs_returns_metadata_and_single_fetch(temp_db):
+    ts = datetime.now().isoformat()
+    payload = {'rows': list(range(500))}
+    db.save_job_bundle(_job('job_big'), [], [
+        {'agent_name': 'Meaning', 'json_output': json.dumps(payload), 'timestamp': ts},
+        {'agent_name': 'Executor', 'json_output': 'raw log', 'timestamp': ts}])
+    meta = db.list_agent_outputs('job_big')
+    assert [set(m) for m in meta] == [{'id', 'agent_name', 'size', 'timestamp'}] * 2
+    assert [m['agent_name'] for m in meta] == ['Meaning', 'Executor']
+    assert meta[0]['size'] > 1000 and meta[1]['size'] == len('raw log')
+    assert json.loads(db.get_agent_output(meta[0]['id'])['json_output']) == payload
+    assert db.get_agent_output(meta[1]['id'])['json_output'] == 'raw log'
+    assert db.get_agent_output(-1) is None
@@ -0,0 +1,162 @@
+"""
+Tests for the sandboxed executor pool (agents/executor_pool.py)
+"""
+
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents import executor_pool
+from agents.executor_pool import ExecutorPool, Limits
+
+pytestmark = pytest.mark.skipif(executor_pool.resource is None, reason='sandbox requires fork and setrlimit')
+
+
+@pytest.fixture(scope='module')
+def pool():
+    with ExecutorPool(workers=2, limits=Limits(cpu_seconds=5, wall_seconds=10, memory_mb=1024),
+                      preload=('numpy',)) as pool:
+        yield pool
+
+
+def test_runs_code_and_returns_json_result(pool):
+    code = 'import numpy as np\nprint("solving")\nresult = {"total": np.arange(inputs["n"]).sum()}'
+    output = pool.run(code, inputs={'n': 5})
+    assert output['status'] == 'ok'
+    assert output['result'] == {'total': 10}
+    assert output['stdout'] == 'solving\n'
+    assert output['max_rss_mb'] > 0
+
+
+def test_pyomo_model_builds_in_sandbox(pool):
+    pytest.importorskip('pyomo.environ')
+    code = '''
+import pyomo.environ as pyo
+m = pyo.ConcreteModel()
+m.x = pyo.Var(bounds=(0, 10))
+m.obj = pyo.Objective(expr=3 * m.x, sense=pyo.maximize)
+m.x.value = 10
+result = {"objective": pyo.value(m.obj)}
+'''
+    assert pool.run(code)['result'] == {'objective': 30}
+
+
+@pytest.mark.parametrize('code', ['import os', 'import subprocess', 'from sys import modules', 'open("/etc/passwd")'])
+def test_blocked_imports_and_builtins(pool, code):
+    output = pool.run(code)
+    assert output['status'] == 'error'
+    assert 'not allowed' in output['error'] or 'NameError' in output['error']
+
+
+def test_errors_are_reported_without_killing_the_worker(pool):
+    output = pool.run('result = 1 / 0')
+    assert output['status'] == 'error' and 'ZeroDivisionError' in output['error']
+    assert pool.run('result = 2')['result'] == 2
+
+
+def test_wall_clock_limit(pool):
+    output = pool.run('import time\ntime.sleep(5)', limits=Limits(cpu_seconds=5, wall_seconds=0.5, memory_mb=1024))
+    assert output['status'] == 'timeout'
+    assert output['wall_time'] < 3
+
+
+def test_cpu_limit(pool):
+    output = pool.run('while True:\n    pass', limits=Limits(cpu_seconds=1, wall_seconds=20, memory_mb=1024))
+    assert output['status'] == 'cpu_limit'
+
+
+def test_memory_limit(pool):
+    output = pool.run('block = bytearray(2 * 1024 ** 3)')
+    assert output['status'] == 'memory_limit'
+    assert pool.run('result = "still alive"')['result'] == 'still alive'
+
+
+def test_concurrent_jobs_share_the_pool(pool):
+    results = []
+    threads = [threading.Thread(target=lambda i=i: results.append(pool.run(f'result = {i}')['result']))
+               for i in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(results) == list(range(6))
+
+
+# Escapes do allowlist: builtins e os alcançados por atributos de módulos permitidos
+ESCAPE = 'import json\nb = json.decoder.re.__builtins__\nos = b["__import__"]("os")\n'
+
+
+def _isolated(pool, *layers):
+    isolation = pool.run('result = 0')['isolation']
+    if not set(layers) <= set(isolation):
+        pytest.skip(f"namespaces unavailable here: {isolation}")
+
+
+def test_reports_the_isolation_layers(pool):
+    output = pool.run('result = 0')
+    assert 'limits' in output['isolation']
+
+
+def test_escaped_code_cannot_read_the_app_or_write_outside_the_job_dir(pool, tmp_path):
+    _isolated(pool, 'filesystem')
+    code = ESCAPE + '''
+result = {"app": os.listdir(inputs["app"]), "cwd": os.getcwd(), "cwd_files": os.listdir(".")}
+b["open"]("scratch.txt", "w").write("ok")
+try:
+    b["open"](inputs["target"], "w").write("escaped")
+    result["wrote"] = True
+except OSError:
+    result["wrote"] = False
+'''
+    target = str(tmp_path / 'escaped.txt')
+    output = pool.run(code, inputs={'app': executor_pool.APP_DIR, 'target': target})
+    assert output['status'] == 'ok', output
+    assert output['result']['app'] == []
+    assert output['result']['cwd_files'] == []
+    assert output['result']['cwd'].startswith(os.path.join(os.sep, 'tmp'))
+    assert output['result']['wrote'] is False
+    assert not os.path.exists(target)
+    assert not os.path.exists(output['result']['cwd'])
+
+
+def test_escaped_code_has_no_network_and_cannot_signal_the_app(pool):
+    _isolated(pool, 'network', 'processes')
+    code = ESCAPE + '''
+socket = b["__import__"]("socket")
+try:
+    socket.create_connection(("1.1.1.1", 53), timeout=2)
+    result = {"network": True}
+except OSError:
+    result = {"network": False}
+try:
+    os.kill(inputs["pid"], 0)
+    result["signal"] = True
+except OSError:
+    result["signal"] = False
+result["pid"] = os.getpid()
+'''
+    output = pool.run(code, inputs={'pid': os.getpid()})
+    assert output['result'] == {'network': False, 'signal': False, 'pid': 2}
+
+
+def test_required_isolation_refuses_to_run_without_it(pool, monkeypatch):
+    monkeypatch.setenv('OPTIMIND_SANDBOX_REQUIRE', 'seccomp')  # Workers são spawned: lido no import
+    with ExecutorPool(workers=1) as strict:
+        output = strict.run('result = 1')
+    assert output['status'] == 'error' and 'seccomp' in output['error']
+
+
+def test_executor_stage_runs_formulator_code_in_the_pool(pool, monkeypatch):
+    from agents import stages
+
+    monkeypatch.setattr(executor_pool, '_pool', pool)
+    context = {'problem': {'objective': 'x'}, 'outputs': {
+        'Mathematician': {'linear': False}, 'Formulator': {'code': 'result = {"objective": inputs["problem"]["objective"]}'}}}
+    assert stages.AGENTS['Executor'].run(context)['result'] == {'objective': 'x'}
+    context['outputs']['Formulator']['code'] = 'import os'
+    with pytest.raises(RuntimeError, match='error'):
+        stages.AGENTS['Executor'].run(context)
@@ -0,0 +1,135 @@
+"""
+Tests for incremental re-solving of edited models (optimization/incremental.py)
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from conftest import make_problem
+from optimization import incremental
+from optimization.incremental import SessionStore, diff_models, model_rows
+from optimization.linear_model import compile_problem, solve
+
+
+def _model(constraints, objective='3*x + 4*y', **options):
+    return compile_problem(make_problem(objective, constraints, **options))
+
+
+BASE = ['x + 2*y <= 100', 'x + y <= 80', 'x <= 70']
+
+
+def _diff(old, new):
+    return diff_models(old, model_rows(old), new, model_rows(new))
+
+
+def test_diff_reports_each_kind_of_edit():
+    base = _model(BASE)
+    assert _diff(base, _model(BASE)).is_empty
+    delta = _diff(base, _model(['x + 2*y <= 100', 'x + y <= 90', 'x <= 70']))
+    assert delta.rhs == [(1, float('-inf'), 90.0)] and not delta.coefficients
+    delta = _diff(base, _model(['x + 3*y <= 100', 'x + y <= 80', 'x <= 70']))
+    assert delta.coefficients == [(0, 1, 3.0)] and not delta.rhs
+    delta = _diff(base, _model(['x + y <= 80', 'x <= 70']))
+    assert delta.removed_rows == [0] and not delta.coefficients and not delta.added_rows
+    delta = _diff(base, _model(BASE + ['y <= 15'], objective='3*x + 5*y'))
+    assert len(delta.added_rows) == 1 and delta.costs == [(1, 5.0)]
+    assert _diff(base, _model(BASE, names=('x', 'y'), bounds=(0, 50))).bounds == [(0, 0.0, 50.0), (1, 0.0, 50.0)]
+    assert _diff(base, _model(['a + 2*b <= 100'], objective='a + b', names=('a', 'b'))).rebuild
+
+
+def test_tightening_edit_reuses_the_previous_optimum(monkeypatch):
+    monkeypatch.setattr(incremental, 'highspy', None)  # Caminho SciPy, com ou sem highspy instalado
+    store, calls = SessionStore(), []
+
+    def cold_solve(model):
+        calls.append(model)
+        return solve(model)
+
+    first = store.resolve('job_1', _model(BASE), cold_solve)
+    assert first['objective_value'] == pytest.approx(260) and len(calls) == 1
+
+    # x <= 65 continua satisfeita por x = 60: o ótimo anterior vale sem chamar o solver
+    second = store.resolve('job_2', _model(['x + 2*y <= 100', 'x + y <= 80', 'x <= 65']), cold_solve, 'job_1')
+    assert len(calls) == 1
+    assert second['incremental']['warm_start'] == 'previous_solution'
+    assert second['incremental']['delta']['rhs'] == 1
+    assert second['variables'] == pytest.approx(first['variables'])
+
+    # x <= 50 corta o ótimo: re-resolve e confere com uma solução do zero
+    edited = _model(['x + 2*y <= 100', 'x + y <= 80', 'x <= 50'])
+    third = store.resolve('job_3', edited, cold_solve, 'job_2')
+    assert third['incremental']['warm_start'] == 'cold' and len(calls) == 2
+    assert third['objective_value'] == pytest.approx(solve(edited)['objective_value'])
+    assert 'job_3' in store and 'job_1' not in store
+
+
+def test_first_solve_always_goes_through_cold_solve(monkeypatch):
+    # Um highspy "instalado" não pode ser tocado antes do primeiro delta
+    monkeypatch.setattr(incremental, 'highspy', object())
+    calls = []
+    result = SessionStore().resolve('job_1', _model(BASE), lambda model: calls.append(model) or solve(model))
+    assert len(calls) == 1 and result['objective_value'] == pytest.approx(260)
+
+
+def test_highs_session_resolves_edits_warm():
+    pytest.importorskip('highspy')
+    store, calls = SessionStore(), []
+
+    def cold_solve(model):
+        calls.append(model)
+        return solve(model)
+
+    store.resolve('job_1', _model(BASE), cold_solve)
+    for key, previous, constraints in (('job_2', 'job_1', ['x + 2*y <= 100', 'x + y <= 90', 'x <= 70']),
+                                       ('job_3', 'job_2', ['x + 2*y <= 100', 'x + y <= 90', 'x <= 50', 'y <= 30'])):
+        edited = _model(constraints)
+        result = store.resolve(key, edited, cold_solve, previous)
+        assert result['incremental']['warm_start'] == 'highs'
+        assert result['objective_value'] == pytest.approx(solve(edited)['objective_value'])
+        assert result['solver_objective'] == pytest.approx(result['objective_value'])
+    assert len(calls) == 1
+
+
+def test_relaxing_edit_is_solved_again():
+    store = SessionStore()
+    store.resolve('job_1', _model(BASE), solve)
+    relaxed = _model(['x + 2*y <= 120', 'x + y <= 80', 'x <= 70'])
+    result = store.resolve('job_2', relaxed, solve, 'job_1')
+    assert result['objective_value'] == pytest.approx(solve(relaxed)['objective_value'])
+    assert result['objective_value'] > 260
+
+
+def test_session_is_restored_from_the_previous_job_output():
+    base = _model(BASE)
+    previous = solve(base)
+    store = SessionStore()
+    result = store.resolve('job_2', _model(BASE + ['y <= 30']), solve, 'job_1', restore=lambda: (base, previous))
+    assert result['incremental']['delta']['added_rows'] == 1
+    assert result['objective_value'] == pytest.approx(260)
+
+
+def test_sessions_are_evicted_lru():
+    store = SessionStore(max_sessions=2)
+    for i in range(3):
+        store.resolve(f'job_{i}', _model(BASE), solve)
+    assert 'job_0' not in store and 'job_2' in store
+
+
+def test_executor_continues_from_the_previous_job_of_the_chat(temp_db):
+    from agents import stages
+
+    def problem(capacity):
+        return {'sense': 'maximize', 'objective': '3*x + 4*y',
+                'decision_variables': {'x': {'type': 'Real', 'bounds': [0, None]},
+                                       'y': {'type': 'Real', 'bounds': [0, None]}},
+                'constraints': [{'expression': 'x + 2*y <= 100'}, {'expression': f'x + y <= {capacity}'}]}
+
+    first = stages._solve_linear(problem(80), 'single', 'job_a')
+    assert 'incremental' not in first
+    second = stages._solve_linear(problem(90), 'single', 'job_b', previous_job_id='job_a')
+    assert second['incremental']['delta']['rhs'] == 1
+    assert second['objective_value'] == pytest.approx(solve(compile_problem(problem(90)))['objective_value'])
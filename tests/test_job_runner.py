@@ -0,0 +1,112 @@
+"""
+Tests for the background job runner (agents/job_runner.py)
+"""
+
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import db
+from agents import job_runner
+from agents.metamanager import MetaManager, parse_flow
+from agents.stages import Stage
+
+
+def _submit(job_id):
+    ts = datetime.now().isoformat()
+    job = {'id': job_id, 'created_at': ts, 'user_input': 'Maximize 3x + 4y', 'job_title': 'Test'}
+    job_runner.submit_job(job, [{'sender': 'user', 'message': 'Maximize 3x + 4y', 'timestamp': ts}],
+                          [{'agent_name': 'Meaning', 'json_output': '{"ok": true}', 'timestamp': ts}],
+                          {'problem': {'objective': 'max'}}, start_workers=False)
+
+
+def _manager(fail=None, calls=None):
+    def stage(agent):
+        def run(context):
+            if calls is not None:
+                calls.append(agent)
+            if agent == fail:
+                raise ValueError('solver crashed')
+            return {'agent': agent, 'seen': sorted(context['outputs']), 'objective': context['problem']['objective']}
+        return Stage(agent, f'{agent} done', run)
+
+    flow = parse_flow({'stages': [{'id': 'model', 'agent': 'Mathematician'},
+                                  {'id': 'run', 'agent': 'Executor', 'depends_on': ['model']}]})
+    return MetaManager(flow, agents={'Mathematician': stage('Mathematician'), 'Executor': stage('Executor')})
+
+
+def test_job_runs_out_of_band_and_persists_progress(temp_db):
+    _submit('job_1')
+    assert db.get_job('job_1')['status'] == 'Queued'
+    assert job_runner.get_progress('job_1')['done'] is False
+
+    assert job_runner.run_once('w1', _manager()) is True
+    assert job_runner.run_once('w1', _manager()) is False
+
+    progress = job_runner.get_progress('job_1')
+    assert progress['status'] == 'Completed' and progress['done']
+    outputs = {o['agent_name']: o for o in db.get_agent_outputs('job_1')}
+    assert list(outputs) == ['Meaning', 'Mathematician', 'Executor']
+    assert '"seen": ["Mathematician"]' in outputs['Executor']['json_output']
+    messages = [c['message'] for c in db.get_conversations('job_1')]
+    assert messages[1:3] == ['Mathematician done', 'Executor done']
+    assert db.get_queue_item('job_1')['state'] == 'done'
+    # Sem saída de solver, a mensagem final não inventa resultados
+    final = db.get_job('job_1')['final_message']
+    assert 'no solver output exists' in final and 'Optimal Value' not in final
+
+
+def test_failed_stage_marks_job_failed(temp_db):
+    _submit('job_2')
+    job_runner.run_once('w1', _manager(fail='Executor'))
+    job = db.get_job('job_2')
+    assert job['status'] == 'Failed'
+    assert 'solver crashed' in job['final_message']
+    assert 'Executor failed' in db.get_queue_item('job_2')['error']
+
+
+def test_resume_restores_completed_stages(temp_db):
+    _submit('job_4')
+    calls = []
+    job_runner.run_once('w1', _manager(fail='Executor', calls=calls))
+    assert db.get_job('job_4')['status'] == 'Failed'
+    assert job_runner.resume_job('job_4', start_workers=False) is True
+    assert job_runner.resume_job('job_4', start_workers=False) is False
+    assert db.get_job('job_4')['status'] == 'Queued'
+
+    job_runner.run_once('w1', _manager(calls=calls))
+    assert calls == ['Mathematician', 'Executor', 'Executor']
+    assert db.get_job('job_4')['status'] == 'Completed'
+    checkpoints = [o for o in db.get_agent_outputs('job_4') if o['input_hash']]
+    assert [o['agent_name'] for o in checkpoints] == ['Mathematician', 'Executor']
+
+
+def test_expired_lease_is_requeued(temp_db):
+    _submit('job_3')
+    item = db.claim_job('dead-worker', lease_seconds=-1)
+    assert item['job_id'] == 'job_3' and item['attempts'] == 1
+    # O worker morreu: o próximo claim devolve o job para a fila e outro worker o executa
+    assert db.renew_lease('job_3', 'other-worker', 60) is False
+    assert job_runner.run_once('w2', _manager()) is True
+    assert db.get_queue_item('job_3')['attempts'] == 2
+    assert db.get_job('job_3')['status'] == 'Completed'
+
+
+def test_worker_loop_drains_queue(temp_db):
+    for n in range(3):
+        _submit(f'job_loop_{n}')
+    stop = threading.Event()
+    workers = [threading.Thread(target=job_runner.run_worker, args=(f'w{i}', stop, 0.05, _manager())) for i in range(2)]
+    for worker in workers:
+        worker.start()
+    deadline = time.time() + 10
+    while db.queue_counts().get('done', 0) < 3 and time.time() < deadline:
+        time.sleep(0.05)
+    stop.set()
+    for worker in workers:
+        worker.join()
+    assert db.queue_counts() == {'done': 3}
@@ -0,0 +1,198 @@
+"""
+Tests for the direct LP/MIP builder (optimization/linear_model.py)
+"""
+
+import json
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from conftest import make_problem
+from optimization.linear_model import ModelError, compile_problem, is_linear_problem, solve, solve_problem
+from utils import db
+
+EXAMPLE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'schemas', 'example_problem.json')
+
+
+def test_example_problem_is_solved_directly():
+    with open(EXAMPLE, encoding='utf-8') as f:
+        result = solve_problem(json.load(f))
+    assert result['status'] == 'optimal'
+    assert result['objective_value'] == pytest.approx(260)
+    assert result['variables'] == pytest.approx({'x': 60, 'y': 20})
+    assert result['model']['type'] == 'LP'
+
+
+def test_compiles_sparse_rows_with_normalized_senses():
+    model = compile_problem(make_problem('3*x + 4*y + 10', ['x + 2*y <= 100', '2*x - y >= 5', 'x + y = 30',
+                                                        '0 <= x - y <= 20']))
+    assert model.A_ub.format == 'csr'
+    assert model.A_ub.toarray().tolist() == [[1, 2], [-2, 1], [-1, 1], [1, -1]]
+    assert model.b_ub.tolist() == [100, -5, 0, 20]
+    assert model.A_eq.toarray().tolist() == [[1, 1]] and model.b_eq.tolist() == [30]
+    assert model.c.tolist() == [3, 4] and model.c0 == 10
+    assert model.ub_names == ('c1', 'c2', 'c4_1', 'c4_2')
+
+
+def test_data_auxiliary_variables_and_bound_constraints():
+    problem = make_problem('profit["A"] * x + profit["B"] * y - fixed', [
+        {'expression': 'usage <= capacity', 'type': 'inequality'},
+        {'expression': 'y <= 10', 'type': 'bound'},
+        {'expression': '2*x >= 4', 'type': 'bound'},
+    ], data={'profit': {'A': 5, 'B': 3}, 'capacity': 40, 'fixed': 7},
+        auxiliary_variables={'usage': {'type': 'Real', 'description': '', 'equation': 'x + 2*y'}})
+    model = compile_problem(problem)
+    assert model.A_ub.shape == (1, 2)
+    assert model.lb.tolist() == [2, 0] and model.ub.tolist() == [np.inf, 10]
+    result = solve(model)
+    assert result['objective_value'] == pytest.approx(5 * 40 - 7)
+
+
+def test_mixed_integer_model_uses_milp():
+    variables = {'a': {'type': 'Integer', 'bounds': [0, None]}, 'b': {'type': 'Integer', 'bounds': [0, None]},
+                 'open': {'type': 'Binary'}}
+    result = solve_problem(make_problem('5*a + 4*b - 3*open', ['2*a + 3*b <= 10.5', 'a <= 4*open'], variables=variables))
+    assert result['solver'] == 'highs-milp'
+    assert result['status'] == 'optimal'
+    assert result['variables'] == {'a': 4.0, 'b': 0.0, 'open': 1.0}
+    assert result['objective_value'] == pytest.approx(17)
+
+
+@pytest.mark.parametrize('objective, constraints, status', [
+    ('x + y', ['x + y <= 1', 'x >= 2'], 'infeasible'),
+    ('x + y', ['x - y <= 1'], 'unbounded'),
+])
+def test_infeasible_and_unbounded_status(objective, constraints, status):
+    assert solve_problem(make_problem(objective, constraints))['status'] == status
+
+
+@pytest.mark.parametrize('problem', [
+    make_problem('x * y', ['x <= 1']),
+    make_problem('x / y', ['x <= 1']),
+    make_problem('portfolio risk (variance)', []),
+    make_problem('x + z', ['x <= 1']),
+    make_problem('x', ['x + y']),
+])
+def test_non_linear_or_invalid_problems_are_rejected(problem):
+    with pytest.raises(ModelError):
+        compile_problem(problem)
+    assert not is_linear_problem(problem)
+
+
+def test_indexed_sums_expand_to_one_row_per_element():
+    n = 10_000
+    rng = np.random.default_rng(0)
+    margin, demand = rng.uniform(1, 5, n), rng.uniform(10, 50, n)
+    problem = {
+        'sense': 'maximize',
+        'sets': {'SKU': {'size': n}},
+        'parameters': {'margin': {'index': ['SKU'], 'values': margin.tolist()},
+                       'demand': {'index': ['SKU'], 'values': demand.tolist()}},
+        'decision_variables': {'x': {'type': 'Real', 'index': ['SKU'], 'bounds': [0, 'demand']}},
+        'objective': 'sum(margin[s] * x[s] for s in SKU)',
+        'constraints': [{'expression': 'sum(x[s] for s in SKU) <= capacity'},
+                        {'expression': 'x[s] <= 0.8 * demand[s]', 'for_all': 's in SKU'}],
+        'data': {'capacity': 1000},
+    }
+    model = compile_problem(problem)
+    assert model.A_ub.shape == (n + 1, n) and model.A_ub.nnz == 2 * n
+    assert model.ub_names[:2] == ('c1', 'c2[0]') and model.variables[-1] == f'x[{n - 1}]'
+    result = solve(model)
+    assert result['status'] == 'optimal'
+    values = np.array([result['variables'][f'x[{i}]'] for i in range(n)])
+    assert values.sum() == pytest.approx(1000)
+    assert (values <= 0.8 * demand + 1e-6).all()
+
+
+def test_transport_problem_over_two_sets():
+    problem = {
+        'sense': 'minimize',
+        'sets': {'P': ['p1', 'p2'], 'M': ['m1', 'm2', 'm3']},
+        'parameters': {
+            'supply': {'index': ['P'], 'values': {'p1': 40, 'p2': 50}},
+            'demand': {'index': ['M'], 'values': [20, 30, 25]},
+            'cost': {'index': ['P', 'M'], 'values': {'p1': {'m1': 2, 'm2': 4, 'm3': 5}, 'p2': {'m1': 3, 'm2': 1}},
+                     'default': 7},
+        },
+        'decision_variables': {'ship': {'type': 'Real', 'index': ['P', 'M'], 'bounds': [0, None]}},
+        'objective': 'sum(cost[p, m] * ship[p, m] for p in P for m in M)',
+        'constraints': [
+            {'expression': 'sum(ship[p, m] for m in M) <= supply[p]', 'for_all': 'p in P'},
+            {'expression': 'sum(ship[p, m] for p in P) >= demand[m]', 'for_all': 'm in M'},
+            {'expression': 'ship["p2", "m3"] == 0', 'type': 'bound'},
+        ],
+    }
+    model = compile_problem(problem)
+    assert model.ub_names == ('c1[p1]', 'c1[p2]', 'c2[m1]', 'c2[m2]', 'c2[m3]')
+    assert model.ub[model.variables.index('ship[p2,m3]')] == 0
+    result = solve(model)
+    assert result['status'] == 'optimal'
+    # p1 (capacidade 40) cobre m3 e parte de m1; p2 abastece m2 e o restante de m1
+    assert result['objective_value'] == pytest.approx(15 * 2 + 25 * 5 + 5 * 3 + 30 * 1)
+
+
+def test_columnar_parameters_from_array_store(temp_db):
+    import pandas as pd
+
+    from optimization.columnar import parameters_from_table
+
+    table = pd.DataFrame({'store': ['s2', 's1', 's2', 's1'], 'item': ['a', 'a', 'b', 'b'],
+                          'profit': [3.0, 1.0, 2.0, 5.0], 'limit': [4.0, 6.0, 1.0, 2.0]})
+    columnar = parameters_from_table(table, ['store', 'item'], ['profit', 'limit'])
+    assert db.get_array(columnar['sets']['store']['$array']).tolist() == ['s2', 's1']
+    problem = {
+        'sense': 'maximize', **columnar,
+        'decision_variables': {'q': {'type': 'Real', 'index': ['store', 'item'], 'bounds': [0, 'limit']}},
+        'objective': 'sum(profit[s, i] * q[s, i] for s in store for i in item)',
+        'constraints': [],
+    }
+    result = solve_problem(problem)
+    assert result['objective_value'] == pytest.approx(3 * 4 + 2 * 1 + 1 * 6 + 5 * 2)
+    assert result['variables']['q[s1,b]'] == pytest.approx(2)
+
+
+def test_parquet_references_stay_inside_the_data_directory(tmp_path, monkeypatch):
+    import pandas as pd
+
+    from optimization import columnar
+
+    (tmp_path / 'data').mkdir()
+    pd.DataFrame({'city': ['a', 'b', 'c']}).to_parquet(tmp_path / 'data' / 'cities.parquet')
+    pd.DataFrame({'city': ['x']}).to_parquet(tmp_path / 'secret.parquet')
+    monkeypatch.setattr(columnar, 'DATA_DIR', str(tmp_path / 'data'))
+
+    problem = {'sets': {'C': {'$parquet': 'cities.parquet', 'column': 'city'}},
+               'decision_variables': {'x': {'type': 'Real', 'index': ['C'], 'bounds': [0, 1]}},
+               'objective': 'sum(x[c] for c in C)', 'constraints': []}
+    assert solve_problem(problem)['objective_value'] == pytest.approx(0)
+    for path in ['../secret.parquet', str(tmp_path / 'secret.parquet'), 'https://example.com/x.parquet',
+                 'file:///etc/hostname', 's3://bucket/x.parquet']:
+        problem['sets']['C']['$parquet'] = path
+        with pytest.raises(ModelError):
+            compile_problem(problem)
+
+    # Arquivos ausentes ou inválidos também viram ModelError (a etapa explica o motivo)
+    (tmp_path / 'data' / 'broken.parquet').write_bytes(b'not parquet')
+    for path in ['nope.parquet', 'broken.parquet']:
+        problem['sets']['C']['$parquet'] = path
+        with pytest.raises(ModelError, match='Cannot read Parquet'):
+            compile_problem(problem)
+
+
+@pytest.mark.parametrize('problem', [
+    {'sets': {'I': [1, 2]}, 'decision_variables': {'x': {'index': ['I']}}, 'objective': 'x[i]', 'constraints': []},
+    {'sets': {'I': [1, 2]}, 'decision_variables': {'x': {'index': ['J']}}, 'objective': '0', 'constraints': []},
+    {'sets': {'I': [1, 2]}, 'decision_variables': {'x': {'index': ['I']}}, 'objective': 'sum(x[i] for i in I)',
+     'constraints': [{'expression': 'x[i] <= 1'}]},
+    # Conjuntos acima de MAX_SET_SIZE são recusados antes de alocar
+    {'sets': {'I': {'size': 10 ** 12}}, 'decision_variables': {'x': {'index': ['I']}}, 'objective': '0', 'constraints': []},
+    {'sets': {'I': {'start': 5, 'stop': 10 ** 12}}, 'decision_variables': {'x': {'index': ['I']}}, 'objective': '0',
+     'constraints': []},
+])
+def test_invalid_indexed_models_are_rejected(problem):
+    with pytest.raises(ModelError):
+        compile_problem(problem)
@@ -0,0 +1,168 @@
+"""
+Tests for the MetaManager flow executor (agents/metamanager.py)
+"""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.metamanager import FlowError, MetaManager, StageFailed, load_flow, parse_flow
+from agents.stages import AGENTS, CONDITIONS, Stage
+
+FLOW = {
+    'defaults': {'timeout': 5},
+    'stages': [
+        {'id': 'model', 'agent': 'Mathematician'},
+        {'id': 'code', 'agent': 'Formulator', 'depends_on': ['model']},
+        {'id': 'run', 'agent': 'Executor', 'depends_on': ['code'],
+         'on_fail': {'retry_agent': 'Formulator', 'max_retries': 1}},
+        {'id': 'interpret', 'agent': 'Interpreter', 'depends_on': ['run']},
+        {'id': 'audit', 'agent': 'Auditor', 'depends_on': ['run']},
+    ],
+}
+
+
+def _agents(calls, behaviours=None):
+    """Stages that record their calls; behaviours[agent](attempt) may sleep or raise"""
+    behaviours = behaviours or {}
+    lock = threading.Lock()
+
+    def make(agent):
+        def run(context):
+            with lock:
+                calls.append(agent)
+                attempt = calls.count(agent)
+            if agent in behaviours:
+                behaviours[agent](attempt)
+            return {'agent': agent, 'attempt': attempt, 'inputs': sorted(context['outputs'])}
+        return Stage(agent, f'{agent} done', run)
+
+    return {stage['agent']: make(stage['agent']) for stage in FLOW['stages']}
+
+
+def test_default_flow_matches_registered_agents():
+    flow = load_flow()
+    assert [stage.agent for stage in flow] == ['Mathematician', 'Formulator', 'Executor', 'Interpreter', 'Auditor']
+    MetaManager(flow, AGENTS, CONDITIONS)
+
+
+def test_runs_in_dependency_order_with_parallel_branches():
+    calls = []
+    barrier = threading.Barrier(2, timeout=2)
+    # Interpreter e Auditor só passam da barreira se estiverem rodando ao mesmo tempo
+    agents = _agents(calls, {'Interpreter': lambda attempt: barrier.wait(),
+                             'Auditor': lambda attempt: barrier.wait()})
+    started = []
+    outputs = MetaManager(parse_flow(FLOW), agents).run(
+        {}, on_start=lambda stages: started.append(sorted(s.agent for s in stages)))
+    assert calls[:3] == ['Mathematician', 'Formulator', 'Executor']
+    assert ['Auditor', 'Interpreter'] in started
+    assert outputs['Auditor']['inputs'] == ['Executor', 'Formulator', 'Mathematician']
+
+
+def test_failure_follows_retry_agent_back_edge():
+    calls = []
+
+    def flaky(attempt):
+        if attempt == 1:
+            raise RuntimeError('infeasible model')
+
+    completed = []
+    outputs = MetaManager(parse_flow(FLOW), _agents(calls, {'Executor': flaky})).run(
+        {}, on_complete=lambda stage, output, input_hash: completed.append(stage.agent))
+    assert calls[:5] == ['Mathematician', 'Formulator', 'Executor', 'Formulator', 'Executor']
+    assert calls.count('Mathematician') == 1
+    assert outputs['Formulator']['attempt'] == 2
+    assert completed.count('Formulator') == 2
+
+
+def test_retry_budget_is_bounded():
+    calls = []
+
+    def broken(attempt):
+        raise RuntimeError('solver crashed')
+
+    with pytest.raises(StageFailed) as exc:
+        MetaManager(parse_flow(FLOW), _agents(calls, {'Executor': broken})).run({})
+    assert exc.value.stage.agent == 'Executor'
+    assert calls.count('Executor') == 2
+    assert 'Interpreter' not in calls
+
+
+def test_stage_timeout_counts_as_failure():
+    flow = parse_flow({'stages': [{'id': 'model', 'agent': 'Mathematician', 'timeout': 0.1}]})
+    agents = {'Mathematician': Stage('Mathematician', '', lambda context: time.sleep(1))}
+    start = time.monotonic()
+    with pytest.raises(StageFailed, match='timed out'):
+        MetaManager(flow, agents).run({})
+    assert time.monotonic() - start < 0.9
+
+
+def test_condition_failure_triggers_retry():
+    flow = parse_flow({'stages': [{'id': 'model', 'agent': 'Mathematician', 'condition': 'has_rows',
+                                   'on_fail': {'max_retries': 2}}]})
+    attempts = []
+
+    def run(context):
+        attempts.append(1)
+        return {'rows': len(attempts) - 1}
+
+    outputs = MetaManager(flow, {'Mathematician': Stage('Mathematician', '', run)},
+                          {'has_rows': lambda output, context: output['rows'] > 0}).run({})
+    assert outputs['Mathematician'] == {'rows': 1}
+
+
+@pytest.mark.parametrize('definition, message', [
+    ({'stages': [{'id': 'a', 'agent': 'A', 'depends_on': ['b']}, {'id': 'b', 'agent': 'B', 'depends_on': ['a']}]},
+     'cycle'),
+    ({'stages': [{'id': 'a', 'agent': 'A', 'depends_on': ['missing']}]}, 'unknown'),
+    ({'stages': [{'id': 'a', 'agent': 'A'}, {'id': 'a', 'agent': 'B'}]}, 'Duplicate'),
+    ({'stages': [{'id': 'a', 'agent': 'A'}, {'id': 'b', 'agent': 'B', 'on_fail': {'retry_agent': 'C'}}]},
+     'not upstream'),
+])
+def test_invalid_flows_are_rejected(definition, message):
+    with pytest.raises(FlowError, match=message):
+        parse_flow(definition)
+
+
+def test_checkpoints_skip_stages_whose_input_did_not_change():
+    saved = {}
+
+    def save(stage, output, input_hash):
+        saved[(stage.agent, input_hash)] = output
+
+    first = []
+    MetaManager(parse_flow(FLOW), _agents(first)).run({'problem': 'p1'}, on_complete=save)
+    assert len(saved) == 5
+
+    again = []
+    MetaManager(parse_flow(FLOW), _agents(again)).run(
+        {'problem': 'p1', 'job_id': 'other'}, load_checkpoint=lambda stage, h: saved.get((stage.agent, h)))
+    assert again == []
+
+    changed = []
+    MetaManager(parse_flow(FLOW), _agents(changed)).run(
+        {'problem': 'p2'}, load_checkpoint=lambda stage, h: saved.get((stage.agent, h)))
+    assert sorted(changed) == sorted(first)
+
+
+def test_retry_does_not_restore_the_failed_checkpoint():
+    saved = {}
+    calls = []
+
+    def flaky(attempt):
+        if attempt == 1:
+            raise RuntimeError('bad code')
+
+    def save(stage, output, input_hash):
+        saved[(stage.agent, input_hash)] = output
+
+    MetaManager(parse_flow(FLOW), _agents(calls, {'Executor': flaky})).run(
+        {}, on_complete=save, load_checkpoint=lambda stage, h: saved.get((stage.agent, h)))
+    # Formulator foi refeito pelo back-edge mesmo tendo um checkpoint para a mesma entrada
+    assert calls.count('Formulator') == 2
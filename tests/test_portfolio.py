@@ -0,0 +1,71 @@
+"""
+Tests for solver portfolio racing (optimization/portfolio.py)
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from optimization import portfolio
+from optimization.linear_model import compile_problem
+from utils import db
+
+
+LP = {'sense': 'maximize', 'objective': '3*x + 4*y',
+      'decision_variables': {'x': {'type': 'Real', 'bounds': [0, None]}, 'y': {'type': 'Real', 'bounds': [0, None]}},
+      'constraints': [{'expression': 'x + 2*y <= 100'}, {'expression': 'x + y <= 80'}]}
+
+MIP = {'sense': 'maximize', 'objective': '5*a + 4*b',
+       'decision_variables': {'a': {'type': 'Integer', 'bounds': [0, None]}, 'b': {'type': 'Integer', 'bounds': [0, None]}},
+       'constraints': [{'expression': '2*a + 3*b <= 10.5'}]}
+
+
+def test_lp_only_variants_are_not_offered_for_mips():
+    assert {'highs', 'highs-ds', 'highs-ipm'} <= set(portfolio.available_solvers(compile_problem(LP)))
+    mip_solvers = portfolio.available_solvers(compile_problem(MIP))
+    assert 'highs' in mip_solvers and 'highs-ipm' not in mip_solvers
+
+
+def test_race_returns_first_proven_result_and_records_the_winner(temp_db):
+    result = portfolio.race(compile_problem(LP), 'LP', solvers=['highs', 'highs-ipm'])
+    assert result['status'] == 'optimal'
+    assert result['objective_value'] == pytest.approx(260)
+    race = result['portfolio']
+    assert race['entrants'] == ['highs', 'highs-ipm'] and race['winner'] == result['solver']
+    ranking = {row['solver']: row for row in db.solver_ranking('LP')}
+    assert ranking['highs']['races'] == ranking['highs-ipm']['races'] == 1
+    assert ranking[race['winner']]['wins'] == 1
+
+
+def test_history_decides_the_solver_order(temp_db):
+    model = compile_problem(LP)
+    db.record_solver_race('LP', ['highs', 'highs-ipm'], 'highs-ipm', 0.1)
+    db.record_solver_race('LP', ['highs', 'highs-ipm'], 'highs-ipm', 0.2)
+    assert portfolio.rank_solvers(model, 'LP')[0] == 'highs-ipm'
+    assert portfolio.rank_solvers(model, 'MIP')[0] == 'highs'
+    assert portfolio.solve_with_best(model, 'LP')['solver'] == 'highs-ipm'
+
+
+def test_entrants_that_cannot_solve_the_model_are_dropped(temp_db):
+    result = portfolio.race(compile_problem(MIP), 'MIP', solvers=['highs-ipm', 'highs'])
+    assert result['portfolio']['entrants'] == ['highs']
+    assert result['status'] == 'optimal'
+    assert result['variables'] == {'a': 5.0, 'b': 0.0}
+
+
+@pytest.mark.parametrize('mode', ['single', 'race'])
+def test_executor_stage_bounds_every_solve_with_a_time_limit(temp_db, monkeypatch, mode):
+    from agents import stages
+
+    limits = []
+    real = {'single': portfolio.solve_with_best, 'race': portfolio.race}[mode]
+    monkeypatch.setattr(portfolio, {'single': 'solve_with_best', 'race': 'race'}[mode],
+                        lambda model, problem_type=None, **kwargs: limits.append(kwargs.get('time_limit')) or
+                        real(model, problem_type, **kwargs))
+    context = {'problem': LP, 'job_id': f'job_{mode}', 'solver_mode': mode,
+               'outputs': {'Mathematician': {'linear': True}}}
+    assert stages.AGENTS['Executor'].run(context)['status'] == 'optimal'
+    assert limits == [portfolio.TIME_LIMIT]
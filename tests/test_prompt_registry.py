@@ -0,0 +1,58 @@
+"""
+Tests for the prompt registry
+"""
+
+import hashlib
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from prompts.registry import PromptRegistry, get_prompt
+from agents.meaning_agent import MeaningAgent
+from agents.researcher_agent import ResearcherAgent
+
+
+def test_prompts_resolve_independently_of_cwd(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    prompt = get_prompt("researcher")
+    assert prompt.text
+    assert prompt.hash == hashlib.sha256(prompt.text.encode("utf-8")).hexdigest()
+    assert ResearcherAgent().get_system_prompt() == prompt.text
+
+
+def test_cached_until_file_changes(tmp_path):
+    path = tmp_path / "demo.txt"
+    path.write_text("first", encoding="utf-8")
+    registry = PromptRegistry(prompts_dir=tmp_path, check_interval=0)
+    first = registry.get("demo")
+    assert registry.get("demo") is first
+
+    path.write_text("second", encoding="utf-8")
+    os.utime(path, (os.path.getmtime(path) + 5,) * 2)
+    second = registry.get("demo")
+    assert second.text == "second"
+    assert second.hash != first.hash
+
+
+def test_versioned_variants(tmp_path, monkeypatch):
+    (tmp_path / "demo.txt").write_text("default prompt", encoding="utf-8")
+    (tmp_path / "demo@v2.txt").write_text("second prompt", encoding="utf-8")
+    registry = PromptRegistry(prompts_dir=tmp_path)
+    assert registry.list_versions("demo") == ["default", "v2"]
+    assert registry.get("demo").text == "default prompt"
+    assert registry.get("demo", "v2").text == "second prompt"
+    monkeypatch.setenv("OPTIMIND_PROMPT_DEMO", "v2")
+    assert registry.get("demo").version == "v2"
+    with pytest.raises(FileNotFoundError):
+        registry.get("demo", "v3")
+
+
+def test_agent_reports_prompt_hash():
+    agent = MeaningAgent()
+    text = agent.get_system_prompt()
+    assert agent.prompt_hash == get_prompt("meaning").hash
+    assert text == (Path(__file__).parent.parent / "prompts" / "meaning.txt").read_text(encoding="utf-8")
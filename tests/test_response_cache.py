@@ -0,0 +1,136 @@
+"""
+Tests for the LLM response cache used by BaseAgent
+"""
+
+import json
+import pytest
+import sys
+import os
+from unittest.mock import MagicMock
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.response_cache import ResponseCache
+from agents.base_agent import BaseAgent
+
+
+class EchoAgent(BaseAgent):
+    """Minimal agent used to exercise BaseAgent.process"""
+
+    def get_system_prompt(self) -> str:
+        return "You are a test agent."
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResponseCache(path=str(tmp_path / "cache.db"), ttl_seconds=60, max_entries=3)
+
+
+def _fake_client(content='{"answer": 42}', tokens=17):
+    client = MagicMock()
+    response = MagicMock()
+    response.choices[0].message.content = content
+    response.usage.total_tokens = tokens
+    client.chat.completions.create.return_value = response
+    return client
+
+
+def test_make_key_is_deterministic_and_content_sensitive():
+    messages = [{"role": "system", "content": "a"}, {"role": "user", "content": "b"}]
+    key = ResponseCache.make_key("gpt-4o-mini", messages, 0.1, 2000)
+    assert key == ResponseCache.make_key("gpt-4o-mini", [dict(m) for m in messages], 0.1, 2000)
+    assert key != ResponseCache.make_key("gpt-4o", messages, 0.1, 2000)
+    assert key != ResponseCache.make_key("gpt-4o-mini", messages, 0.2, 2000)
+    assert key != ResponseCache.make_key("gpt-4o-mini", messages, 0.1, 1000)
+
+
+def test_get_set_and_counters(cache):
+    assert cache.get("missing") is None
+    cache.set("k", "hello", model="m", tokens_used=5)
+    assert cache.get("k") == {"content": "hello", "tokens_used": 5}
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["entries"] == 1
+    assert stats["hit_rate"] == 0.5
+
+
+def test_ttl_expiration(tmp_path):
+    cache = ResponseCache(path=str(tmp_path / "cache.db"), ttl_seconds=0)
+    cache.set("k", "hello")
+    assert cache.get("k") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_lru_eviction(cache):
+    for key in ["a", "b", "c"]:
+        cache.set(key, key)
+    cache.get("a")  # "b" is now the least recently used entry
+    cache.set("d", "d")
+    assert cache.stats()["entries"] == 3
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+
+
+def test_base_agent_serves_repeated_requests_from_cache(cache):
+    agent = EchoAgent(name="Echo", cache=cache)
+    agent.client = _fake_client()
+
+    first = agent.process("same input")
+    second = agent.process("same input")
+
+    assert first["success"] and second["success"]
+    assert first["cached"] is False
+    assert second["cached"] is True
+    assert second["result"] == {"answer": 42}
+    assert second["tokens_used"] == 17
+    assert agent.client.chat.completions.create.call_count == 1
+
+    agent.process("different input")
+    assert agent.client.chat.completions.create.call_count == 2
+
+
+def test_base_agent_without_cache_always_calls_api(cache):
+    agent = EchoAgent(name="Echo", use_cache=False)
+    agent.client = _fake_client()
+    agent.process("same input")
+    agent.process("same input")
+    assert agent.cache is None
+    assert agent.client.chat.completions.create.call_count == 2
+
+
+class StrictAgent(EchoAgent):
+    """Agent whose parser rejects non-JSON responses"""
+
+    def _process_response(self, response, input_data, **kwargs):
+        return json.loads(response)
+
+
+def _fake_stream(content, tokens=17):
+    chunk = MagicMock()
+    chunk.usage = None
+    chunk.choices[0].delta.content = content
+    last = MagicMock()
+    last.usage.total_tokens = tokens
+    last.choices = []
+    return [chunk, last]
+
+
+def test_malformed_responses_are_not_cached(cache):
+    agent = StrictAgent(name="Strict", cache=cache)
+    agent.client = _fake_client(content="not json")
+
+    assert agent.process("same input")["success"] is False
+    assert agent.process("same input")["success"] is False
+    assert agent.client.chat.completions.create.call_count == 2
+    assert cache.stats()["entries"] == 0
+
+    agent.client.chat.completions.create.return_value = _fake_stream("not json")
+    assert list(agent.process_stream("same input")) == ["not json"]
+    assert agent.last_result["success"] is False
+    assert cache.stats()["entries"] == 0
+
+    agent.client.chat.completions.create.return_value = _fake_stream('{"answer": 42}')
+    list(agent.process_stream("same input"))
+    assert agent.last_result["success"] is True
+    assert agent.process("same input")["cached"] is True
@@ -49,5 +49,43 @@ def test_schema_validation():
     else:
         print("❌ Invalid data should have been rejected!")
 
+def test_registry_returns_cached_compiled_validator():
+    """The shared registry compiles each schema once"""
+    from schemas.validator import get_registry
+    registry = get_registry()
+    assert registry.get_validator("problem_schema") is registry.get_validator("problem_schema")
+    assert SchemaValidator().registry is registry
+
+
+def test_registry_hot_reloads_changed_schema(tmp_path):
+    """Schemas are re-read only when their file changes"""
+    from schemas.validator import SchemaRegistry
+    schema_file = tmp_path / "thing.json"
+    schema_file.write_text(json.dumps({"type": "object", "required": ["a"]}), encoding="utf-8")
+    registry = SchemaRegistry(schemas_dir=tmp_path, check_interval=0)
+    first = registry.get_validator("thing")
+    assert registry.get_validator("thing") is first
+    assert registry.validate("thing", {"b": 1})[0] is False
+
+    schema_file.write_text(json.dumps({"type": "object"}), encoding="utf-8")
+    os.utime(schema_file, (os.path.getmtime(schema_file) + 5,) * 2)
+    assert registry.get_validator("thing") is not first
+    assert registry.validate("thing", {"b": 1}) == (True, None)
+
+    schema_file.unlink()
+    assert registry.list_schemas() == []
+    assert registry.validate("thing", {}) == (False, "Schema 'thing' not found")
+
+
+def test_validate_many():
+    """Batch validation returns one result per item"""
+    from schemas.validator import validate_many
+    with open('schemas/example_problem.json', 'r', encoding='utf-8') as f:
+        example_problem = json.load(f)
+    example_problem.setdefault("data", {})
+    results = validate_many("problem_schema", [example_problem, {"problem_type": "INVALID"}])
+    assert results[0] == (True, None)
+    assert results[1][0] is False and results[1][1]
+
 if __name__ == "__main__":
     test_schema_validation() 
\ No newline at end of file
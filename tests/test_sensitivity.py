@@ -0,0 +1,111 @@
+"""
+Tests for LP sensitivity analysis (optimization/sensitivity.py)
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents import stages
+from conftest import SKIS
+from optimization import sensitivity
+from optimization.linear_model import compile_problem, solve
+
+
+# Dieta: minimização com restrição '>=' e igualdade
+DIET = {
+    'sense': 'minimize',
+    'objective': '2*a + 3*b + 4*c',
+    'decision_variables': {n: {'type': 'Real', 'bounds': [0, None]} for n in 'abc'},
+    'constraints': [{'name': 'protein', 'expression': 'a + 2*b + 3*c >= 12'},
+                    {'name': 'fiber', 'expression': '3*a + b + c >= 9'},
+                    {'name': 'total', 'expression': 'a + b + c == 6'}],
+}
+
+
+def _objective(problem, constraint=None, rhs_step=0.0, variable=None, cost_step=0.0):
+    problem = dict(problem, constraints=[dict(c) for c in problem['constraints']])
+    if constraint:
+        for c in problem['constraints']:
+            if c['name'] == constraint:
+                lhs, op, rhs = c['expression'].rsplit(' ', 2)
+                c['expression'] = f"{lhs} {op} {float(rhs) + rhs_step}"
+    if variable:
+        problem['objective'] += f' + {cost_step}*{variable}'
+    return solve(compile_problem(problem))['objective_value']
+
+
+@pytest.mark.parametrize('problem', [SKIS, DIET])
+def test_duals_match_finite_differences(problem):
+    report = solve(compile_problem(problem))['sensitivity']
+    base = _objective(problem)
+    for constraint in problem['constraints']:
+        name = constraint['name']
+        step = 1e-3
+        change = (_objective(problem, name, step) - base) / step
+        assert report['constraints'][name]['dual'] == pytest.approx(change, abs=1e-5)
+
+
+def test_skis_report_and_ranging():
+    result = solve(compile_problem(SKIS))
+    report = result['sensitivity']
+    assert report['binding'] == ['cutting', 'van'] and report['ranging']
+    assert report['constraints']['cutting']['dual'] == pytest.approx(400)
+    assert report['constraints']['van']['dual'] == pytest.approx(2800)
+    assert report['constraints']['molding']['slack'] == pytest.approx(38.1)
+    assert report['constraints']['cutting']['rhs_range'] == pytest.approx([24, 64])
+    assert report['constraints']['molding']['rhs_range'][1] is None
+    # A solução fica ótima enquanto a razão de lucros fica entre 1/3 e 2
+    assert report['variables']['x']['cost_range'] == pytest.approx([4000 / 3, 8000])
+    assert report['variables']['y']['cost_range'] == pytest.approx([3000, 18000])
+    # Dentro do intervalo o dual vale; fora dele o preço-sombra muda
+    assert _objective(SKIS, 'cutting', 12) - _objective(SKIS) == pytest.approx(400 * 12)
+    assert _objective(SKIS, 'cutting', 20) - _objective(SKIS) < 400 * 20
+
+
+def test_greater_equal_ranges_are_in_the_written_direction():
+    report = solve(compile_problem(DIET))['sensitivity']
+    for name in ('protein', 'fiber', 'total'):
+        low, high = report['constraints'][name]['rhs_range']
+        rhs = float(next(c for c in DIET['constraints'] if c['name'] == name)['expression'].split()[-1])
+        assert (low is None or low <= rhs + 1e-9) and (high is None or high >= rhs - 1e-9)
+        dual = report['constraints'][name]['dual']
+        for point in (low, high):
+            if point is not None and abs(point - rhs) > 1e-6:
+                step = 0.5 * (point - rhs)
+                assert (_objective(DIET, name, step) - _objective(DIET)) == pytest.approx(dual * step, abs=1e-6)
+
+
+def test_basis_recovery_matches_solver_marginals():
+    model = compile_problem(DIET)
+    result = solve(model)
+    x = np.array([result['variables'][name] for name in model.variables])
+    recovered = sensitivity.analyze(model, x)
+    for name, entry in result['sensitivity']['constraints'].items():
+        assert recovered['constraints'][name]['dual'] == pytest.approx(entry['dual'], abs=1e-9)
+    for name, entry in result['sensitivity']['variables'].items():
+        assert recovered['variables'][name]['reduced_cost'] == pytest.approx(entry['reduced_cost'], abs=1e-9)
+
+
+def test_mip_results_have_no_sensitivity():
+    problem = dict(SKIS, decision_variables={'x': {'type': 'Integer', 'bounds': [0, None]},
+                                             'y': {'type': 'Integer', 'bounds': [0, 16]}})
+    assert 'sensitivity' not in solve(compile_problem(problem))
+
+
+def test_interpreter_answers_from_the_stored_report(temp_db):
+    context = {'problem': SKIS, 'outputs': {'Mathematician': {'linear': True}}}
+    context['outputs']['Executor'] = stages._executor(context)
+    # Segunda execução vem do cache de soluções e recupera a sensibilidade pela base
+    cached = stages._executor(dict(context, outputs={'Mathematician': {'linear': True}}))
+    assert cached['cache']['hit'] and cached['sensitivity']['binding'] == ['cutting', 'van']
+
+    output = stages._interpreter(context)
+    assert output['binding'] == ['cutting', 'van']
+    assert output['insights'][0].startswith('van is binding')
+    message = stages.build_final_message(dict(context['outputs'], Interpreter=output))
+    assert 'Business Insights' in message and 'molding (38.1)' in message
@@ -0,0 +1,124 @@
+"""
+Tests for canonical fingerprints and the solution cache (optimization/canonical.py, optimization/solution_cache.py)
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pytest
+from scipy import sparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from conftest import make_problem
+from optimization import audit, solution_cache
+from optimization.canonical import fingerprint
+from optimization.linear_model import LinearModel, compile_problem, solve
+from utils import db
+
+
+PRODUCTION = make_problem('100*x + 150*y', ['x + 2*y <= 100', 'x + y <= 80'])
+
+
+@pytest.mark.parametrize('restated', [
+    make_problem('150*b + 100*a', ['a + b <= 80', 'b*2 + a <= 100'], names=('b', 'a')),
+    make_problem('-100*x - 150*y', ['3*x + 6*y <= 300', '80 >= y + x'], sense='minimize'),
+    make_problem('price["x"]*x + price["y"]*y + 7', ['x + 2*y <= cap', 'x + y <= 80'],
+             data={'price': {'x': 100, 'y': 150}, 'cap': 100}),
+])
+def test_restated_models_share_a_fingerprint(restated):
+    assert fingerprint(compile_problem(restated)).hash == fingerprint(compile_problem(PRODUCTION)).hash
+
+
+@pytest.mark.parametrize('different', [
+    make_problem('100*x + 150*y', ['x + 2*y <= 100', 'x + y <= 81']),
+    make_problem('100*x + 150*y', ['x + 2*y <= 100', 'x + y == 80']),
+    make_problem('150*x + 100*y', ['x + 2*y <= 100', 'x + y <= 80']),
+    make_problem('100*x + 150*y', ['x + 2*y <= 100', 'x + y <= 80'], sense='minimize'),
+])
+def test_different_models_get_different_fingerprints(different):
+    assert fingerprint(compile_problem(different)).hash != fingerprint(compile_problem(PRODUCTION)).hash
+
+
+def test_symmetric_equalities_share_a_fingerprint():
+    first = make_problem('x + 2*y', ['x - y == 0', 'x + y <= 10'])
+    assert fingerprint(compile_problem(first)).hash == fingerprint(compile_problem(
+        make_problem('x + 2*y', ['y - x == 0', 'x + y <= 10']))).hash
+
+
+def _random_model(n: int, rng) -> LinearModel:
+    A = sparse.random_array((n // 2, n), density=5 / n, rng=rng, format='csr')
+    A.data = np.round(A.data * 10) + 1
+    E = sparse.random_array((n // 20, n), density=5 / n, rng=rng, format='csr')
+    E.data = np.round(E.data * 10) - 5
+    return LinearModel(tuple(f'x{j}' for j in range(n)), 'maximize', rng.integers(1, 20, n).astype(float), 0.0,
+                       sparse.csr_array(A), rng.integers(10, 100, n // 2).astype(float), (),
+                       sparse.csr_array(E), rng.integers(-5, 5, n // 20).astype(float), (),
+                       np.zeros(n), np.full(n, np.inf), np.zeros(n))
+
+
+def test_large_models_fingerprint_fast_and_canonically():
+    rng = np.random.default_rng(0)
+    n = 50_000
+    model = _random_model(n, rng)
+    start = time.perf_counter()
+    key = fingerprint(model)
+    assert time.perf_counter() - start < 2
+
+    # Mesmo modelo com colunas e linhas permutadas, linhas reescaladas e igualdades com sinal trocado
+    cols, rows, eqs = rng.permutation(n), rng.permutation(n // 2), rng.permutation(n // 20)
+    scale, flip = rng.uniform(0.5, 3, n // 2), rng.choice([-2.0, -1.0, 0.5, 1.0], n // 20)
+    restated = model._replace(
+        variables=tuple(model.variables[j] for j in cols), c=model.c[cols], lb=model.lb[cols],
+        ub=model.ub[cols], integrality=model.integrality[cols],
+        A_ub=sparse.csr_array(sparse.diags_array(scale) @ model.A_ub[rows][:, cols]), b_ub=model.b_ub[rows] * scale,
+        A_eq=sparse.csr_array(sparse.diags_array(flip) @ model.A_eq[eqs][:, cols]), b_eq=model.b_eq[eqs] * flip)
+    restated_key = fingerprint(restated)
+    assert restated_key.hash == key.hash
+    # Colunas canônicas equivalentes (variáveis intercambiáveis podem trocar de lugar)
+    assert np.array_equal(restated.c[list(restated_key.columns)], model.c[list(key.columns)])
+
+
+def test_cached_solution_is_mapped_onto_renamed_variables(temp_db):
+    calls = []
+
+    def solver(model):
+        calls.append(model)
+        return solve(model)
+
+    first = solution_cache.solve_cached(compile_problem(PRODUCTION), solver, 'LP')
+    assert first['cache']['hit'] is False and first['objective_value'] == pytest.approx(9000)
+
+    renamed = compile_problem(make_problem('150*b + 100*a + 5', ['a + b <= 80', 'b*2 + a <= 100'], names=('b', 'a')))
+    second = solution_cache.solve_cached(renamed, solver, 'LP')
+    assert len(calls) == 1
+    assert second['solver'] == solution_cache.CACHE_SOLVER
+    assert second['variables'] == pytest.approx({'a': first['variables']['x'], 'b': first['variables']['y']})
+    assert second['objective_value'] == pytest.approx(9005)
+    assert second['solver_objective'] == pytest.approx(9005)
+
+    stats = db.solution_cache_stats()
+    assert (stats['entries'], stats['hits'], stats['misses']) == (1, 1, 1)
+    assert db.list_cached_solutions()[0]['hits'] == 1
+    db.clear_solution_cache()
+    assert db.solution_cache_stats()['entries'] == 0
+
+
+def test_cached_hit_of_a_restated_sense_passes_the_audit(temp_db):
+    maximize = compile_problem(PRODUCTION)
+    minimize = compile_problem(make_problem('-100*x - 150*y + 3', ['x + 2*y <= 100', 'x + y <= 80'], sense='minimize'))
+    first = solution_cache.solve_cached(maximize, solve)
+    hit = solution_cache.solve_cached(minimize, solve)
+    assert hit['cache']['hit'] and first['cache']['hit'] is False
+    assert hit['objective_value'] == pytest.approx(-9000 + 3)
+    assert hit['solver_objective'] == pytest.approx(hit['objective_value'])
+    assert audit.audit(minimize, hit)['passed']
+
+
+def test_only_optimal_results_are_cached(temp_db):
+    infeasible = compile_problem(make_problem('x + y', ['x + y <= 1', 'x >= 2']))
+    result = solution_cache.solve_cached(infeasible, solve)
+    assert result['status'] == 'infeasible'
+    assert db.solution_cache_stats()['entries'] == 0
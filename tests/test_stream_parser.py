@@ -0,0 +1,82 @@
+"""
+Tests for streaming agent responses and incremental JSON field extraction
+"""
+
+import json
+import pytest
+import sys
+import os
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.stream_parser import JSONFieldStreamer
+from agents.meaning_agent import MeaningAgent
+from agents.response_cache import ResponseCache
+
+
+SAMPLE = {
+    "problem_type": "LP",
+    "objective": "3*x + 4*y",
+    "business_context": {"clarification": "nested, must be ignored"},
+    "clarification": "Olá! \"Lucro\" máximo:\n x ≤ 10 \\ ok 😀",
+    "confidence": 0.9
+}
+
+
+def _feed_in_chunks(text, size):
+    streamer = JSONFieldStreamer("clarification")
+    pieces = [streamer.feed(text[i:i + size]) for i in range(0, len(text), size)]
+    return streamer, "".join(pieces)
+
+
+@pytest.mark.parametrize("ensure_ascii", [True, False])
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 1000])
+def test_extracts_field_for_any_chunking(ensure_ascii, size):
+    text = json.dumps(SAMPLE, ensure_ascii=ensure_ascii, indent=2)
+    streamer, extracted = _feed_in_chunks(text, size)
+    assert extracted == SAMPLE["clarification"]
+    assert streamer.done
+
+
+def test_emits_text_before_document_is_complete():
+    streamer = JSONFieldStreamer("clarification")
+    assert streamer.feed('```json\n{"problem_type": "LP", "clarification": "Hel') == "Hel"
+    assert streamer.feed('lo') == "lo"
+    assert not streamer.done
+
+
+def test_missing_field_emits_nothing():
+    streamer, extracted = _feed_in_chunks(json.dumps({"a": "clarification"}), 4)
+    assert extracted == ""
+    assert not streamer.done
+
+
+def _chunk(content=None, usage=None):
+    choices = [] if content is None else [SimpleNamespace(delta=SimpleNamespace(content=content))]
+    return SimpleNamespace(choices=choices, usage=usage)
+
+
+def test_meaning_agent_streams_clarification(tmp_path):
+    agent = MeaningAgent()
+    agent.cache = ResponseCache(path=str(tmp_path / "cache.db"))
+    payload = json.dumps({"clarification": "Tell me more about your products.", "problem_type": "Unknown"})
+    agent.client = MagicMock()
+    agent.client.chat.completions.create.return_value = iter(
+        [_chunk(payload[i:i + 5]) for i in range(0, len(payload), 5)] +
+        [_chunk(usage=SimpleNamespace(total_tokens=30))]
+    )
+
+    deltas = list(agent.stream_clarification("Hello"))
+
+    assert len(deltas) > 1
+    assert "".join(deltas) == "Tell me more about your products."
+    assert agent.last_result["success"]
+    assert agent.last_result["tokens_used"] == 30
+    assert agent.last_result["result"]["clarification"] == "Tell me more about your products."
+
+    # A repeated request is replayed from the cache in one piece
+    assert list(agent.stream_clarification("Hello")) == ["Tell me more about your products."]
+    assert agent.last_result["cached"] is True
+    assert agent.client.chat.completions.create.call_count == 1
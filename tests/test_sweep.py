@@ -0,0 +1,127 @@
+"""
+Tests for batched parameter sweeps (optimization/sweep.py)
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import conftest
+from agents import stages
+from optimization import sweep
+from optimization.linear_model import ModelError, solve_problem
+
+
+# Capacidades e lucros vêm de 'data' (cada restrição lê a capacidade com o seu nome) para variarem por cenário
+SKIS = dict(conftest.SKIS,
+            objective='profit["skis"] * x + profit["snowboards"] * y',
+            data={'molding': 115.5, 'cutting': 51, 'van': 48, 'profit': {'skis': 6000, 'snowboards': 4000}},
+            constraints=[dict(c, expression=f"{c['expression'].split(' <= ')[0]} <= {c['name']}")
+                         for c in conftest.SKIS['constraints']])
+
+
+def _with_data(**changes):
+    problem = dict(SKIS, data=dict(SKIS['data'], **changes))
+    return solve_problem(problem)['objective_value']
+
+
+def test_grid_matches_individual_solves():
+    spec = {'parameters': [{'path': 'molding', 'values': [100, 115.5, 130]},
+                           {'path': 'profit', 'scale': [0.9, 1.0, 1.1]}]}
+    result = sweep.run_sweep(SKIS, spec, workers=1)
+    assert result.affine and len(result.status) == 9
+    assert result.parameters == ['molding', 'profit*']
+    for (molding, factor), value in zip(result.points, result.objective):
+        profit = {k: v * factor for k, v in SKIS['data']['profit'].items()}
+        assert value == pytest.approx(_with_data(molding=molding, profit=profit))
+
+    frame = result.to_frame()
+    assert list(frame.columns) == ['molding', 'profit*', 'status', 'objective_value', 'x', 'y']
+    assert (frame['status'] == 'optimal').all()
+
+
+def test_non_affine_parameters_fall_back_to_compiling_each_scenario():
+    problem = dict(SKIS, data=dict(SKIS['data'], k=2), constraints=SKIS['constraints'] + [
+        {'expression': 'k * k * x <= 40'}])
+    result = sweep.run_sweep(problem, {'parameters': [{'path': 'k', 'values': [1, 2, 4]}]}, workers=1)
+    assert not result.affine
+    for (k,), value in zip(result.points, result.objective):
+        assert value == pytest.approx(solve_problem(dict(problem, data=dict(problem['data'], k=k)))['objective_value'])
+
+
+def test_infeasible_scenarios_are_reported_per_row():
+    problem = dict(SKIS, data=dict(SKIS['data'], demand=10),
+                   constraints=SKIS['constraints'] + [{'expression': 'x + y >= demand'}])
+    result = sweep.run_sweep(problem, {'parameters': [{'path': 'demand', 'values': [10, 1000]}]}, workers=1)
+    assert [sweep.STATUSES[s] for s in result.status] == ['optimal', 'infeasible']
+    assert np.isnan(result.objective[1])
+    assert result.summary()['statuses'] == {'optimal': 1, 'infeasible': 1}
+
+
+def test_solver_exceptions_are_reported_per_row(monkeypatch):
+    real_solve = sweep.solve
+
+    def flaky(model, *args, **kwargs):
+        if model.b_ub[0] == 100:
+            raise RuntimeError('solver crashed')
+        return real_solve(model, *args, **kwargs)
+
+    monkeypatch.setattr(sweep, 'solve', flaky)
+    result = sweep.run_sweep(SKIS, {'parameters': [{'path': 'molding', 'values': [100, 115.5]}]}, workers=1)
+    assert [sweep.STATUSES[s] for s in result.status] == ['error', 'optimal']
+    assert result.objective[1] == pytest.approx(_with_data(molding=115.5))
+
+
+def test_sample_mode_and_process_pool():
+    spec = {'mode': 'sample', 'samples': 40, 'seed': 7,
+            'parameters': [{'path': 'van', 'low': 40, 'high': 60}, {'path': 'cutting', 'values': [45, 51]}]}
+    done = []
+    result = sweep.run_sweep(SKIS, spec, workers=2, on_progress=lambda n, total: done.append((n, total)))
+    assert result.points.shape == (40, 2) and done[-1] == (40, 40)
+    assert np.all((result.points[:, 0] >= 40) & (result.points[:, 0] <= 60))
+    van, cutting = result.points[5]
+    assert result.objective[5] == pytest.approx(_with_data(van=van, cutting=cutting))
+
+
+def test_invalid_sweeps():
+    with pytest.raises(ModelError):
+        sweep.scenario_grid(SKIS, {'parameters': []})
+    with pytest.raises(ModelError):
+        sweep.scenario_grid(SKIS, {'parameters': [{'path': 'missing', 'values': [1]}]})
+    with pytest.raises(ModelError):
+        sweep.scenario_grid(SKIS, {'parameters': [{'path': 'profit', 'values': [1]}]})
+    with pytest.raises(ModelError):
+        sweep.scenario_grid(SKIS, {'parameters': [{'path': 'van', 'low': 1, 'high': 2}]})
+    # Chaves ausentes e listas vazias viram ModelError (a página mostra a mensagem)
+    for entry in ({'values': [1]}, {'path': 'van'}, {'path': 'profit', 'scale': []}, {'path': 'van', 'values': []}):
+        with pytest.raises(ModelError):
+            sweep.scenario_grid(SKIS, {'parameters': [entry]})
+    with pytest.raises(ModelError, match='no scenarios'):
+        sweep.scenario_grid(SKIS, {'mode': 'sample', 'samples': 0, 'parameters': [{'path': 'van', 'values': [1]}]})
+    with pytest.raises(ModelError, match='limit'):
+        sweep.scenario_grid(SKIS, {'parameters': [{'path': p, 'values': list(range(1000))} for p in ('van', 'cutting')]})
+
+
+def test_scenarios_get_a_bounded_time_limit(monkeypatch):
+    limits = []
+    real_solve = sweep.solve
+    monkeypatch.setattr(sweep, 'solve', lambda model, time_limit=None, **kwargs:
+                        limits.append(time_limit) or real_solve(model, time_limit, **kwargs))
+    sweep.run_sweep(SKIS, {'parameters': [{'path': 'van', 'values': [40, 48]}]}, workers=1)
+    sweep.run_sweep(SKIS, {'parameters': [{'path': 'van', 'values': [40]}]}, workers=1, time_limit=600)
+    assert limits == [sweep.SCENARIO_TIME_LIMIT] * 3
+
+
+def test_executor_stores_the_sweep_table(temp_db):
+    context = {'problem': SKIS, 'outputs': {'Mathematician': {'linear': True}},
+               'sweep': {'parameters': [{'path': 'van', 'values': [40, 48, 56]}]}}
+    output = stages._executor(context)
+    assert output['scenarios'] == 3 and output['statuses'] == {'optimal': 3}
+    restored = sweep.load(output)
+    assert restored.variables == ('x', 'y')
+    assert restored.objective[1] == pytest.approx(solve_problem(SKIS)['objective_value'])
+    assert 'Scenario sweep complete' in stages.build_final_message({'Executor': output})
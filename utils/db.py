@@ -1,21 +1,129 @@
+import hashlib
+import io
+import json
+import re
 import sqlite3
+import zlib
+import threading
+import time
+import queue
 from contextlib import contextmanager
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 import os
 
+import numpy as np
+
 DB_PATH = os.path.join(os.path.dirname(__file__), '..', 'optimind.db')
+POOL_SIZE = int(os.getenv('OPTIMIND_DB_POOL_SIZE', '8'))
+BUSY_TIMEOUT_MS = 5000
+
+class ConnectionPool:
+    """Bounded pool of WAL-mode connections to one SQLite file"""
+
+    def __init__(self, path: str, max_size: int = POOL_SIZE):
+        self.path = path
+        self.max_size = max_size
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False,
+                               cached_statements=256)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA busy_timeout={BUSY_TIMEOUT_MS}')
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.max_size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+        if create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        return self._idle.get(timeout=BUSY_TIMEOUT_MS / 1000)
+
+    def release(self, conn: sqlite3.Connection):
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    def close(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+_local = threading.local()
+
+def _get_pool() -> ConnectionPool:
+    path = os.path.abspath(DB_PATH)
+    with _pools_lock:
+        pool = _pools.get(path)
+        if pool is None:
+            pool = _pools[path] = ConnectionPool(path)
+        return pool
 
 @contextmanager
 def get_conn():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
+    """Borrow a pooled connection; nested calls in the same thread share it"""
+    held = getattr(_local, 'conn', None)
+    if held is not None:
+        yield held
+        return
+    pool = _get_pool()
+    conn = pool.acquire()
+    _local.conn = conn
     try:
         yield conn
     finally:
-        conn.close()
+        _local.conn = None
+        pool.release(conn)
 
-def init_db():
+@contextmanager
+def transaction():
+    """Run the enclosed statements in one transaction (one commit); nests inside an outer transaction"""
     with get_conn() as conn:
+        if conn.in_transaction:
+            yield conn
+            return
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+def close_all():
+    """Close idle pooled connections (e.g. before switching DB_PATH)"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+def init_db():
+    with transaction() as conn:
         c = conn.cursor()
         c.execute('''CREATE TABLE IF NOT EXISTS jobs (
             id TEXT PRIMARY KEY,
@@ -39,50 +147,608 @@ def init_db():
             json_output TEXT,
             timestamp TEXT
         )''')
-        conn.commit()
+    migrate()
 
-def insert_job(job: Dict[str, Any]):
+def _migration_001_indexes(conn: sqlite3.Connection):
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_conversations_job_ts ON conversations (job_id, timestamp)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_agent_outputs_job_ts ON agent_outputs (job_id, timestamp)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_created_at ON jobs (created_at DESC)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at DESC)')
+
+def _migration_002_keyset_indexes(conn: sqlite3.Connection):
+    # id como desempate para paginação keyset estável
+    conn.execute('DROP INDEX IF EXISTS idx_jobs_created_at')
+    conn.execute('DROP INDEX IF EXISTS idx_jobs_status')
+    conn.execute('CREATE INDEX idx_jobs_created_at ON jobs (created_at DESC, id DESC)')
+    conn.execute('CREATE INDEX idx_jobs_status ON jobs (status, created_at DESC, id DESC)')
+
+def _migration_003_sequences(conn: sqlite3.Connection):
+    conn.execute('''CREATE TABLE IF NOT EXISTS sequences (
+        name TEXT PRIMARY KEY,
+        value INTEGER NOT NULL
+    )''')
+    # Continua a numeração antiga (len(jobs) + 1)
+    conn.execute("INSERT OR IGNORE INTO sequences (name, value) SELECT 'jobs', COUNT(*) FROM jobs")
+
+# rowid do índice FTS: jobs.rowid * 4 + 0/1 (user_input/final_message), conversations.id * 4 + 2
+_SEARCH_TRIGGERS = [
+    '''CREATE TRIGGER IF NOT EXISTS jobs_search_insert AFTER INSERT ON jobs BEGIN
+        INSERT INTO job_search (rowid, body, job_id, source) VALUES (new.rowid * 4, new.user_input, new.id, 'user_input');
+        INSERT INTO job_search (rowid, body, job_id, source) VALUES (new.rowid * 4 + 1, new.final_message, new.id, 'final_message');
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS jobs_search_update AFTER UPDATE OF id, user_input, final_message ON jobs BEGIN
+        DELETE FROM job_search WHERE rowid IN (old.rowid * 4, old.rowid * 4 + 1);
+        INSERT INTO job_search (rowid, body, job_id, source) VALUES (new.rowid * 4, new.user_input, new.id, 'user_input');
+        INSERT INTO job_search (rowid, body, job_id, source) VALUES (new.rowid * 4 + 1, new.final_message, new.id, 'final_message');
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS jobs_search_delete AFTER DELETE ON jobs BEGIN
+        DELETE FROM job_search WHERE rowid IN (old.rowid * 4, old.rowid * 4 + 1);
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS conversations_search_insert AFTER INSERT ON conversations BEGIN
+        INSERT INTO job_search (rowid, body, job_id, source) VALUES (new.id * 4 + 2, new.message, new.job_id, 'conversation');
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS conversations_search_update AFTER UPDATE OF job_id, message ON conversations BEGIN
+        DELETE FROM job_search WHERE rowid = old.id * 4 + 2;
+        INSERT INTO job_search (rowid, body, job_id, source) VALUES (new.id * 4 + 2, new.message, new.job_id, 'conversation');
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS conversations_search_delete AFTER DELETE ON conversations BEGIN
+        DELETE FROM job_search WHERE rowid = old.id * 4 + 2;
+    END''',
+]
+
+def _migration_004_full_text_search(conn: sqlite3.Connection):
+    conn.execute('''CREATE VIRTUAL TABLE IF NOT EXISTS job_search USING fts5(
+        body, job_id UNINDEXED, source UNINDEXED,
+        tokenize = 'porter unicode61 remove_diacritics 2'
+    )''')
+    for trigger in _SEARCH_TRIGGERS:
+        conn.execute(trigger)
+    conn.execute('''INSERT INTO job_search (rowid, body, job_id, source)
+                    SELECT rowid * 4, user_input, id, 'user_input' FROM jobs''')
+    conn.execute('''INSERT INTO job_search (rowid, body, job_id, source)
+                    SELECT rowid * 4 + 1, final_message, id, 'final_message' FROM jobs''')
+    conn.execute('''INSERT INTO job_search (rowid, body, job_id, source)
+                    SELECT id * 4 + 2, message, job_id, 'conversation' FROM conversations''')
+
+def _migration_005_blob_store(conn: sqlite3.Connection):
+    conn.execute('''CREATE TABLE IF NOT EXISTS blobs (
+        hash TEXT PRIMARY KEY,
+        codec TEXT NOT NULL,
+        data BLOB NOT NULL,
+        size INTEGER NOT NULL
+    )''')
+    conn.execute('ALTER TABLE agent_outputs ADD COLUMN blob_hash TEXT')
+    rows = conn.execute('SELECT id, json_output FROM agent_outputs').fetchall()
+    for row in rows:
+        blob_hash = _store_output(conn, row['json_output'])
+        if blob_hash:
+            conn.execute('UPDATE agent_outputs SET json_output = NULL, blob_hash = ? WHERE id = ?', (blob_hash, row['id']))
+
+def _migration_006_job_queue(conn: sqlite3.Connection):
+    conn.execute('''CREATE TABLE IF NOT EXISTS job_queue (
+        job_id TEXT PRIMARY KEY,
+        payload TEXT NOT NULL,
+        state TEXT NOT NULL DEFAULT 'queued',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        worker TEXT,
+        lease_until REAL,
+        enqueued_at REAL NOT NULL,
+        finished_at REAL,
+        error TEXT
+    )''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_job_queue_state ON job_queue(state, enqueued_at)')
+
+def _migration_007_checkpoints(conn: sqlite3.Connection):
+    conn.execute('ALTER TABLE agent_outputs ADD COLUMN input_hash TEXT')
+    conn.execute('''CREATE INDEX IF NOT EXISTS idx_agent_outputs_checkpoint
+                    ON agent_outputs(job_id, agent_name, input_hash)''')
+
+def _migration_008_solver_stats(conn: sqlite3.Connection):
+    conn.execute('''CREATE TABLE IF NOT EXISTS solver_stats (
+        problem_type TEXT NOT NULL,
+        solver TEXT NOT NULL,
+        races INTEGER NOT NULL DEFAULT 0,
+        wins INTEGER NOT NULL DEFAULT 0,
+        win_seconds REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (problem_type, solver)
+    )''')
+
+def _migration_009_solution_cache(conn: sqlite3.Connection):
+    conn.execute('''CREATE TABLE IF NOT EXISTS solution_cache (
+        fingerprint TEXT PRIMARY KEY,
+        problem_type TEXT,
+        objective_value REAL,
+        solution TEXT NOT NULL,
+        solver TEXT,
+        solve_time REAL,
+        created_at REAL NOT NULL,
+        last_hit REAL,
+        hits INTEGER NOT NULL DEFAULT 0
+    )''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS solution_cache_stats (
+        name TEXT PRIMARY KEY,
+        value INTEGER
+    )''')
+    conn.execute("INSERT OR IGNORE INTO solution_cache_stats (name, value) VALUES ('hits', 0), ('misses', 0)")
+
+# Migrações aplicadas em ordem; PRAGMA user_version guarda quantas já rodaram
+MIGRATIONS = [
+    _migration_001_indexes,
+    _migration_002_keyset_indexes,
+    _migration_003_sequences,
+    _migration_004_full_text_search,
+    _migration_005_blob_store,
+    _migration_006_job_queue,
+    _migration_007_checkpoints,
+    _migration_008_solver_stats,
+    _migration_009_solution_cache,
+]
+
+# --- Armazenamento endereçado por conteúdo dos outputs dos agentes ---
+# Cada documento JSON é gravado comprimido em `blobs`, indexado pelo sha256 da sua forma canônica.
+# Sub-documentos grandes viram blobs próprios ({"$blob": hash}), então cópias idênticas
+# (ex.: original_problem do Researcher == output do Meaning) são armazenadas uma única vez.
+BLOB_MIN_SIZE = 256
+BLOB_REF = '$blob'
+
+try:
+    import zstandard
+    _zstd_compressor = zstandard.ZstdCompressor(level=10)
+    _zstd_decompressor = zstandard.ZstdDecompressor()
+except ImportError:
+    zstandard = None
+
+def _compress(data: bytes) -> Tuple[str, bytes]:
+    if zstandard is not None:
+        return 'zstd', _zstd_compressor.compress(data)
+    return 'zlib', zlib.compress(data, 9)
+
+def _decompress(codec: str, data: bytes) -> bytes:
+    if codec.endswith('zstd'):
+        if zstandard is None:
+            raise RuntimeError('zstandard is required to read this output')
+        return _zstd_decompressor.decompress(data)
+    return zlib.decompress(data)
+
+def _put_blob(conn: sqlite3.Connection, value: Any, size: Optional[int] = None) -> str:
+    canonical = json.dumps(value, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    blob_hash = hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+    if conn.execute('SELECT 1 FROM blobs WHERE hash = ?', (blob_hash,)).fetchone() is None:
+        # Guarda a ordem original das chaves para exibição; o hash usa a forma canônica
+        text = json.dumps(value, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+        codec, data = _compress(text)
+        conn.execute('INSERT INTO blobs (hash, codec, data, size) VALUES (?, ?, ?, ?)',
+                     (blob_hash, codec, data, size or len(text)))
+    return blob_hash
+
+def _store_json(conn: sqlite3.Connection, value: Any, top: bool = True, size: Optional[int] = None) -> Any:
+    if isinstance(value, dict):
+        value = {key: _store_json(conn, item, top=False) for key, item in value.items()}
+    elif isinstance(value, list):
+        value = [_store_json(conn, item, top=False) for item in value]
+    else:
+        return value
+    if top:
+        return _put_blob(conn, value, size)
+    if len(json.dumps(value, separators=(',', ':'), ensure_ascii=False)) >= BLOB_MIN_SIZE:
+        return {BLOB_REF: _put_blob(conn, value)}
+    return value
+
+def _store_output(conn: sqlite3.Connection, json_output: Optional[str]) -> Optional[str]:
+    """Store a JSON output as blobs and return its hash (None if it is not a JSON document)"""
+    if not json_output:
+        return None
+    try:
+        value = json.loads(json_output)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(value, (dict, list)):
+        return None
+    # size guarda o tamanho do documento completo (com os sub-blobs expandidos)
+    return _store_json(conn, value, size=len(json.dumps(value, separators=(',', ':'), ensure_ascii=False).encode('utf-8')))
+
+def _load_json(conn: sqlite3.Connection, blob_hash: str, cache: Dict[str, Any]) -> Any:
+    if blob_hash not in cache:
+        row = conn.execute('SELECT codec, data FROM blobs WHERE hash = ?', (blob_hash,)).fetchone()
+        if row is None:
+            raise KeyError(f"Missing blob {blob_hash}")
+        cache[blob_hash] = _resolve_refs(conn, json.loads(_decompress(row['codec'], row['data'])), cache)
+    return cache[blob_hash]
+
+def _resolve_refs(conn: sqlite3.Connection, value: Any, cache: Dict[str, Any]) -> Any:
+    if isinstance(value, dict):
+        if len(value) == 1 and isinstance(value.get(BLOB_REF), str):
+            return _load_json(conn, value[BLOB_REF], cache)
+        return {key: _resolve_refs(conn, item, cache) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_resolve_refs(conn, item, cache) for item in value]
+    return value
+
+def _inflate_output(conn: sqlite3.Connection, row: sqlite3.Row, cache: Dict[str, Any]) -> Dict[str, Any]:
+    output = dict(row)
+    blob_hash = output.pop('blob_hash', None)
+    if blob_hash:
+        output['json_output'] = json.dumps(_load_json(conn, blob_hash, cache), ensure_ascii=False)
+    return output
+
+def migrate():
+    with transaction() as conn:
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+        for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+            migration(conn)
+            conn.execute(f'PRAGMA user_version = {number}')
+
+def explain_query_plan(sql: str, params: tuple = ()) -> List[str]:
     with get_conn() as conn:
-        c = conn.cursor()
-        c.execute('''INSERT INTO jobs (id, created_at, user_input, job_title, status, final_message)
-                     VALUES (?, ?, ?, ?, ?, ?)''',
-                  (job['id'], job['created_at'], job['user_input'], job['job_title'], job['status'], job.get('final_message', '')))
-        conn.commit()
+        return [row['detail'] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}', params)]
 
-def insert_conversation(job_id: str, sender: str, message: str, timestamp: str):
+def schema_version() -> int:
     with get_conn() as conn:
-        c = conn.cursor()
-        c.execute('''INSERT INTO conversations (job_id, sender, message, timestamp)
-                     VALUES (?, ?, ?, ?)''', (job_id, sender, message, timestamp))
-        conn.commit()
+        return conn.execute('PRAGMA user_version').fetchone()[0]
+
+def insert_job(job: Dict[str, Any]):
+    with transaction() as conn:
+        conn.execute('''INSERT INTO jobs (id, created_at, user_input, job_title, status, final_message)
+                        VALUES (?, ?, ?, ?, ?, ?)''',
+                     (job['id'], job['created_at'], job['user_input'], job['job_title'], job['status'], job.get('final_message', '')))
+
+def insert_conversation(job_id: str, sender: str, message: str, timestamp: str):
+    with transaction() as conn:
+        conn.execute('''INSERT INTO conversations (job_id, sender, message, timestamp)
+                        VALUES (?, ?, ?, ?)''', (job_id, sender, message, timestamp))
+
+def insert_agent_output(job_id: str, agent_name: str, json_output: str, timestamp: str,
+                        input_hash: Optional[str] = None):
+    """Insert an agent output; input_hash marks it as a checkpoint of the stage for that input"""
+    with transaction() as conn:
+        blob_hash = _store_output(conn, json_output)
+        conn.execute('''INSERT INTO agent_outputs (job_id, agent_name, json_output, blob_hash, timestamp, input_hash)
+                        VALUES (?, ?, ?, ?, ?, ?)''',
+                     (job_id, agent_name, None if blob_hash else json_output, blob_hash, timestamp, input_hash))
 
-def insert_agent_output(job_id: str, agent_name: str, json_output: str, timestamp: str):
+def get_checkpoint(job_id: str, agent_name: str, input_hash: str) -> Optional[str]:
+    """Latest output of a job's stage computed from the given input hash (JSON string), or None"""
     with get_conn() as conn:
-        c = conn.cursor()
-        c.execute('''INSERT INTO agent_outputs (job_id, agent_name, json_output, timestamp)
-                     VALUES (?, ?, ?, ?)''', (job_id, agent_name, json_output, timestamp))
-        conn.commit()
+        row = conn.execute('''SELECT * FROM agent_outputs WHERE job_id = ? AND agent_name = ? AND input_hash = ?
+                              ORDER BY id DESC LIMIT 1''', (job_id, agent_name, input_hash)).fetchone()
+        return _inflate_output(conn, row, {})['json_output'] if row else None
+
+def save_job_bundle(job: Dict[str, Any], conversations: List[Dict[str, Any]], outputs: List[Dict[str, Any]]):
+    """Insert a job with its chat messages and agent outputs in one transaction
+
+    conversations: dicts with sender, message, timestamp
+    outputs: dicts with agent_name, json_output, timestamp
+    """
+    with transaction() as conn:
+        insert_job(job)
+        conn.executemany('''INSERT INTO conversations (job_id, sender, message, timestamp)
+                            VALUES (?, ?, ?, ?)''',
+                         [(job['id'], m['sender'], m['message'], m['timestamp']) for m in conversations])
+        rows = []
+        for o in outputs:
+            blob_hash = _store_output(conn, o['json_output'])
+            rows.append((job['id'], o['agent_name'], None if blob_hash else o['json_output'], blob_hash, o['timestamp']))
+        conn.executemany('''INSERT INTO agent_outputs (job_id, agent_name, json_output, blob_hash, timestamp)
+                            VALUES (?, ?, ?, ?, ?)''', rows)
 
 def get_jobs() -> List[Dict[str, Any]]:
     with get_conn() as conn:
-        c = conn.cursor()
-        c.execute('SELECT * FROM jobs ORDER BY created_at DESC')
-        rows = c.fetchall()
+        rows = conn.execute('SELECT * FROM jobs ORDER BY created_at DESC').fetchall()
         return [dict(row) for row in rows]
 
+JOB_COLUMNS = ('id', 'created_at', 'user_input', 'job_title', 'status', 'final_message')
+JOB_LIST_COLUMNS = ('id', 'created_at', 'job_title', 'status')
+
+def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    with get_conn() as conn:
+        row = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return dict(row) if row else None
+
+def get_latest_job() -> Optional[Dict[str, Any]]:
+    with get_conn() as conn:
+        row = conn.execute('SELECT * FROM jobs ORDER BY created_at DESC, id DESC LIMIT 1').fetchone()
+        return dict(row) if row else None
+
+def next_job_number() -> int:
+    """Atomically reserve the next job number (safe across sessions and processes)"""
+    with transaction() as conn:
+        conn.execute("UPDATE sequences SET value = value + 1 WHERE name = 'jobs'")
+        return conn.execute("SELECT value FROM sequences WHERE name = 'jobs'").fetchone()[0]
+
+def list_jobs(filters: Optional[Dict[str, Any]] = None, sort: str = 'newest', cursor: Optional[List[str]] = None,
+              limit: int = 50, columns: Tuple[str, ...] = JOB_LIST_COLUMNS) -> Dict[str, Any]:
+    """Page through jobs with filters evaluated in SQL and keyset pagination
+
+    filters: status (list), title (substring), created_from / created_to (ISO strings, to is exclusive)
+    sort: 'newest' or 'oldest'
+    cursor: next_cursor returned by the previous page (None for the first page)
+    Returns {'jobs': [...], 'next_cursor': [created_at, id] or None}
+    """
+    unknown = set(columns) - set(JOB_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown job columns: {sorted(unknown)}")
+    if sort not in ('newest', 'oldest'):
+        raise ValueError(f"Unknown sort order: {sort}")
+    filters = filters or {}
+    selected = list(dict.fromkeys(('created_at', 'id') + tuple(columns)))
+    where, params = [], []
+    if filters.get('status'):
+        where.append(f"status IN ({', '.join('?' * len(filters['status']))})")
+        params.extend(filters['status'])
+    if filters.get('title'):
+        where.append("job_title LIKE ? ESCAPE '\\'")
+        escaped = filters['title'].replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        params.append(f"%{escaped}%")
+    if filters.get('created_from'):
+        where.append('created_at >= ?')
+        params.append(filters['created_from'])
+    if filters.get('created_to'):
+        where.append('created_at < ?')
+        params.append(filters['created_to'])
+    direction, comparison = ('DESC', '<') if sort == 'newest' else ('ASC', '>')
+    if cursor:
+        where.append(f'(created_at, id) {comparison} (?, ?)')
+        params.extend(cursor)
+    sql = f"SELECT {', '.join(selected)} FROM jobs"
+    if where:
+        sql += ' WHERE ' + ' AND '.join(where)
+    sql += f' ORDER BY created_at {direction}, id {direction} LIMIT ?'
+    params.append(limit + 1)
+    with get_conn() as conn:
+        rows = [dict(row) for row in conn.execute(sql, params)]
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = [rows[-1]['created_at'], rows[-1]['id']]
+    return {
+        'jobs': [{col: row[col] for col in columns} for row in rows],
+        'next_cursor': next_cursor,
+    }
+
+def list_job_statuses() -> List[str]:
+    with get_conn() as conn:
+        return [row[0] for row in conn.execute('SELECT DISTINCT status FROM jobs ORDER BY status')]
+
+def _fts_query(text: str) -> str:
+    # Cada palavra vira um termo entre aspas com prefixo, evitando erros de sintaxe do FTS5
+    words = re.findall(r'\w+', text)
+    return ' '.join(f'"{word}"*' for word in words)
+
+def search_jobs(query: str, limit: int = 20) -> List[Dict[str, Any]]:
+    """Full-text search over job inputs, final messages and chat messages
+
+    Returns one entry per job (its best match), ranked by bm25, with a highlighted snippet.
+    """
+    fts_query = _fts_query(query)
+    if not fts_query:
+        return []
+    sql = '''WITH hits AS (
+                 SELECT job_id, source, snippet(job_search, 0, '**', '**', '…', 12) AS snippet,
+                        bm25(job_search) AS score
+                 FROM job_search WHERE job_search MATCH ?
+             ),
+             ranked AS (
+                 SELECT *, ROW_NUMBER() OVER (PARTITION BY job_id ORDER BY score) AS position FROM hits
+             )
+             SELECT j.id, j.created_at, j.job_title, j.status, r.source, r.snippet, r.score
+             FROM ranked r JOIN jobs j ON j.id = r.job_id
+             WHERE r.position = 1
+             ORDER BY r.score
+             LIMIT ?'''
+    with get_conn() as conn:
+        return [dict(row) for row in conn.execute(sql, (fts_query, limit))]
+
 def get_conversations(job_id: str) -> List[Dict[str, Any]]:
     with get_conn() as conn:
-        c = conn.cursor()
-        c.execute('SELECT * FROM conversations WHERE job_id = ? ORDER BY timestamp', (job_id,))
-        rows = c.fetchall()
+        rows = conn.execute('SELECT * FROM conversations WHERE job_id = ? ORDER BY timestamp', (job_id,)).fetchall()
         return [dict(row) for row in rows]
 
 def get_agent_outputs(job_id: str) -> List[Dict[str, Any]]:
     with get_conn() as conn:
-        c = conn.cursor()
-        c.execute('SELECT * FROM agent_outputs WHERE job_id = ? ORDER BY timestamp', (job_id,))
-        rows = c.fetchall()
+        rows = conn.execute('SELECT * FROM agent_outputs WHERE job_id = ? ORDER BY timestamp', (job_id,)).fetchall()
+        cache: Dict[str, Any] = {}
+        return [_inflate_output(conn, row, cache) for row in rows]
+
+def list_agent_outputs(job_id: str) -> List[Dict[str, Any]]:
+    """Metadata of a job's agent outputs (id, agent_name, size, timestamp) without loading their content"""
+    with get_conn() as conn:
+        rows = conn.execute('''SELECT o.id, o.agent_name, o.timestamp,
+                                      COALESCE(b.size, length(CAST(o.json_output AS BLOB)), 0) AS size
+                               FROM agent_outputs o LEFT JOIN blobs b ON b.hash = o.blob_hash
+                               WHERE o.job_id = ? ORDER BY o.timestamp''', (job_id,)).fetchall()
+        return [dict(row) for row in rows]
+
+def get_agent_output(output_id: int) -> Optional[Dict[str, Any]]:
+    """Load a single agent output by id"""
+    with get_conn() as conn:
+        row = conn.execute('SELECT * FROM agent_outputs WHERE id = ?', (output_id,)).fetchone()
+        return _inflate_output(conn, row, {}) if row else None
+
+# Arrays NumPy (dados colunares dos modelos indexados) ficam na mesma tabela de blobs, em formato .npy
+def put_array(values: Any) -> str:
+    """Store an array (columnar model data) compressed and content-addressed; returns its hash"""
+    buffer = io.BytesIO()
+    np.save(buffer, np.asarray(values), allow_pickle=False)
+    raw = buffer.getvalue()
+    blob_hash = hashlib.sha256(raw).hexdigest()
+    with transaction() as conn:
+        if conn.execute('SELECT 1 FROM blobs WHERE hash = ?', (blob_hash,)).fetchone() is None:
+            codec, data = _compress(raw)
+            conn.execute('INSERT INTO blobs (hash, codec, data, size) VALUES (?, ?, ?, ?)',
+                         (blob_hash, f'npy+{codec}', data, len(raw)))
+    return blob_hash
+
+def get_array(blob_hash: str) -> np.ndarray:
+    """Load an array stored with put_array"""
+    with get_conn() as conn:
+        row = conn.execute('SELECT codec, data FROM blobs WHERE hash = ?', (blob_hash,)).fetchone()
+    if row is None or not row['codec'].startswith('npy+'):
+        raise KeyError(f"Missing array {blob_hash}")
+    return np.load(io.BytesIO(_decompress(row['codec'], row['data'])), allow_pickle=False)
+
+def storage_stats() -> Dict[str, int]:
+    with get_conn() as conn:
+        row = conn.execute('SELECT COUNT(*) AS blobs, COALESCE(SUM(size), 0) AS raw_bytes, '
+                           'COALESCE(SUM(length(data)), 0) AS stored_bytes FROM blobs').fetchone()
+        return dict(row)
+
+
+# --- Fila de execução dos jobs (consumida pelos workers de agents/job_runner.py) ---
+QUEUE_MAX_ATTEMPTS = 3
+
+def enqueue_job(job: Dict[str, Any], conversations: List[Dict[str, Any]], outputs: List[Dict[str, Any]],
+                payload: Dict[str, Any]):
+    """Save a new job (as save_job_bundle) and queue it for a background worker in the same transaction"""
+    with transaction() as conn:
+        save_job_bundle(job, conversations, outputs)
+        conn.execute('INSERT INTO job_queue (job_id, payload, enqueued_at) VALUES (?, ?, ?)',
+                     (job['id'], json.dumps(payload), time.time()))
+
+def claim_job(worker: str, lease_seconds: float) -> Optional[Dict[str, Any]]:
+    """Atomically take the oldest queued job (or one whose worker lease expired)
+
+    Returns the queue row with its payload decoded, or None when there is nothing to run.
+    """
+    now = time.time()
+    with transaction() as conn:
+        # Workers que morreram no meio do job: devolve para a fila ou falha após QUEUE_MAX_ATTEMPTS
+        expired = conn.execute("SELECT job_id, attempts FROM job_queue WHERE state = 'running' AND lease_until < ?",
+                               (now,)).fetchall()
+        for row in expired:
+            if row['attempts'] >= QUEUE_MAX_ATTEMPTS:
+                _finish_job(conn, row['job_id'], 'failed', 'Worker stopped responding', now)
+            else:
+                conn.execute("UPDATE job_queue SET state = 'queued', worker = NULL WHERE job_id = ?", (row['job_id'],))
+        row = conn.execute("SELECT * FROM job_queue WHERE state = 'queued' ORDER BY enqueued_at LIMIT 1").fetchone()
+        if row is None:
+            return None
+        conn.execute('''UPDATE job_queue SET state = 'running', worker = ?, lease_until = ?, attempts = attempts + 1
+                        WHERE job_id = ?''', (worker, now + lease_seconds, row['job_id']))
+        item = dict(row)
+    item['payload'] = json.loads(item['payload'])
+    item['attempts'] += 1
+    return item
+
+def renew_lease(job_id: str, worker: str, lease_seconds: float) -> bool:
+    """Extend a running job's lease; False if the job no longer belongs to this worker"""
+    with transaction() as conn:
+        cur = conn.execute("UPDATE job_queue SET lease_until = ? WHERE job_id = ? AND worker = ? AND state = 'running'",
+                           (time.time() + lease_seconds, job_id, worker))
+        return cur.rowcount == 1
+
+def _finish_job(conn: sqlite3.Connection, job_id: str, state: str, error: Optional[str], now: float):
+    conn.execute('UPDATE job_queue SET state = ?, error = ?, finished_at = ?, lease_until = NULL WHERE job_id = ?',
+                 (state, error, now, job_id))
+    if state == 'failed':
+        conn.execute("UPDATE jobs SET status = 'Failed', final_message = ? WHERE id = ?",
+                     (f"❌ Optimization failed: {error}", job_id))
+
+def finish_job(job_id: str, error: Optional[str] = None):
+    """Mark a queued job as done, or as failed (and the job itself) when error is given"""
+    with transaction() as conn:
+        _finish_job(conn, job_id, 'failed' if error else 'done', error, time.time())
+
+def update_job_status(job_id: str, status: str, final_message: Optional[str] = None):
+    with transaction() as conn:
+        if final_message is None:
+            conn.execute('UPDATE jobs SET status = ? WHERE id = ?', (status, job_id))
+        else:
+            conn.execute('UPDATE jobs SET status = ?, final_message = ? WHERE id = ?', (status, final_message, job_id))
+
+def requeue_job(job_id: str) -> bool:
+    """Put a finished or failed job back in the queue; False if it is not queued or still running"""
+    with transaction() as conn:
+        cur = conn.execute('''UPDATE job_queue SET state = 'queued', attempts = 0, worker = NULL, error = NULL,
+                                                   finished_at = NULL, enqueued_at = ?
+                              WHERE job_id = ? AND state IN ('done', 'failed')''', (time.time(), job_id))
+        if cur.rowcount != 1:
+            return False
+        conn.execute("UPDATE jobs SET status = 'Queued' WHERE id = ?", (job_id,))
+        return True
+
+def get_queue_item(job_id: str) -> Optional[Dict[str, Any]]:
+    with get_conn() as conn:
+        row = conn.execute('SELECT job_id, state, attempts, worker, enqueued_at, finished_at, error '
+                           'FROM job_queue WHERE job_id = ?', (job_id,)).fetchone()
+        return dict(row) if row else None
+
+def queue_counts() -> Dict[str, int]:
+    with get_conn() as conn:
+        rows = conn.execute('SELECT state, COUNT(*) AS n FROM job_queue GROUP BY state').fetchall()
+        return {row['state']: row['n'] for row in rows}
+
+
+# --- Histórico das corridas de solvers (optimization/portfolio.py) ---
+def record_solver_race(problem_type: str, entrants: List[str], winner: Optional[str], solve_time: float = 0.0):
+    """Count a race for every entrant and a win (with its solve time) for the winner"""
+    with transaction() as conn:
+        conn.executemany('''INSERT INTO solver_stats (problem_type, solver, races) VALUES (?, ?, 1)
+                            ON CONFLICT(problem_type, solver) DO UPDATE SET races = races + 1''',
+                         [(problem_type, solver) for solver in entrants])
+        if winner:
+            conn.execute('UPDATE solver_stats SET wins = wins + 1, win_seconds = win_seconds + ? '
+                         'WHERE problem_type = ? AND solver = ?', (solve_time, problem_type, winner))
+
+def solver_ranking(problem_type: str) -> List[Dict[str, Any]]:
+    """Solvers that raced on a problem type, best first (most wins, then fastest average win)"""
+    with get_conn() as conn:
+        rows = conn.execute('''SELECT solver, races, wins, win_seconds / MAX(wins, 1) AS avg_win_seconds
+                               FROM solver_stats WHERE problem_type = ?
+                               ORDER BY wins DESC, avg_win_seconds ASC, solver''', (problem_type,)).fetchall()
         return [dict(row) for row in rows]
 
+
+# --- Cache de soluções ótimas, chaveado pela forma canônica do modelo (optimization/canonical.py) ---
+def get_cached_solution(fingerprint: str) -> Optional[Dict[str, Any]]:
+    """Cached optimal solution of a model fingerprint (counts the hit or miss)"""
+    with transaction() as conn:
+        row = conn.execute('SELECT * FROM solution_cache WHERE fingerprint = ?', (fingerprint,)).fetchone()
+        counter = 'hits' if row else 'misses'
+        conn.execute('UPDATE solution_cache_stats SET value = value + 1 WHERE name = ?', (counter,))
+        if row is None:
+            return None
+        conn.execute('UPDATE solution_cache SET hits = hits + 1, last_hit = ? WHERE fingerprint = ?',
+                     (time.time(), fingerprint))
+    entry = dict(row)
+    entry['solution'] = json.loads(entry['solution'])
+    return entry
+
+def put_cached_solution(fingerprint: str, solution: List[float], objective_value: float, solver: Optional[str],
+                        solve_time: float, problem_type: Optional[str] = None):
+    """Store an optimal solution (values in canonical column order)"""
+    with transaction() as conn:
+        conn.execute('''INSERT OR REPLACE INTO solution_cache
+                        (fingerprint, problem_type, objective_value, solution, solver, solve_time, created_at)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)''',
+                     (fingerprint, problem_type, objective_value, json.dumps(solution), solver, solve_time, time.time()))
+
+def solution_cache_stats() -> Dict[str, Any]:
+    """Hit/miss counters, number of entries and solver time saved by the solution cache"""
+    with get_conn() as conn:
+        counters = {row['name']: row['value'] for row in conn.execute('SELECT name, value FROM solution_cache_stats')}
+        row = conn.execute('SELECT COUNT(*) AS entries, COALESCE(SUM(hits * solve_time), 0) AS saved_seconds '
+                           'FROM solution_cache').fetchone()
+    hits, misses = counters.get('hits', 0), counters.get('misses', 0)
+    return {
+        'hits': hits,
+        'misses': misses,
+        'entries': row['entries'],
+        'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+        'saved_seconds': row['saved_seconds'],
+    }
+
+def list_cached_solutions(limit: int = 20) -> List[Dict[str, Any]]:
+    """Most reused cache entries"""
+    with get_conn() as conn:
+        rows = conn.execute('''SELECT fingerprint, problem_type, objective_value, solver, solve_time, hits, created_at, last_hit
+                               FROM solution_cache ORDER BY hits DESC, created_at DESC LIMIT ?''', (limit,)).fetchall()
+        return [dict(row) for row in rows]
+
+def clear_solution_cache():
+    """Remove every cached solution and reset the counters"""
+    with transaction() as conn:
+        conn.execute('DELETE FROM solution_cache')
+        conn.execute('UPDATE solution_cache_stats SET value = 0')
+
 # Inicializa o banco ao importar
-init_db() 
\ No newline at end of file
+init_db()
@@ -0,0 +1,53 @@
+"""
+Agent output viewer for OptiMind
+Renders a job's agent outputs lazily: content is fetched and parsed only when its expander is opened
+"""
+
+import json
+from collections import OrderedDict
+
+import streamlit as st
+from utils import db
+
+CACHE_KEY = 'agent_output_cache'
+CACHE_SIZE = 32
+
+def format_size(size):
+    """Tamanho legível (B, KB, MB)"""
+    for unit in ('B', 'KB'):
+        if size < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} MB"
+
+def load_output(output_id):
+    """Busca e faz o parse de um output, mantendo um LRU dos últimos abertos na sessão"""
+    cache = st.session_state.setdefault(CACHE_KEY, OrderedDict())
+    if output_id in cache:
+        cache.move_to_end(output_id)
+        return cache[output_id]
+    output = db.get_agent_output(output_id)
+    if output is None:
+        return None
+    try:
+        data = json.loads(output['json_output'])
+    except Exception:
+        data = output['json_output']
+    cache[output_id] = data
+    while len(cache) > CACHE_SIZE:
+        cache.popitem(last=False)
+    return data
+
+def render_agent_outputs(job_id):
+    """Lista os outputs do job; o conteúdo de cada um só é carregado quando o expander é aberto"""
+    outputs = db.list_agent_outputs(job_id)
+    if not outputs:
+        st.warning('No agent outputs found for this job.')
+        return False
+    for output in outputs:
+        label = f"{output['agent_name']} Agent Output ({format_size(output['size'])})"
+        expander = st.expander(label, expanded=False, key=f"agent_output_{output['id']}", on_change='rerun')
+        if expander.open:
+            with expander:
+                st.json(load_output(output['id']))
+    return True
@@ -17,6 +17,8 @@ def clear_chat_cache():
         'refined_problem_data',
         'pipeline_stage',
         'pipeline_complete',
+        'pipeline_running',
+        'pipeline_message_count',
         'current_job_id',
         'processing_complete',
         'optimization_results'